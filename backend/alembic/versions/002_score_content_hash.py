@@ -0,0 +1,23 @@
+"""Add content hash to scores for change-detecting bulk writes
+
+Revision ID: 002
+Revises: 001
+Create Date: 2024-10-07 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('scores', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scores', 'content_hash')
@@ -0,0 +1,74 @@
+"""Unique period name per period type
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-10-14 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Periods are resolved by (type, name), e.g. ('monthly', '2024-01').
+    _merge_duplicate_periods()
+    with op.batch_alter_table('periods') as batch_op:
+        batch_op.create_unique_constraint('uq_period_type_name', ['type', 'name'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('periods') as batch_op:
+        batch_op.drop_constraint('uq_period_type_name', type_='unique')
+
+
+def _merge_duplicate_periods() -> None:
+    """Merge periods sharing a (type, name), as created by concurrent runs
+
+    The locked period is kept, otherwise the oldest, and the scores of the
+    others are moved onto it. A user scored in more than one copy keeps the
+    most recently computed score, flagged for recalculation.
+    """
+    bind = op.get_bind()
+    metadata = sa.MetaData()
+    periods = sa.Table('periods', metadata, autoload_with=bind)
+    scores = sa.Table('scores', metadata, autoload_with=bind)
+
+    duplicated = sa.select(periods.c.type, periods.c.name).group_by(
+        periods.c.type, periods.c.name
+    ).having(sa.func.count() > 1).subquery()
+    rows = bind.execute(
+        sa.select(periods.c.id, periods.c.type, periods.c.name, periods.c.is_locked).join(
+            duplicated, sa.and_(periods.c.type == duplicated.c.type, periods.c.name == duplicated.c.name)
+        ).order_by(periods.c.type, periods.c.name, periods.c.id)
+    ).all()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.type, row.name), []).append(row)
+
+    for group in groups.values():
+        kept = next((row for row in group if row.is_locked), group[0])
+        merged = [row.id for row in group if row.id != kept.id]
+
+        by_user = {}
+        for score in bind.execute(
+            sa.select(scores.c.id, scores.c.user_id).where(
+                scores.c.period_id.in_([kept.id] + merged)
+            ).order_by(scores.c.user_id, scores.c.computed_at.desc(), scores.c.id.desc())
+        ):
+            by_user.setdefault(score.user_id, []).append(score.id)
+
+        stale = [score_id for score_ids in by_user.values() for score_id in score_ids[1:]]
+        flagged = [score_ids[0] for score_ids in by_user.values() if len(score_ids) > 1]
+        if stale:
+            bind.execute(scores.delete().where(scores.c.id.in_(stale)))
+            bind.execute(scores.update().where(scores.c.id.in_(flagged)).values(needs_recalculation=True))
+
+        bind.execute(scores.update().where(scores.c.period_id.in_(merged)).values(period_id=kept.id))
+        bind.execute(periods.delete().where(periods.c.id.in_(merged)))
@@ -0,0 +1,48 @@
+"""Append-only score ledger of event contributions
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'score_ledger',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period_year', sa.Integer(), nullable=False),
+        sa.Column('period_month', sa.Integer(), nullable=False),
+        sa.Column('rule_id', sa.Integer(), nullable=False),
+        sa.Column('sign', sa.Integer(), nullable=False),
+        sa.Column('final_score', sa.Float(), nullable=False),
+        sa.Column('original_score', sa.Float(), nullable=False),
+        sa.Column('adjusted_score', sa.Float(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['rule_id'], ['rules.id']),
+    )
+    op.create_index('ix_score_ledger_event_id', 'score_ledger', ['event_id'], unique=False)
+    op.create_index(
+        'ix_score_ledger_user_period_time', 'score_ledger',
+        ['user_id', 'period_year', 'period_month', 'recorded_at'], unique=False
+    )
+    # Existing approved events are seeded after upgrading with
+    # `python scripts/reconcile_score_ledger.py` (ScoreLedger.reconcile_all)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_score_ledger_user_period_time', table_name='score_ledger')
+    op.drop_index('ix_score_ledger_event_id', table_name='score_ledger')
+    op.drop_table('score_ledger')
@@ -0,0 +1,41 @@
+"""Per-rule running totals of monthly scores
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'score_rule_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period_year', sa.Integer(), nullable=False),
+        sa.Column('period_month', sa.Integer(), nullable=False),
+        sa.Column('rule_id', sa.Integer(), nullable=False),
+        sa.Column('events', sa.Integer(), nullable=False),
+        sa.Column('raw_total', sa.Float(), nullable=False),
+        sa.Column('capped_total', sa.Float(), nullable=False),
+        sa.Column('cap_applied', sa.Boolean(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['rule_id'], ['rules.id']),
+        sa.UniqueConstraint('user_id', 'period_year', 'period_month', 'rule_id', name='uq_rule_total_user_period_rule'),
+    )
+    # Rows are created when monthly scores are next written; existing scores
+    # seed them from their rule_breakdown on the first incremental change
+
+
+def downgrade() -> None:
+    op.drop_table('score_rule_totals')
@@ -0,0 +1,108 @@
+"""Unique external id per event source
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-10-17 12:00:00.000000
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Retried integration payloads are upserted on (source, external_id).
+    _dedupe_external_events()
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.create_unique_constraint('uq_event_source_external_id', ['source', 'external_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_constraint('uq_event_source_external_id', type_='unique')
+
+
+def _dedupe_external_events() -> None:
+    """Keep one event per (source, external_id) and delete the others
+
+    The approved event is kept, otherwise the oldest. Each deleted row is
+    recorded with its values in the audit log, and the monthly scores it
+    counted towards are flagged for recalculation.
+    """
+    bind = op.get_bind()
+    metadata = sa.MetaData()
+    events = sa.Table('events', metadata, autoload_with=bind)
+    scores = sa.Table('scores', metadata, autoload_with=bind)
+    audit_logs = sa.Table('audit_logs', metadata, autoload_with=bind)
+
+    duplicated = sa.select(events.c.source, events.c.external_id).where(
+        events.c.external_id.isnot(None)
+    ).group_by(events.c.source, events.c.external_id).having(sa.func.count() > 1).subquery()
+    rows = bind.execute(
+        sa.select(events).join(
+            duplicated,
+            sa.and_(events.c.source == duplicated.c.source, events.c.external_id == duplicated.c.external_id)
+        ).order_by(events.c.source, events.c.external_id, events.c.id)
+    ).mappings().all()
+    if not rows:
+        return
+
+    groups = {}
+    for row in rows:
+        groups.setdefault((row['source'], row['external_id']), []).append(row)
+
+    removed = []
+    for group in groups.values():
+        kept = next((row for row in group if _approved(row)), group[0])
+        removed.extend((row, kept['id']) for row in group if row['id'] != kept['id'])
+
+    now = datetime.utcnow()
+    bind.execute(audit_logs.insert(), [
+        {
+            'action': 'DELETE',
+            'entity_type': 'EVENT',
+            'entity_id': row['id'],
+            'entity_name': f"Event #{row['id']}",
+            'old_values': {key: _json_value(value) for key, value in row.items()},
+            'description': f"移除重複的外部事件，保留 Event #{kept_id}",
+            'success': True,
+            'risk_score': 0,
+            'is_sensitive': False,
+            'requires_review': False,
+            'timestamp': now,
+            'created_at': now,
+        }
+        for row, kept_id in removed
+    ])
+    bind.execute(events.delete().where(events.c.id.in_([row['id'] for row, _ in removed])))
+
+    for user_id, year, month in {
+        (row['user_id'], row['period_year'], row['period_month']) for row, _ in removed if _approved(row)
+    }:
+        bind.execute(
+            scores.update().where(
+                sa.and_(
+                    scores.c.user_id == user_id,
+                    scores.c.period_year == year,
+                    scores.c.period_month == month
+                )
+            ).values(needs_recalculation=True)
+        )
+
+
+def _approved(row) -> bool:
+    # Rows written by the ORM hold the enum name, rows from SQL may hold the value
+    return str(row['status']).lower() == 'approved'
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
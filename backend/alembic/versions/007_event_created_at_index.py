@@ -0,0 +1,23 @@
+"""Index events by (created_at, id) for cursor pagination
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # GET /events lists newest first and seeks past a (created_at, id) cursor
+    op.create_index('ix_events_created_at_id', 'events', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_created_at_id', table_name='events')
@@ -0,0 +1,63 @@
+"""N-gram full-text index on event title and description
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-10-19 12:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.services.event_search as of this revision; later changes
+# to the tokenizer ship with their own migration and a rebuild of the index
+FTS_TABLE = 'events_fts'
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"  # Kana, CJK ideographs, Hangul
+_TOKEN = re.compile(rf"([{_CJK}]+)|((?:(?![{_CJK}])\w)+)")
+
+
+def index_text(title, description):
+    """Space-separated tokens: CJK runs as bigrams plus their last character, other words whole"""
+    tokens = []
+    for text_value in (title, description):
+        for cjk, word in _TOKEN.findall(text_value or ''):
+            if not cjk:
+                tokens.append(word.lower())
+            elif len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend([cjk[i:i + 2] for i in range(len(cjk) - 1)] + [cjk[-1]])
+    return ' '.join(tokens)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        # Uses the server's ngram_token_size (default 2)
+        op.execute(
+            "CREATE FULLTEXT INDEX ft_events_title_description "
+            "ON events (title, description) WITH PARSER ngram"
+        )
+    elif bind.dialect.name == 'sqlite':
+        op.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(content, tokenize='unicode61')")
+        rows = bind.execute(sa.text("SELECT id, title, description FROM events")).all()
+        if rows:
+            bind.execute(
+                sa.text(f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (:event_id, :content)"),
+                [{"event_id": row.id, "content": index_text(row.title, row.description)} for row in rows]
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        op.drop_index('ft_events_title_description', table_name='events')
+    elif bind.dialect.name == 'sqlite':
+        op.execute(f"DROP TABLE {FTS_TABLE}")
@@ -0,0 +1,49 @@
+"""Composite indexes for scoring, summary and ranking queries
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-10-20 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Approved events of a period, for every user or one (scoring kernel, rescoring)
+    op.create_index(
+        'ix_events_period_status_user', 'events',
+        ['period_year', 'period_month', 'status', 'user_id'], unique=False
+    )
+    # Employee and manager event summaries, answered from the index alone
+    op.create_index(
+        'ix_events_user_period_status', 'events',
+        ['user_id', 'period_year', 'period_month', 'status', 'final_score'], unique=False
+    )
+    op.create_index(
+        'ix_events_department_period_status', 'events',
+        ['department_id', 'period_year', 'period_month', 'status', 'final_score'], unique=False
+    )
+    # Company and department rankings; replaces ix_scores_period_department,
+    # which is a left prefix of it and only costs writes
+    op.create_index(
+        'ix_scores_period_department_total', 'scores',
+        ['period_year', 'period_month', 'department_id', 'total_score'], unique=False
+    )
+    op.drop_index('ix_scores_period_department', table_name='scores')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_scores_period_department', 'scores',
+        ['period_year', 'period_month', 'department_id'], unique=False
+    )
+    op.drop_index('ix_scores_period_department_total', table_name='scores')
+    op.drop_index('ix_events_department_period_status', table_name='events')
+    op.drop_index('ix_events_user_period_status', table_name='events')
+    op.drop_index('ix_events_period_status_user', table_name='events')
@@ -0,0 +1,33 @@
+"""Queue of monthly scores waiting for their first calculation
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-10-21 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pending_scores',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['period_id'], ['periods.id']),
+        sa.UniqueConstraint('user_id', 'period_id', name='uq_pending_score_user_period'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('pending_scores')
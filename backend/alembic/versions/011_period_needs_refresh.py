@@ -0,0 +1,25 @@
+"""Flag periods whose ranks and rollups lag behind incremental score edits
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-10-22 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'periods', sa.Column('needs_refresh', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('periods', 'needs_refresh')
@@ -4,16 +4,18 @@ Event management endpoints - Complete implementation
 
 from typing import List, Optional
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form
-from sqlmodel import Session, select, and_, or_
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form, Response
+from sqlmodel import Session, select, and_
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.models import (
-    Event, EventCreate, EventUpdate, EventRead, EventApproval, EventStatus,
+    Event, EventCreate, EventBulkCreate, EventUpdate, EventRead, EventApproval, EventBatchApproval, EventStatus,
     User, Rule, Department, Project, AuditLog, AuditAction, AuditEntityType
 )
 from app.services.auth import get_current_user
 from app.services.event import EventService
+from app.services.event_search import EventSearch
 from app.services.file import FileService
 
 router = APIRouter()
@@ -21,6 +23,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[EventRead])
 async def get_events(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     status_filter: Optional[EventStatus] = None,
@@ -30,11 +33,18 @@ async def get_events(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     search: Optional[str] = None,
+    rank_by_relevance: bool = True,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> List[EventRead]:
     """
     Get events list with filtering and pagination
+    
+    A full page sets the X-Next-Cursor header; pass it back as `cursor` to
+    seek to the next page instead of skipping rows (`skip` is then ignored).
+    `search` results come best match first and are paged with `skip`; set
+    `rank_by_relevance=false` to list them newest first with cursors.
     """
     statement = select(Event)
     
@@ -67,23 +77,26 @@ async def get_events(
     if date_to:
         statement = statement.where(Event.occurred_at <= date_to)
     
+    # Search results are ranked by relevance unless walked with a cursor
+    ranked = bool(search) and rank_by_relevance and not cursor
     if search:
-        statement = statement.where(
-            or_(
-                Event.title.contains(search),
-                Event.description.contains(search)
-            )
-        )
+        statement = EventSearch(db).filter(statement, search, ranked=ranked)
     
-    # Order by most recent first
-    statement = statement.order_by(Event.created_at.desc())
-    statement = statement.offset(skip).limit(limit)
+    # Order by most recent first; id breaks ties so the cursor is exact
+    statement = statement.order_by(Event.created_at.desc(), Event.id.desc())
+    if cursor:
+        statement = statement.where(EventService.after_cursor(cursor)).limit(limit)
+    else:
+        statement = statement.offset(skip).limit(limit)
     
     events = db.exec(statement).all()
     
+    if len(events) == limit and not ranked:
+        response.headers["X-Next-Cursor"] = EventService.encode_cursor(events[-1])
+    
     # Convert to EventRead with additional data
     event_service = EventService(db)
-    return [event_service.to_read_model(event) for event in events]
+    return event_service.to_read_models(events)
 
 
 @router.post("/", response_model=EventRead)
@@ -108,6 +121,60 @@ async def create_event(
     return event_service.to_read_model(event)
 
 
+@router.post("/bulk")
+async def create_events_bulk(
+    bulk_data: EventBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> dict:
+    """
+    Create many events in one request (integrations)
+    
+    Invalid items do not fail the request; each item gets its own result.
+    """
+    if len(bulk_data.events) > settings.EVENT_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"單次最多可建立 {settings.EVENT_BULK_MAX_ITEMS} 筆事件"
+        )
+    
+    event_service = EventService(db)
+    return await event_service.create_events_bulk(bulk_data.events, current_user)
+
+
+@router.post("/approve-batch")
+async def approve_events_batch(
+    approval_data: EventBatchApproval,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> dict:
+    """
+    Approve or reject many pending events (manager/admin only)
+
+    Events that cannot be reviewed are skipped and listed with the reason.
+    """
+    if current_user.role not in ["manager", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="權限不足，無法審核事件"
+        )
+
+    if approval_data.status not in (EventStatus.APPROVED, EventStatus.REJECTED):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="審核狀態只能是核准或拒絕"
+        )
+
+    if len(approval_data.event_ids) > settings.EVENT_APPROVE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"單次最多可審核 {settings.EVENT_APPROVE_BATCH_MAX_ITEMS} 筆事件"
+        )
+
+    event_service = EventService(db)
+    return await event_service.approve_events(approval_data.event_ids, approval_data, current_user)
+
+
 @router.get("/{event_id}", response_model=EventRead)
 async def get_event(
     event_id: int,
@@ -81,12 +81,18 @@ class Settings(BaseSettings):
     
     # Scoring Engine
     SCORING_SCHEDULE_HOUR: int = 2  # 2 AM daily recalculation
+    SCORING_SCHEDULER_ENABLED: bool = True  # Nightly dirty-set job; one worker runs it per day (Redis lock)
     SCORING_BATCH_SIZE: int = 1000
+    SCORING_WORKERS: int = 1  # Processes for recalculate_period (1 = sequential)
     SCORING_HISTORY_DAYS: int = 90  # Keep 90 days of calculation history
     
     # Performance
     CACHE_TTL: int = 300  # 5 minutes
+    RULE_CACHE_VERSION_CHECK_SECONDS: float = 1.0  # How often workers poll the shared rule version
     API_RATE_LIMIT: int = 100  # requests per minute
+    EVENT_BULK_MAX_ITEMS: int = 5000  # Events per POST /events/bulk request
+    EVENT_APPROVE_BATCH_MAX_ITEMS: int = 1000  # Events per POST /events/approve-batch request
+    EVENT_SUMMARY_CACHE_TTL: int = 30  # Seconds a per-scope monthly event summary is reused
     
     @validator("CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> List[str]:
@@ -9,6 +9,7 @@ from typing import AsyncGenerator
 import logging
 
 from app.core.config import settings
+from app.services.event_search import EventSearch
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,14 @@ async def create_tables():
     """Create database tables"""
     try:
         SQLModel.metadata.create_all(bind=engine)
+        
+        # Search index for databases whose events table predates it
+        with Session(engine) as db:
+            indexed = EventSearch(db).ensure_index()
+            db.commit()
+        if indexed:
+            logger.info(f"Event search index built for {indexed} events")
+        
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
@@ -13,6 +13,7 @@ import logging
 from app.core.config import settings
 from app.core.database import create_tables
 from app.api.api_v1.api import api_router
+from app.services.scheduler import scoring_scheduler
 
 
 # Configure logging
@@ -32,8 +33,14 @@ async def lifespan(app: FastAPI):
     await create_tables()
     logger.info("Database tables created/verified")
     
+    # Nightly dirty-set score recalculation
+    if settings.SCORING_SCHEDULER_ENABLED:
+        scoring_scheduler.start()
+        logger.info(f"Scoring scheduler started (daily at {scoring_scheduler.hour}:00)")
+    
     yield
     
+    await scoring_scheduler.stop()
     logger.info("Shutting down HR Performance Management System...")
 
 
@@ -55,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Trusted Host Middleware
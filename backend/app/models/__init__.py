@@ -20,13 +20,16 @@ from app.models.rule_pack import (
     Rule, RuleCreate, RuleUpdate, RuleRead, RuleDirection
 )
 from app.models.event import (
-    Event, EventCreate, EventUpdate, EventRead, EventApproval, EventSummary,
+    Event, EventCreate, EventBulkCreate, EventUpdate, EventRead, EventApproval, EventBatchApproval, EventSummary,
     EventSource, EventStatus
 )
 from app.models.period import Period, PeriodCreate, PeriodUpdate, PeriodRead, PeriodType
 from app.models.score import (
     Score, ScoreCreate, ScoreUpdate, ScoreRead, ScoreRanking, DepartmentScore
 )
+from app.models.score_ledger import ScoreLedgerEntry
+from app.models.score_rule_total import ScoreRuleTotal
+from app.models.pending_score import PendingScore
 from app.models.audit_log import (
     AuditLog, AuditLogCreate, AuditLogRead, AuditLogFilter, AuditSummary,
     AuditAction, AuditEntityType
@@ -48,12 +51,13 @@ __all__ = [
     "Rule", "RuleCreate", "RuleUpdate", "RuleRead", "RuleDirection",
     
     # Events
-    "Event", "EventCreate", "EventUpdate", "EventRead", "EventApproval", "EventSummary",
+    "Event", "EventCreate", "EventBulkCreate", "EventUpdate", "EventRead", "EventApproval", "EventBatchApproval", "EventSummary",
     "EventSource", "EventStatus",
     
     # Periods and scores
     "Period", "PeriodCreate", "PeriodUpdate", "PeriodRead", "PeriodType",
     "Score", "ScoreCreate", "ScoreUpdate", "ScoreRead", "ScoreRanking", "DepartmentScore",
+    "ScoreLedgerEntry", "ScoreRuleTotal", "PendingScore",
     
     # Audit and compliance
     "AuditLog", "AuditLogCreate", "AuditLogRead", "AuditLogFilter", "AuditSummary",
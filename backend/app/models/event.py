@@ -5,7 +5,7 @@ Event model - Performance events with scoring
 from datetime import datetime, date
 from typing import Optional, List, Dict, Any
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index, UniqueConstraint
 from enum import Enum
 
 from app.models.base import BaseModel
@@ -33,6 +33,20 @@ class Event(BaseModel, table=True):
     """Performance event model"""
     
     __tablename__ = "events"
+    __table_args__ = (
+        # Integrations retry; one event per external id and source (NULL ids are not constrained)
+        UniqueConstraint("source", "external_id", name="uq_event_source_external_id"),
+        # Newest-first listing and cursor seeks on GET /events
+        Index("ix_events_created_at_id", "created_at", "id"),
+        # A period's approved events, for every user or one, in (user_id, id) order
+        Index("ix_events_period_status_user", "period_year", "period_month", "status", "user_id"),
+        # Employee and manager scoped summaries, covered by the index
+        Index("ix_events_user_period_status", "user_id", "period_year", "period_month", "status", "final_score"),
+        Index(
+            "ix_events_department_period_status",
+            "department_id", "period_year", "period_month", "status", "final_score"
+        ),
+    )
     
     # People
     user_id: int = Field(foreign_key="users.id", index=True)  # Person being evaluated
@@ -153,6 +167,11 @@ class EventCreate(SQLModel):
     source_metadata: Optional[Dict[str, Any]] = None
 
 
+class EventBulkCreate(SQLModel):
+    """Bulk event creation schema"""
+    events: List[EventCreate] = Field(..., min_length=1)
+
+
 class EventUpdate(SQLModel):
     """Event update schema"""
     user_id: Optional[int] = None
@@ -174,6 +193,11 @@ class EventApproval(SQLModel):
     review_notes: Optional[str] = Field(default=None, max_length=500)
 
 
+class EventBatchApproval(EventApproval):
+    """One approval decision applied to many events"""
+    event_ids: List[int] = Field(..., min_length=1)
+
+
 class EventRead(SQLModel):
     """Event read schema"""
     id: int
@@ -0,0 +1,29 @@
+"""
+Pending score model - Monthly scores waiting for their first calculation
+"""
+
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import UniqueConstraint
+
+
+class PendingScore(SQLModel, table=True):
+    """A (user, period) with approved events but no Score row yet
+
+    Queued by `ScoringEngine.mark_for_recalculation` and cleared once the
+    nightly dirty-set run has written the score, so unscored users never
+    appear in rankings as a zero total.
+    """
+
+    __tablename__ = "pending_scores"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period_id", name="uq_pending_score_user_period"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    user_id: int = Field(foreign_key="users.id")
+    period_id: int = Field(foreign_key="periods.id")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
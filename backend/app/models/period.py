@@ -5,6 +5,7 @@ Period model - Scoring calculation periods
 from datetime import date, datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
+from sqlalchemy import UniqueConstraint
 from enum import Enum
 
 from app.models.base import BaseModel
@@ -21,6 +22,7 @@ class Period(BaseModel, table=True):
     """Scoring calculation period"""
     
     __tablename__ = "periods"
+    __table_args__ = (UniqueConstraint("type", "name", name="uq_period_type_name"),)
     
     # Period Definition
     type: PeriodType = Field(index=True)
@@ -36,9 +38,10 @@ class Period(BaseModel, table=True):
     is_locked: bool = Field(default=False)
     locked_by: Optional[int] = Field(default=None, foreign_key="users.id")
     locked_at: Optional[datetime] = Field(default=None)
+    needs_refresh: bool = Field(default=False)  # Ranks and rollups behind incremental score edits
     
     # Metadata
-    name: str = Field(max_length=50)  # e.g., "2024-01", "2024-Q1", "2024"
+    name: str = Field(max_length=50)  # e.g., "2024-01", "2024-Q1", "2024"; unique per type
     description: Optional[str] = Field(default=None)
     
     def __str__(self):
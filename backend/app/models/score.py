@@ -5,7 +5,7 @@ Score model - Calculated performance scores (cached results)
 from datetime import datetime
 from typing import Optional, Dict, Any
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index, UniqueConstraint
 
 from app.models.base import BaseModel
 
@@ -14,6 +14,11 @@ class Score(BaseModel, table=True):
     """Calculated performance score for caching and reporting"""
     
     __tablename__ = "scores"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period_id", name="uq_user_period"),
+        # Company rankings (period prefix) and department rankings, in score order
+        Index("ix_scores_period_department_total", "period_year", "period_month", "department_id", "total_score"),
+    )
     
     # User and Period
     user_id: int = Field(foreign_key="users.id", index=True)
@@ -62,6 +67,7 @@ class Score(BaseModel, table=True):
     computed_at: datetime = Field(default_factory=datetime.utcnow)
     events_computed_count: int = Field(default=0)  # Number of events included in calculation
     computation_version: str = Field(default="1.0", max_length=10)  # For tracking calculation changes
+    content_hash: Optional[str] = Field(default=None, max_length=64)  # Hash of the computed payload, skips unchanged writes
     
     # Flags
     is_locked: bool = Field(default=False)  # Period locked
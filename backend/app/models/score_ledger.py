@@ -0,0 +1,44 @@
+"""
+Score ledger model - Append-only record of event contributions to scores
+"""
+
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+
+
+class ScoreLedgerEntry(SQLModel, table=True):
+    """One event starting (+1) or stopping (-1) to count towards a user's monthly score
+
+    Rows are never updated or deleted. An event edit is recorded as a -1 row
+    with the old values followed by a +1 row with the new ones.
+    """
+
+    __tablename__ = "score_ledger"
+    __table_args__ = (
+        # (user, period) history up to a point in time is one range scan
+        Index("ix_score_ledger_user_period_time", "user_id", "period_year", "period_month", "recorded_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Event (no foreign key: entries outlive deleted events)
+    event_id: int = Field(index=True)
+
+    # Score the contribution belongs to
+    user_id: int = Field(foreign_key="users.id")
+    period_year: int
+    period_month: int
+    rule_id: int = Field(foreign_key="rules.id")
+
+    # +1 when the event starts counting, -1 when it stops
+    sign: int
+
+    # Event values at the time of recording
+    final_score: float
+    original_score: float
+    adjusted_score: Optional[float] = Field(default=None)
+
+    # Naive UTC
+    recorded_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,35 @@
+"""
+Score rule total model - Running per-rule accumulators of monthly scores
+"""
+
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy import UniqueConstraint
+
+
+class ScoreRuleTotal(SQLModel, table=True):
+    """A user's running total for one rule in one month
+
+    Holds what the monthly cap needs, so a single event change re-evaluates
+    the cap without reading the rule's other events.
+    """
+
+    __tablename__ = "score_rule_totals"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period_year", "period_month", "rule_id", name="uq_rule_total_user_period_rule"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    user_id: int = Field(foreign_key="users.id")
+    period_year: int
+    period_month: int
+    rule_id: int = Field(foreign_key="rules.id")
+
+    events: int = Field(default=0)
+    raw_total: float = Field(default=0.0)  # Sum of clamped event scores
+    capped_total: float = Field(default=0.0)  # After the monthly cap and category weight
+    cap_applied: bool = Field(default=False)
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
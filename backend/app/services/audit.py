@@ -2,8 +2,9 @@
 Audit logging service - Track all system operations
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+from sqlalchemy import insert
 from sqlmodel import Session
 
 from app.models import AuditLog, AuditAction, AuditEntityType, User
@@ -34,6 +35,57 @@ class AuditService:
     ) -> AuditLog:
         """Log an audit action"""
         
+        audit_log = self._build_audit_log(
+            actor, action, entity_type, entity_id, entity_name, old_values, new_values,
+            description, metadata, success, error_message, request_method, request_path,
+            request_id, session_id, execution_time_ms
+        )
+        
+        self.db.add(audit_log)
+        self.db.commit()
+        self.db.refresh(audit_log)
+        
+        return audit_log
+
+    async def log_actions(self, actor: User, entries: List[Dict[str, Any]]) -> int:
+        """Log many actions by one actor with one INSERT and a single commit
+        
+        Each entry holds `log_action` keyword arguments (action, entity_type,
+        entity_id, ...). Returns the number of entries written.
+        """
+        
+        table = AuditLog.__table__
+        rows = [
+            {column.name: getattr(audit_log, column.name) for column in table.columns if column.name != "id"}
+            for audit_log in (self._build_audit_log(actor, **entry) for entry in entries)
+        ]
+        if rows:
+            self.db.execute(insert(table), rows)
+        self.db.commit()
+        
+        return len(rows)
+
+    def _build_audit_log(
+        self,
+        actor: User,
+        action: AuditAction,
+        entity_type: AuditEntityType,
+        entity_id: Optional[int] = None,
+        entity_name: Optional[str] = None,
+        old_values: Optional[Dict[str, Any]] = None,
+        new_values: Optional[Dict[str, Any]] = None,
+        description: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        success: bool = True,
+        error_message: Optional[str] = None,
+        request_method: Optional[str] = None,
+        request_path: Optional[str] = None,
+        request_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        execution_time_ms: Optional[int] = None
+    ) -> AuditLog:
+        """Build an AuditLog row with diff and risk fields filled in"""
+        
         # Calculate diff if both old and new values are provided
         diff = None
         if old_values and new_values:
@@ -86,10 +138,6 @@ class AuditService:
             timestamp=datetime.utcnow()
         )
         
-        self.db.add(audit_log)
-        self.db.commit()
-        self.db.refresh(audit_log)
-        
         return audit_log
 
     def _calculate_risk_score(self, action: AuditAction, entity_type: AuditEntityType, actor_role: str) -> int:
@@ -0,0 +1,100 @@
+"""
+Dirty tracking - Flag scores affected by rule, rule pack and user moves
+
+Session flush listeners collect changed rules, rule packs and user department
+or role moves (which change the applicable rule packs), then flag exactly the
+affected monthly Score rows with `needs_recalculation` in the same transaction. The nightly job
+(`ScoringEngine.recalculate_dirty`) only recomputes flagged rows.
+
+Event writes are handled explicitly by `ScoringEngine.apply_event_change`.
+"""
+
+from datetime import datetime
+from typing import Dict, Set
+
+from sqlalchemy import event, inspect, update, select, and_
+from sqlalchemy.orm import Session
+
+from app.models import Event, EventStatus, Rule, RulePack, Score, User, PeriodType
+
+
+_PENDING_KEY = "score_dirty_tracking"
+
+
+def _pending(session: Session) -> Dict[str, Set[int]]:
+    """Get the per-session set of changes waiting to be flagged"""
+    return session.info.setdefault(_PENDING_KEY, {
+        "rule_ids": set(),
+        "rule_pack_ids": set(),
+        "user_ids": set()
+    })
+
+
+@event.listens_for(Session, "before_flush")
+def collect_score_invalidations(session: Session, flush_context, instances) -> None:
+    """Record rules, rule packs and users whose changes affect stored scores"""
+
+    pending = _pending(session)
+
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Rule) and obj.id is not None:
+            if obj in session.deleted or session.is_modified(obj, include_collections=False):
+                pending["rule_ids"].add(obj.id)
+        elif isinstance(obj, RulePack) and obj.id is not None:
+            if obj in session.deleted or session.is_modified(obj, include_collections=False):
+                pending["rule_pack_ids"].add(obj.id)
+        elif isinstance(obj, User) and obj.id is not None and obj not in session.deleted:
+            attrs = inspect(obj).attrs
+            if attrs.department_id.history.has_changes() or attrs.role.history.has_changes():
+                pending["user_ids"].add(obj.id)
+
+
+@event.listens_for(Session, "after_flush")
+def flag_affected_scores(session: Session, flush_context) -> None:
+    """Set needs_recalculation on the (user, period) scores touched by the flush"""
+
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not any(pending.values()):
+        return
+
+    connection = session.connection()
+    dirty_filter = and_(
+        Score.needs_recalculation == False,
+        Score.is_locked == False,
+        Score.period_type == PeriodType.MONTHLY
+    )
+
+    # Rule/rule pack edits: users with approved events on those rules in that month
+    if pending["rule_ids"] or pending["rule_pack_ids"]:
+        rule_filter = Event.rule_id.in_(pending["rule_ids"])
+        if pending["rule_pack_ids"]:
+            rule_filter = rule_filter | Event.rule_id.in_(
+                select(Rule.id).where(Rule.rule_pack_id.in_(pending["rule_pack_ids"]))
+            )
+
+        affected = select(Event.id).where(
+            and_(
+                Event.user_id == Score.user_id,
+                Event.period_year == Score.period_year,
+                Event.period_month == Score.period_month,
+                Event.status == EventStatus.APPROVED,
+                rule_filter
+            )
+        ).exists()
+        connection.execute(
+            update(Score).where(and_(dirty_filter, affected)).values(needs_recalculation=True)
+        )
+
+    # Department/role moves: the moved users' scores for the current month
+    if pending["user_ids"]:
+        today = datetime.now()
+        connection.execute(
+            update(Score).where(
+                and_(
+                    dirty_filter,
+                    Score.user_id.in_(pending["user_ids"]),
+                    Score.period_year == today.year,
+                    Score.period_month == today.month
+                )
+            ).values(needs_recalculation=True)
+        )
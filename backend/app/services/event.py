@@ -2,28 +2,327 @@
 Event management service - Business logic for performance events
 """
 
-from typing import Optional, Dict, Any, List
+import base64
+import binascii
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, date
-from sqlmodel import Session, select, and_
+from sqlalchemy import case, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, and_, or_
 from fastapi import HTTPException, status
 
 from app.models import (
     Event, EventCreate, EventUpdate, EventRead, EventApproval, EventStatus, EventSource,
-    User, Rule, Department, Project, AuditLog, AuditAction, AuditEntityType
+    User, Department, Project, AuditLog, AuditAction, AuditEntityType, PeriodType
 )
 from app.services.audit import AuditService
+from app.services.event_summary import event_summary_cache
+from app.services.period_registry import period_registry
+from app.services.rule_cache import rule_snapshot_cache
+from app.services.scoring import ScoringEngine
+
+# Payload fields a retried external event may change in place
+EXTERNAL_UPDATE_FIELDS = (
+    "user_id", "department_id", "project_id", "rule_id", "original_score", "occurred_at",
+    "title", "description", "evidence_urls", "evidence_count", "source_metadata",
+    "period_year", "period_month", "period_quarter"
+)
 
 
 class EventService:
     def __init__(self, db: Session):
         self.db = db
         self.audit_service = AuditService(db)
+        self.scoring_engine = ScoringEngine(db)
 
     async def create_event(self, event_data: EventCreate, reporter: User) -> Event:
         """Create a new performance event"""
         
-        # Validate user exists
         target_user = self.db.get(User, event_data.user_id)
+        rule = rule_snapshot_cache.get_rule(self.db, event_data.rule_id)
+        event = self._build_event(event_data, reporter, target_user, rule)
+        
+        # A retried integration payload updates the event it created before
+        existing = self._find_external_events([event]).get(self._external_key(event))
+        if existing is not None:
+            return await self._update_external_event(existing, event, reporter)
+        
+        self.db.add(event)
+        try:
+            self.db.flush()
+        except IntegrityError:
+            # A concurrent retry of the same payload inserted it first
+            self.db.rollback()
+            existing = self._find_external_events([event]).get(self._external_key(event))
+            if existing is None:
+                raise
+            return await self._update_external_event(existing, event, reporter)
+        
+        # Events created by managers are approved immediately
+        await self._apply_score_changes([(None, ScoringEngine.event_contribution(event))])
+        
+        # Log audit trail (commits the event and its score changes together)
+        await self.audit_service.log_action(
+            actor=reporter,
+            action=AuditAction.CREATE,
+            entity_type=AuditEntityType.EVENT,
+            entity_id=event.id,
+            entity_name=f"Event #{event.id}",
+            description=f"建立績效事件: {event.title or rule.name}"
+        )
+        
+        return event
+
+    async def create_events_bulk(self, items: List[EventCreate], reporter: User) -> Dict[str, Any]:
+        """Create many events at once with per-item results
+        
+        Target users and previously ingested events (by source and
+        external_id) are loaded with one IN-query each; rules come from the
+        rule snapshot. A retried item updates its event in place, or is a
+        no-op when nothing changed. Items that fail validation are reported
+        and skipped; the rest are written with their audit entries in a single
+        transaction, and scores are updated once for the whole batch.
+        """
+        
+        user_ids = {item.user_id for item in items}
+        users = {
+            user.id: user for user in self.db.exec(select(User).where(User.id.in_(user_ids))).all()
+        } if user_ids else {}
+        by_key = self._find_external_events(items)
+        snapshot = rule_snapshot_cache.snapshot(self.db)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pending: List[Tuple[int, Event]] = []
+        outcomes: List[Tuple[int, Event, str]] = []
+        contributions_before: Dict[int, Optional[Dict[str, Any]]] = {}
+        for index, item in enumerate(items):
+            try:
+                if reporter.role == "employee" and item.user_id != reporter.id:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="員工只能為自己建立事件"
+                    )
+                event = self._build_event(item, reporter, users.get(item.user_id), snapshot.get_rule(item.rule_id))
+                
+                key = self._external_key(event)
+                target = by_key.get(key) if key else None
+                if target is None:
+                    pending.append((index, event))
+                    outcomes.append((index, event, "created"))
+                    if key:
+                        by_key[key] = event
+                    continue
+                
+                # Existing event, or one created earlier in this batch
+                if target.id is not None:
+                    self._check_external_update(target, event, reporter)
+                    if target.id not in contributions_before:
+                        contributions_before[target.id] = ScoringEngine.event_contribution(target)
+                changed = self._merge_external(target, event)
+                outcomes.append((index, target, "updated" if changed else "unchanged"))
+            except HTTPException as e:
+                results[index] = self._bulk_result(index, error=e.detail)
+        
+        # Updates go out before the insert savepoint so a failed insert cannot roll them back
+        self.db.flush()
+        self._insert_events(pending, results)
+        
+        # Read the events before the commit expires them; an event repeated in
+        # the batch is read once, after all of its items were merged
+        changes = {}
+        audit_entries = []
+        for index, event, action in outcomes:
+            if event.id is None:
+                results[index] = results[index] or self._bulk_result(index, error="事件資料衝突，無法建立")
+                continue
+            results[index] = self._bulk_result(index, event=event, action=action)
+            
+            if event.id in contributions_before:
+                changes[event.id] = (contributions_before[event.id], ScoringEngine.event_contribution(event))
+                if action == "updated":
+                    audit_entries.append(self._audit_entry(AuditAction.UPDATE, event, "外部來源更新事件"))
+            elif action == "created":
+                changes[event.id] = (None, ScoringEngine.event_contribution(event))
+                audit_entries.append(self._audit_entry(
+                    AuditAction.CREATE, event,
+                    f"建立績效事件: {event.title or snapshot.get_rule(event.rule_id).name}"
+                ))
+        
+        # Events created by managers are approved immediately
+        await self._apply_score_changes(list(changes.values()))
+        
+        # Audit entries commit together with the events and their score changes
+        await self.audit_service.log_actions(reporter, audit_entries)
+        
+        counts = {"created": 0, "updated": 0, "unchanged": 0}
+        for result in results:
+            if result["success"]:
+                counts[result["action"]] += 1
+        
+        return {
+            "total": len(items),
+            **counts,
+            "failed": len(items) - sum(counts.values()),
+            "results": results
+        }
+
+    def _insert_events(
+        self,
+        pending: List[Tuple[int, Event]],
+        results: List[Optional[Dict[str, Any]]]
+    ) -> List[Tuple[int, Event]]:
+        """Flush events in one savepoint, isolating rows that violate constraints
+        
+        When the batch fails, each event is retried in its own savepoint and
+        the failures are recorded in `results`. Nothing is committed here.
+        """
+        
+        try:
+            with self.db.begin_nested():
+                self.db.add_all([event for _, event in pending])
+            return pending
+        except IntegrityError:
+            pass
+        
+        inserted = []
+        for index, event in pending:
+            try:
+                with self.db.begin_nested():
+                    self.db.add(event)
+            except IntegrityError:
+                results[index] = self._bulk_result(index, error="事件資料衝突，無法建立")
+            else:
+                inserted.append((index, event))
+        return inserted
+
+    @staticmethod
+    def _bulk_result(
+        index: int,
+        event: Optional[Event] = None,
+        action: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "success": event is not None,
+            "action": action,  # created / updated / unchanged
+            "event_id": event.id if event is not None else None,
+            "status": event.status if event is not None else None,
+            "error": error
+        }
+
+    @staticmethod
+    def _audit_entry(action: AuditAction, event: Event, description: str) -> Dict[str, Any]:
+        return {
+            "action": action,
+            "entity_type": AuditEntityType.EVENT,
+            "entity_id": event.id,
+            "entity_name": f"Event #{event.id}",
+            "description": description
+        }
+
+    @staticmethod
+    def _external_key(event: Any) -> Optional[Tuple[EventSource, str]]:
+        """(source, external_id) of an event or payload, None for manual entries without one"""
+        return (event.source, event.external_id) if event.external_id else None
+
+    def _find_external_events(self, payloads: List[Any]) -> Dict[Tuple[EventSource, str], Event]:
+        """Events already ingested under the payloads' (source, external_id), in one query"""
+        
+        external_ids = {payload.external_id for payload in payloads if payload.external_id}
+        if not external_ids:
+            return {}
+        
+        events = self.db.exec(select(Event).where(Event.external_id.in_(external_ids))).all()
+        return {(event.source, event.external_id): event for event in events}
+
+    def _check_external_update(self, event: Event, payload_event: Event, reporter: User) -> None:
+        """Raise unless a retried payload may update this event
+        
+        Reviewed events only accept a payload that changes nothing.
+        """
+        
+        if reporter.role == "employee" and event.user_id != reporter.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="權限不足"
+            )
+        elif reporter.role == "manager" and event.department_id != reporter.department_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="權限不足"
+            )
+        
+        if event.is_locked or self._period_locked(event.period_year, event.period_month):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="事件已鎖定，無法修改"
+            )
+        
+        if event.status not in (EventStatus.DRAFT, EventStatus.PENDING) and self._external_changes(event, payload_event):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="事件已審核，無法由外部來源修改"
+            )
+
+    @staticmethod
+    def _external_changes(event: Event, payload_event: Event) -> List[str]:
+        """Fields a retried payload would change"""
+        return [
+            field for field in EXTERNAL_UPDATE_FIELDS
+            if getattr(event, field) != getattr(payload_event, field)
+        ]
+
+    @classmethod
+    def _merge_external(cls, event: Event, payload_event: Event) -> bool:
+        """Copy a retried payload's fields onto its event; returns whether anything changed
+        
+        Status, review and manager adjustments are kept.
+        """
+        
+        changed = cls._external_changes(event, payload_event)
+        for field in changed:
+            setattr(event, field, getattr(payload_event, field))
+        
+        if changed:
+            if event.adjusted_score is None:
+                event.final_score = event.original_score
+            event.updated_at = datetime.utcnow()
+        return bool(changed)
+
+    async def _update_external_event(self, event: Event, payload_event: Event, reporter: User) -> Event:
+        """Apply a retried single-event payload to the event it created"""
+        
+        self._check_external_update(event, payload_event, reporter)
+        contribution_before = ScoringEngine.event_contribution(event)
+        if not self._merge_external(event, payload_event):
+            return event
+        
+        self.db.add(event)
+        self.db.flush()
+        
+        await self._apply_score_changes([(contribution_before, ScoringEngine.event_contribution(event))])
+        await self.audit_service.log_action(
+            actor=reporter, **self._audit_entry(AuditAction.UPDATE, event, "外部來源更新事件")
+        )
+        
+        return event
+
+    def _build_event(
+        self,
+        event_data: EventCreate,
+        reporter: User,
+        target_user: Optional[User],
+        rule: Optional[Any]
+    ) -> Event:
+        """Validate an event against its (already loaded) user and rule and build it
+        
+        Raises HTTPException when the event cannot be created. The event is
+        not added to the session.
+        """
+        
+        # Validate user exists
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -31,7 +330,6 @@ class EventService:
             )
         
         # Validate rule exists
-        rule = self.db.get(Rule, event_data.rule_id)
         if not rule:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -89,20 +387,6 @@ class EventService:
                     detail="此規則需要提供證據檔案"
                 )
         
-        self.db.add(event)
-        self.db.commit()
-        self.db.refresh(event)
-        
-        # Log audit trail
-        await self.audit_service.log_action(
-            actor=reporter,
-            action=AuditAction.CREATE,
-            entity_type=AuditEntityType.EVENT,
-            entity_id=event.id,
-            entity_name=f"Event #{event.id}",
-            description=f"建立績效事件: {event.title or rule.name}"
-        )
-        
         return event
 
     async def update_event(self, event: Event, event_data: EventUpdate, user: User) -> Event:
@@ -114,6 +398,7 @@ class EventService:
             "occurred_at": event.occurred_at.isoformat() if event.occurred_at else None,
             "evidence_urls": event.evidence_urls
         }
+        contribution_before = ScoringEngine.event_contribution(event)
         
         # Update fields
         if event_data.title is not None:
@@ -142,8 +427,9 @@ class EventService:
             event.source_metadata = event_data.source_metadata
         
         self.db.add(event)
-        self.db.commit()
-        self.db.refresh(event)
+        self.db.flush()
+        
+        await self._apply_score_changes([(contribution_before, ScoringEngine.event_contribution(event))])
         
         new_values = {
             "title": event.title,
@@ -152,7 +438,7 @@ class EventService:
             "evidence_urls": event.evidence_urls
         }
         
-        # Log audit trail
+        # Log audit trail (commits the event and its score changes together)
         await self.audit_service.log_action(
             actor=user,
             action=AuditAction.UPDATE,
@@ -170,16 +456,18 @@ class EventService:
         """Approve or reject an event"""
         
         old_status = event.status
+        contribution_before = ScoringEngine.event_contribution(event)
         event.status = approval_data.status
         event.reviewed_by = reviewer.id
         event.reviewed_at = datetime.utcnow()
         event.review_notes = approval_data.review_notes
         
         self.db.add(event)
-        self.db.commit()
-        self.db.refresh(event)
+        self.db.flush()
         
-        # Log audit trail
+        await self._apply_score_changes([(contribution_before, ScoringEngine.event_contribution(event))])
+        
+        # Log audit trail (commits the review and its score changes together)
         action_description = "核准事件" if approval_data.status == EventStatus.APPROVED else "拒絕事件"
         await self.audit_service.log_action(
             actor=reviewer,
@@ -194,21 +482,149 @@ class EventService:
         
         return event
 
+    async def approve_events(self, event_ids: List[int], approval_data: EventApproval, reviewer: User) -> Dict[str, Any]:
+        """Approve or reject many pending events at once
+        
+        Applies one set-based UPDATE guarded by status, lock and department
+        scope, rescoring and auditing the updated events in batches. Events
+        that cannot be reviewed are skipped with a reason rather than
+        failing the request.
+        """
+        
+        event_ids = list(dict.fromkeys(event_ids))
+        columns = (
+            Event.id, Event.status, Event.department_id, Event.is_locked, Event.user_id, Event.rule_id,
+            Event.period_year, Event.period_month, Event.original_score, Event.adjusted_score, Event.final_score
+        )
+        rows = {row.id: row for row in self.db.exec(select(*columns).where(Event.id.in_(event_ids))).all()}
+        
+        skipped = []
+        candidates = []
+        for event_id in event_ids:
+            row = rows.get(event_id)
+            if row is None:
+                reason = "事件不存在"
+            elif reviewer.role == "manager" and row.department_id != reviewer.department_id:
+                reason = "權限不足"
+            elif row.status != EventStatus.PENDING:
+                reason = "只能審核待審核狀態的事件"
+            elif row.is_locked or self._period_locked(row.period_year, row.period_month):
+                reason = "事件已鎖定，無法修改"
+            else:
+                candidates.append(row)
+                continue
+            skipped.append({"event_id": event_id, "reason": reason})
+        
+        # The guards are repeated in the UPDATE so events changed since they were read are left alone.
+        # Whole seconds, so the timestamp reads back equal on MySQL DATETIME columns
+        reviewed_at = datetime.utcnow().replace(microsecond=0)
+        guard = and_(
+            Event.id.in_([row.id for row in candidates]),
+            Event.status == EventStatus.PENDING,
+            Event.is_locked == False
+        )
+        if reviewer.role == "manager":
+            guard = and_(guard, Event.department_id == reviewer.department_id)
+        updated_ids = set()
+        if candidates:
+            result = self.db.execute(
+                update(Event).where(guard).values(
+                    status=approval_data.status,
+                    reviewed_by=reviewer.id,
+                    reviewed_at=reviewed_at,
+                    review_notes=approval_data.review_notes,
+                    updated_at=reviewed_at
+                )
+            )
+            if result.rowcount == len(candidates):
+                updated_ids = {row.id for row in candidates}
+            else:
+                updated_ids = set(self.db.exec(
+                    select(Event.id).where(
+                        and_(
+                            Event.id.in_([row.id for row in candidates]),
+                            Event.reviewed_by == reviewer.id,
+                            Event.reviewed_at == reviewed_at
+                        )
+                    )
+                ).all())
+        
+        updated = [row for row in candidates if row.id in updated_ids]
+        skipped.extend(
+            {"event_id": row.id, "reason": "事件狀態已變更，請重新整理"}
+            for row in candidates if row.id not in updated_ids
+        )
+        
+        approved = approval_data.status == EventStatus.APPROVED
+        action_description = "核准事件" if approved else "拒絕事件"
+        entries = []
+        for row in updated:
+            entry = self._audit_entry(
+                AuditAction.APPROVE if approved else AuditAction.REJECT, row,
+                f"{action_description}: {approval_data.review_notes or 'No notes'}"
+            )
+            entry["old_values"] = {"status": row.status}
+            entry["new_values"] = {"status": approval_data.status}
+            entries.append(entry)
+        
+        # Only approvals change scores
+        await self._apply_score_changes([
+            (None, ScoringEngine.event_contribution(SimpleNamespace(**{**row._asdict(), "status": approval_data.status})))
+            for row in updated
+        ])
+        
+        # Audit entries commit together with the UPDATE and the score changes
+        await self.audit_service.log_actions(reviewer, entries)
+        
+        # A Core UPDATE bypasses the summary cache's flush listener
+        for year, month in {(row.period_year, row.period_month) for row in updated}:
+            event_summary_cache.invalidate(year, month)
+        
+        return {
+            "total": len(event_ids),
+            "status": approval_data.status,
+            "updated": len(updated),
+            "updated_ids": [row.id for row in updated],
+            "skipped": skipped
+        }
+
+    async def _apply_score_changes(self, changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """Update scores for flushed event changes in the same transaction
+        
+        Nothing is committed here; the caller's audit entry commits the event
+        write and its score changes together. On failure both are rolled back.
+        """
+        
+        try:
+            await self.scoring_engine.apply_event_changes(changes)
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _period_locked(self, year: int, month: int) -> bool:
+        period = period_registry.find(self.db, PeriodType.MONTHLY, year, month=month)
+        return period is not None and period.is_locked
+
     async def delete_event(self, event: Event, user: User) -> None:
         """Delete an event"""
         
-        # Log audit trail before deletion
+        event_id = event.id
+        contribution_before = ScoringEngine.event_contribution(event)
+        
+        self.db.delete(event)
+        self.db.flush()
+        
+        await self._apply_score_changes([(contribution_before, None)])
+        
+        # Log audit trail (commits the deletion and its score changes together)
         await self.audit_service.log_action(
             actor=user,
             action=AuditAction.DELETE,
             entity_type=AuditEntityType.EVENT,
-            entity_id=event.id,
-            entity_name=f"Event #{event.id}",
+            entity_id=event_id,
+            entity_name=f"Event #{event_id}",
             description="刪除績效事件"
         )
-        
-        self.db.delete(event)
-        self.db.commit()
 
     def get_event_with_permission_check(self, event_id: int, user: User) -> Event:
         """Get event with permission check"""
@@ -244,10 +660,64 @@ class EventService:
         reviewer = self.db.get(User, event.reviewed_by) if event.reviewed_by else None
         department = self.db.get(Department, event.department_id) if event.department_id else None
         project = self.db.get(Project, event.project_id) if event.project_id else None
-        rule = self.db.get(Rule, event.rule_id)
+        rule = rule_snapshot_cache.get_rule(self.db, event.rule_id)
+        
+        return self._build_read_model(event, user, reporter, reviewer, department, project, rule)
+
+    def to_read_models(self, events: List[Event]) -> List[EventRead]:
+        """Convert a page of events to EventRead, loading related data in batches
+        
+        Produces the same models as `to_read_model`, with one query per
+        related table instead of one per event and relation.
+        """
+        
+        if not events:
+            return []
+        
+        user_ids = set()
+        department_ids = set()
+        project_ids = set()
+        for event in events:
+            user_ids.update((event.user_id, event.reporter_id))
+            if event.reviewed_by:
+                user_ids.add(event.reviewed_by)
+            if event.department_id:
+                department_ids.add(event.department_id)
+            if event.project_id:
+                project_ids.add(event.project_id)
+        
+        users = self._rows_by_id(select(User.id, User.name, User.employee_id).where(User.id.in_(user_ids)))
+        departments = self._rows_by_id(
+            select(Department.id, Department.name).where(Department.id.in_(department_ids))
+        ) if department_ids else {}
+        projects = self._rows_by_id(
+            select(Project.id, Project.name).where(Project.id.in_(project_ids))
+        ) if project_ids else {}
+        rules = rule_snapshot_cache.snapshot(self.db)
+        
+        return [
+            self._build_read_model(
+                event,
+                users.get(event.user_id),
+                users.get(event.reporter_id),
+                users.get(event.reviewed_by) if event.reviewed_by else None,
+                departments.get(event.department_id) if event.department_id else None,
+                projects.get(event.project_id) if event.project_id else None,
+                rules.get_rule(event.rule_id)
+            )
+            for event in events
+        ]
+
+    def _rows_by_id(self, statement) -> Dict[int, Any]:
+        return {row.id: row for row in self.db.exec(statement).all()}
+
+    @staticmethod
+    def _build_read_model(event: Event, user, reporter, reviewer, department, project, rule) -> EventRead:
+        """EventRead from an event and its resolved related records"""
         
-        # Create EventRead model
-        event_read = EventRead.from_orm(event)
+        # Create EventRead model from the columns; the Event properties of the
+        # same names would lazy-load the rule
+        event_read = EventRead.model_validate(event.model_dump())
         
         # Add related data
         event_read.user_name = user.name if user else None
@@ -274,39 +744,86 @@ class EventService:
         
         return event_read
 
-    async def get_events_summary(self, user: User, year: int, month: int) -> Dict[str, Any]:
-        """Get events summary for a specific period"""
-        
-        # Build base query
-        statement = select(Event).where(
-            and_(
-                Event.period_year == year,
-                Event.period_month == month
+    @staticmethod
+    def encode_cursor(event: Event) -> str:
+        """Opaque cursor positioned after `event` in (created_at, id) order"""
+        raw = f"{event.created_at.isoformat()}|{event.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """(created_at, id) of a cursor from `encode_cursor`"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, event_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(event_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="無效的分頁游標"
             )
+
+    @staticmethod
+    def after_cursor(cursor: str):
+        """Condition selecting events after the cursor, newest first
+        
+        The leading `created_at <=` bound lets the (created_at, id) index seek
+        straight to the cursor on databases without row-value comparisons.
+        """
+        created_at, event_id = EventService.decode_cursor(cursor)
+        return and_(
+            Event.created_at <= created_at,
+            or_(Event.created_at < created_at, Event.id < event_id)
         )
+
+    async def get_events_summary(self, user: User, year: int, month: int) -> Dict[str, Any]:
+        """Get events summary for a specific period
         
-        # Apply role-based filters
+        Aggregated in one GROUP BY (status, score sign) query and cached per
+        role scope and period for EVENT_SUMMARY_CACHE_TTL seconds.
+        """
+        
+        # Build base query, with the role-based filters
+        conditions = [Event.period_year == year, Event.period_month == month]
         if user.role == "employee":
-            statement = statement.where(Event.user_id == user.id)
+            scope = ("user", user.id)
+            conditions.append(Event.user_id == user.id)
         elif user.role == "manager" and user.department_id:
-            statement = statement.where(Event.department_id == user.department_id)
-        
-        events = self.db.exec(statement).all()
-        
-        # Calculate summary statistics
-        total_events = len(events)
-        approved_events = sum(1 for e in events if e.status == EventStatus.APPROVED)
-        pending_events = sum(1 for e in events if e.status == EventStatus.PENDING)
-        rejected_events = sum(1 for e in events if e.status == EventStatus.REJECTED)
+            scope = ("department", user.department_id)
+            conditions.append(Event.department_id == user.department_id)
+        else:
+            scope = ("all",)
         
-        total_score = sum(e.final_score for e in events if e.status == EventStatus.APPROVED)
-        positive_score = sum(e.final_score for e in events if e.status == EventStatus.APPROVED and e.final_score > 0)
-        negative_score = sum(e.final_score for e in events if e.status == EventStatus.APPROVED and e.final_score < 0)
+        summary = event_summary_cache.get(scope, year, month)
+        if summary is not None:
+            return summary
         
-        positive_events = sum(1 for e in events if e.status == EventStatus.APPROVED and e.final_score > 0)
-        negative_events = sum(1 for e in events if e.status == EventStatus.APPROVED and e.final_score < 0)
+        sign = case((Event.final_score > 0, 1), (Event.final_score < 0, -1), else_=0)
+        statement = select(
+            Event.status, sign, func.count(Event.id), func.sum(Event.final_score)
+        ).where(and_(*conditions)).group_by(Event.status, sign)
         
-        return {
+        # Calculate summary statistics
+        total_events = approved_events = pending_events = rejected_events = 0
+        positive_events = negative_events = 0
+        total_score = positive_score = negative_score = 0
+        for event_status, score_sign, count, score in self.db.exec(statement).all():
+            total_events += count
+            if event_status == EventStatus.PENDING:
+                pending_events += count
+            elif event_status == EventStatus.REJECTED:
+                rejected_events += count
+            elif event_status == EventStatus.APPROVED:
+                approved_events += count
+                total_score += score
+                if score_sign > 0:
+                    positive_events += count
+                    positive_score += score
+                elif score_sign < 0:
+                    negative_events += count
+                    negative_score += score
+        
+        summary = {
             "period": f"{year}-{month:02d}",
             "total_events": total_events,
             "approved_events": approved_events,
@@ -318,4 +835,6 @@ class EventService:
             "positive_events": positive_events,
             "negative_events": negative_events,
             "average_score": round(total_score / approved_events, 2) if approved_events > 0 else 0
-        }
\ No newline at end of file
+        }
+        event_summary_cache.put(scope, year, month, summary)
+        return summary
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Event search - N-gram full-text search over event title and description
+
+MySQL keeps a FULLTEXT index built WITH PARSER ngram, maintained by InnoDB.
+SQLite (tests, local runs) has no n-gram tokenizer, so text is n-grammed here
+and stored in the `events_fts` FTS5 table, kept in sync by a flush listener.
+CJK runs are indexed as overlapping bigrams plus their last character, so any
+substring of one or more characters is found; other words are indexed whole
+and matched by prefix ("rep" finds "report", "port" does not), where plain
+LIKE matched any substring. Other databases fall back to LIKE.
+
+Databases created without the events table DDL (older `create_all` schemas)
+get the FTS table from `ensure_index` at startup; until then the listener
+skips it and searches fall back to LIKE. Writes that bypass the ORM (Core
+inserts, raw SQL) must call `rebuild`.
+"""
+
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import DDL, Float, Integer, bindparam, event, inspect, or_, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.models import Event
+
+
+FTS_TABLE = "events_fts"
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"  # Kana, CJK ideographs, Hangul
+_TOKEN = re.compile(rf"([{_CJK}]+)|((?:(?![{_CJK}])\w)+)")
+
+# MySQL ngram_token_size; shorter terms are not in the MySQL index
+MYSQL_NGRAM_SIZE = 2
+
+FTS_DDL = f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(content, tokenize='unicode61')"
+
+event.listen(
+    Event.__table__, "after_create",
+    DDL(FTS_DDL).execute_if(dialect="sqlite")
+)
+event.listen(
+    Event.__table__, "after_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite")
+)
+event.listen(
+    Event.__table__, "after_create",
+    DDL("CREATE FULLTEXT INDEX ft_events_title_description ON events (title, description) WITH PARSER ngram")
+    .execute_if(dialect="mysql")
+)
+
+
+def _terms(text_value: Optional[str]) -> List[Tuple[str, bool]]:
+    """(term, is_cjk) pairs in order"""
+    return [
+        (cjk, True) if cjk else (word.lower(), False)
+        for cjk, word in _TOKEN.findall(text_value or "")
+    ]
+
+
+def _cjk_grams(run: str) -> List[str]:
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]
+
+
+def index_text(title: Optional[str], description: Optional[str]) -> str:
+    """Space-separated tokens stored in the SQLite FTS table for one event"""
+    tokens = []
+    for term, is_cjk in _terms(title) + _terms(description):
+        tokens.extend(_cjk_grams(term) if is_cjk else [term])
+    return " ".join(tokens)
+
+
+def has_index(connection) -> bool:
+    """Whether the SQLite FTS table exists on this connection's database"""
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first() is not None
+
+
+def sqlite_query(search: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every term; None when nothing is searchable"""
+    parts = []
+    for term, is_cjk in _terms(search):
+        if is_cjk and len(term) > 1:
+            # Consecutive bigrams: the run appears as a substring
+            parts.append('"' + " ".join(term[i:i + 2] for i in range(len(term) - 1)) + '"')
+        else:
+            parts.append(f'"{term}"*')
+    return " ".join(parts) or None
+
+
+def mysql_query(search: str) -> Optional[str]:
+    """Boolean-mode AGAINST expression; None when a term is shorter than the n-gram size
+
+    The ngram parser turns each quoted term into a phrase of its n-grams.
+    """
+    terms = [term for term, _ in _terms(search)]
+    if not terms or any(len(term) < MYSQL_NGRAM_SIZE for term in terms):
+        return None
+    return " ".join(f'+"{term}"' for term in terms)
+
+
+class EventSearch:
+    """Apply full-text search to event queries"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def filter(self, statement: Any, search: str, ranked: bool = True) -> Any:
+        """Restrict an events select to matches, best matches first when ranked
+
+        Ranking is added ahead of any ordering the caller applies afterwards.
+        """
+        if self.dialect == "sqlite":
+            query = sqlite_query(search)
+            if query is not None and has_index(self.db.connection()):
+                matches = text(
+                    f"SELECT rowid AS event_id, bm25({FTS_TABLE}) AS rank "
+                    f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query"
+                ).bindparams(query=query).columns(event_id=Integer, rank=Float).subquery("event_matches")
+                statement = statement.join(matches, matches.c.event_id == Event.id)
+                # bm25 is lower for better matches
+                return statement.order_by(matches.c.rank) if ranked else statement
+
+        elif self.dialect == "mysql":
+            query = mysql_query(search)
+            if query is not None:
+                relevance = mysql.match(Event.title, Event.description, against=query).in_boolean_mode()
+                statement = statement.where(relevance)
+                return statement.order_by(relevance.desc()) if ranked else statement
+
+        return statement.where(
+            or_(
+                Event.title.contains(search),
+                Event.description.contains(search)
+            )
+        )
+
+    def ensure_index(self) -> int:
+        """Create the SQLite FTS table if missing and index every event; the caller commits
+
+        Returns the number of events indexed, 0 when the table already existed
+        or the database keeps the index itself.
+        """
+        if self.dialect != "sqlite" or has_index(self.db.connection()):
+            return 0
+
+        self.db.connection().execute(text(FTS_DDL))
+        return self.rebuild()
+
+    def rebuild(self, chunk_size: int = 5000) -> int:
+        """Re-index every event in the SQLite FTS table; the caller commits
+
+        Returns the number of events indexed (0 where the database keeps
+        the index itself).
+        """
+        if self.dialect != "sqlite":
+            return 0
+
+        connection = self.db.connection()
+        connection.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        indexed = 0
+        rows = connection.execute(
+            select(Event.id, Event.title, Event.description).order_by(Event.id).execution_options(yield_per=chunk_size)
+        )
+        for chunk in rows.partitions(chunk_size):
+            _insert(connection, [(event_id, title, description) for event_id, title, description in chunk])
+            indexed += len(chunk)
+        return indexed
+
+
+def _insert(connection, rows: List[Tuple[int, Optional[str], Optional[str]]]) -> None:
+    if rows:
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (:event_id, :content)"),
+            [
+                {"event_id": event_id, "content": index_text(title, description)}
+                for event_id, title, description in rows
+            ]
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def sync_search_index(session: Session, flush_context) -> None:
+    """Mirror flushed event inserts, text edits and deletes into the SQLite FTS table"""
+
+    new = [obj for obj in session.new if isinstance(obj, Event)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Event)]
+    edited = [
+        obj for obj in session.dirty
+        if isinstance(obj, Event) and obj not in session.deleted and (
+            inspect(obj).attrs.title.history.has_changes() or
+            inspect(obj).attrs.description.history.has_changes()
+        )
+    ]
+    if not (new or deleted or edited):
+        return
+
+    connection = session.connection()
+    if connection.dialect.name != "sqlite" or not has_index(connection):
+        return
+
+    stale = [obj.id for obj in deleted + edited]
+    if stale:
+        connection.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN :event_ids").bindparams(
+                bindparam("event_ids", expanding=True)
+            ),
+            {"event_ids": stale}
+        )
+    _insert(connection, [(obj.id, obj.title, obj.description) for obj in new + edited])
@@ -0,0 +1,79 @@
+"""
+Event summary cache - Short-lived cache of monthly event summaries
+
+`EventService.get_events_summary` results are kept per (role scope, period)
+for EVENT_SUMMARY_CACHE_TTL seconds. Committed event writes in this process
+drop the periods they touched; other workers see them once the TTL expires.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Event
+
+
+_PENDING_KEY = "event_summary_periods"
+
+
+class EventSummaryCache:
+    """In-process TTL cache of summaries keyed by (scope, year, month)"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.EVENT_SUMMARY_CACHE_TTL if ttl is None else ttl
+        self._entries: Dict[Tuple[Hashable, int, int], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: Hashable, year: int, month: int) -> Optional[Dict[str, Any]]:
+        """A copy of the cached summary, or None when missing or expired"""
+        entry = self._entries.get((scope, year, month))
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return dict(entry[1])
+        return None
+
+    def put(self, scope: Hashable, year: int, month: int, summary: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[(scope, year, month)] = (time.monotonic(), dict(summary))
+
+    def invalidate(self, year: Optional[int] = None, month: Optional[int] = None) -> None:
+        """Drop every scope of one period, or everything when no period is given"""
+        with self._lock:
+            if year is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1:] == (year, month)]:
+                    del self._entries[key]
+
+
+event_summary_cache = EventSummaryCache()
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_event_periods(session: Session, flush_context, instances) -> None:
+    periods: Set[Optional[Tuple[int, int]]] = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Event):
+            continue
+        periods.add((obj.period_year, obj.period_month))
+        attrs = inspect(obj).attrs
+        if attrs.period_year.history.deleted or attrs.period_month.history.deleted:
+            # Moved from another period
+            periods.add(None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for period in session.info.pop(_PENDING_KEY, ()):
+        if period is None:
+            event_summary_cache.invalidate()
+        else:
+            event_summary_cache.invalidate(*period)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
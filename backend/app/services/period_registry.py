@@ -0,0 +1,133 @@
+"""
+Period registry - Process-wide resolution of periods to Period rows
+
+Periods are identified by (type, name): "2024-01", "2024-Q1" and "2024", as
+produced by the Period.generate_* helpers and enforced by the
+uq_period_type_name constraint. The registry resolves a period to its id once
+per process; later lookups are a primary-key get (free when the row is
+already in the session). Missing periods are created in the caller's
+transaction with an insert that ignores a concurrent insert of the same
+period, so parallel runs cannot create duplicates or fail on the race.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, and_
+
+from app.models import Period, PeriodType
+
+PeriodKey = Tuple[PeriodType, str]
+
+
+def period_name(period_type: PeriodType, year: int, month: Optional[int] = None, quarter: Optional[int] = None) -> str:
+    """Canonical period name, matching Period.generate_*"""
+    if period_type == PeriodType.MONTHLY:
+        return f"{year}-{month:02d}"
+    if period_type == PeriodType.QUARTERLY:
+        return f"{year}-Q{quarter}"
+    return str(year)
+
+
+class PeriodRegistry:
+    """Memoized (type, name) -> Period id resolution with create-if-missing"""
+
+    def __init__(self):
+        self._ids: Dict[PeriodKey, int] = {}
+        self._lock = threading.Lock()
+
+    def resolve(
+        self,
+        db: Session,
+        period_type: PeriodType,
+        year: int,
+        month: Optional[int] = None,
+        quarter: Optional[int] = None
+    ) -> Period:
+        """Get the period, creating it if it does not exist yet"""
+        period = self.find(db, period_type, year, month, quarter)
+        if period is not None:
+            return period
+
+        self._insert_if_missing(db, self._generate(period_type, year, month, quarter))
+        period = self.find(db, period_type, year, month, quarter)
+        if period is None:
+            raise RuntimeError(f"無法建立期間: {period_name(period_type, year, month, quarter)}")
+        return period
+
+    def monthly(self, db: Session, year: int, month: int) -> Period:
+        """Get or create a monthly period"""
+        return self.resolve(db, PeriodType.MONTHLY, year, month=month)
+
+    def find(
+        self,
+        db: Session,
+        period_type: PeriodType,
+        year: int,
+        month: Optional[int] = None,
+        quarter: Optional[int] = None
+    ) -> Optional[Period]:
+        """Get the period without creating it"""
+        key = (period_type, period_name(period_type, year, month, quarter))
+
+        period_id = self._ids.get(key)
+        if period_id is not None:
+            period = db.get(Period, period_id)
+            # Guard against a deleted row or a recreated database reusing ids
+            if period is not None and (period.type, period.name) == key:
+                return period
+            with self._lock:
+                self._ids.pop(key, None)
+
+        period = db.exec(
+            select(Period).where(and_(Period.type == key[0], Period.name == key[1]))
+        ).first()
+        if period is not None:
+            with self._lock:
+                self._ids[key] = period.id
+        return period
+
+    def clear(self) -> None:
+        """Forget every resolved id"""
+        with self._lock:
+            self._ids.clear()
+
+    @staticmethod
+    def _generate(period_type: PeriodType, year: int, month: Optional[int], quarter: Optional[int]) -> Period:
+        if period_type == PeriodType.MONTHLY:
+            return Period.generate_monthly_period(year, month)
+        if period_type == PeriodType.QUARTERLY:
+            return Period.generate_quarterly_period(year, quarter)
+        return Period.generate_yearly_period(year)
+
+    @staticmethod
+    def _insert_if_missing(db: Session, period: Period) -> None:
+        """Insert a period in the caller's transaction; a concurrent insert of the same period wins silently
+
+        Nothing is committed: the period is written with the caller's commit
+        and discarded with its rollback.
+        """
+        table = Period.__table__
+        values = {column.name: getattr(period, column.name) for column in table.columns if column.name != "id"}
+        dialect = db.get_bind().dialect.name
+
+        if dialect == "mysql":
+            statement = mysql.insert(table).values(values)
+            statement = statement.on_duplicate_key_update(name=statement.inserted.name)
+        elif dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            statement = insert(table).values(values).on_conflict_do_nothing(index_elements=["type", "name"])
+        else:
+            try:
+                with db.begin_nested():
+                    db.add(period)
+                    db.flush()
+            except IntegrityError:
+                pass
+            return
+
+        db.execute(statement)
+
+period_registry = PeriodRegistry()
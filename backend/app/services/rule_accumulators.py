@@ -0,0 +1,111 @@
+"""
+Rule accumulators - Persisted per (user, month, rule) running totals
+
+`score_rule_totals` holds each rule's event count, raw total and capped total
+for a user's month. Full scoring (batch or per user) replaces a user's rows
+whenever `ScoreWriter` writes the monthly score; a single event change then
+re-evaluates the cap from the stored raw total in O(1) instead of re-reading
+the rule's events. Rows are only maintained while the monthly Score row is
+current: a score flagged for recalculation gets fresh rows when rescored.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select, and_
+
+from app.models import ScoreRuleTotal
+from app.services.scoring_plan import ScoringPlan
+
+
+class RuleAccumulators:
+    """Read and maintain per-rule accumulators; callers commit"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def replace(self, year: int, month: int, breakdowns: Mapping[int, Optional[Dict[Any, Dict[str, Any]]]]) -> None:
+        """Replace the users' accumulators with freshly computed rule breakdowns
+
+        `breakdowns` maps user id to the score's rule_breakdown.
+        """
+        if not breakdowns:
+            return
+
+        self.db.execute(
+            delete(ScoreRuleTotal).where(
+                and_(
+                    ScoreRuleTotal.period_year == year,
+                    ScoreRuleTotal.period_month == month,
+                    ScoreRuleTotal.user_id.in_(list(breakdowns))
+                )
+            )
+        )
+
+        now = datetime.utcnow()
+        values = [
+            {
+                "user_id": user_id,
+                "period_year": year,
+                "period_month": month,
+                "rule_id": int(rule_id),
+                "events": entry["events"],
+                "raw_total": entry["original_total"],
+                "capped_total": entry["total_score"],
+                "cap_applied": entry["cap_applied"],
+                "updated_at": now
+            }
+            for user_id, breakdown in breakdowns.items()
+            for rule_id, entry in (breakdown or {}).items()
+        ]
+        if values:
+            self.db.execute(insert(ScoreRuleTotal.__table__), values)
+
+    def get(self, user_id: int, year: int, month: int, rule_id: int) -> Optional[ScoreRuleTotal]:
+        """The accumulator row, locked for update where the database supports it"""
+        return self.db.exec(
+            select(ScoreRuleTotal).where(
+                and_(
+                    ScoreRuleTotal.user_id == user_id,
+                    ScoreRuleTotal.period_year == year,
+                    ScoreRuleTotal.period_month == month,
+                    ScoreRuleTotal.rule_id == rule_id
+                )
+            ).with_for_update()
+        ).first()
+
+    def apply(
+        self,
+        user_id: int,
+        year: int,
+        month: int,
+        rule_id: int,
+        plan: ScoringPlan,
+        removed: Sequence[float],
+        added: Sequence[float],
+        seed: Optional[Dict[str, Any]] = None
+    ) -> ScoreRuleTotal:
+        """Remove and add clamped event scores, then re-evaluate the cap
+
+        `seed` is the score's rule_breakdown entry, used when no accumulator
+        row exists yet (scores written before accumulators were kept). The
+        row is deleted once the rule has no events left.
+        """
+        accumulator = self.get(user_id, year, month, rule_id)
+        if accumulator is None:
+            accumulator = ScoreRuleTotal(user_id=user_id, period_year=year, period_month=month, rule_id=rule_id)
+            if seed:
+                accumulator.events = seed["events"]
+                accumulator.raw_total = seed.get("original_total", seed["total_score"])
+
+        accumulator.events += len(added) - len(removed)
+        accumulator.raw_total = accumulator.raw_total - sum(removed) + sum(added)
+        accumulator.capped_total, accumulator.cap_applied = plan.rule_total(rule_id, accumulator.raw_total)
+        accumulator.updated_at = datetime.utcnow()
+
+        if accumulator.events > 0:
+            self.db.add(accumulator)
+        elif accumulator.id is not None:
+            self.db.delete(accumulator)
+        return accumulator
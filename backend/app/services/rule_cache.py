@@ -0,0 +1,311 @@
+"""
+Rule snapshot cache - Immutable, versioned in-process view of rules and rule packs
+
+Scoring, event creation and event read models all need the same small set of
+rules. Instead of joining Rule and RulePack per user (or calling db.get per
+event), rules are loaded once into an immutable `RuleSnapshot`. Snapshots are
+keyed by a version stamp; a `RuleScopeIndex` of applicable rules per
+(department, role) and a `ScoringPlan` are compiled and memoized per period
+start.
+
+Invalidation: any ORM write to `rules` or `rule_packs` bumps the local
+generation when its transaction ends and increments a shared Redis counter so
+every worker reloads within RULE_CACHE_VERSION_CHECK_SECONDS. Without Redis the
+cache still invalidates in-process.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, fields
+from datetime import date
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models import Rule, RulePack, RulePackScope, RulePackStatus
+from app.services.scoring_plan import ScoringPlan, compile_scoring_plan
+
+logger = logging.getLogger(__name__)
+
+_VERSION_KEY = "hr:rule_snapshot_version"
+_SESSION_FLAG = "rule_snapshot_dirty"
+
+
+@dataclass(frozen=True)
+class RuleInfo:
+    """Read-only copy of a Rule row"""
+    id: int
+    rule_pack_id: int
+    code: str
+    name: str
+    direction: str
+    base_score: float
+    weight: float
+    caps: Optional[float]
+    min_score: Optional[float]
+    max_score: Optional[float]
+    evidence_required: bool
+    manager_approval_required: bool
+    category: Optional[str]
+    active: bool
+    sort_order: int
+
+
+@dataclass(frozen=True)
+class RulePackInfo:
+    """Read-only copy of a RulePack row"""
+    id: int
+    name: str
+    version: str
+    scope: str
+    target_department_id: Optional[int]
+    target_role: Optional[str]
+    status: str
+    effective_from: date
+    effective_to: Optional[date]
+    weight_config: Optional[Mapping[str, Any]]
+
+
+def _copy_row(info_class, row):
+    """Copy the dataclass fields from an ORM row"""
+    values = {field.name: getattr(row, field.name) for field in fields(info_class)}
+    if "weight_config" in values and values["weight_config"] is not None:
+        values["weight_config"] = MappingProxyType(dict(values["weight_config"]))
+    return info_class(**values)
+
+
+def _role_key(role: Any) -> Optional[str]:
+    """Normalize a role (enum or string) for index lookups"""
+    if isinstance(role, Enum):
+        return role.value
+    return role
+
+
+class RuleScopeIndex:
+    """Applicable rules per (department_id, role) for one period
+    
+    Compiled once per period from the rule packs in effect at period start:
+    company packs apply to everyone, department packs to their target
+    department and role packs to their target role. Lookups are O(1) and the
+    merged result for each (department_id, role) is memoized.
+    """
+
+    def __init__(self, rules: Mapping[int, RuleInfo], packs: Mapping[int, RulePackInfo], period_start: date):
+        company_ids = set()
+        department_ids: Dict[int, set] = {}
+        role_ids: Dict[str, set] = {}
+
+        for rule in rules.values():
+            pack = packs.get(rule.rule_pack_id)
+            if not rule.active or not self.pack_in_effect(pack, period_start):
+                continue
+
+            if pack.scope == RulePackScope.COMPANY:
+                company_ids.add(rule.id)
+            elif pack.scope == RulePackScope.DEPARTMENT and pack.target_department_id is not None:
+                department_ids.setdefault(pack.target_department_id, set()).add(rule.id)
+            elif pack.scope == RulePackScope.ROLE and pack.target_role:
+                role_ids.setdefault(_role_key(pack.target_role), set()).add(rule.id)
+
+        self.period_start = period_start
+        self.company_rule_ids: FrozenSet[int] = frozenset(company_ids)
+        self.department_rule_ids: Mapping[int, FrozenSet[int]] = MappingProxyType(
+            {key: frozenset(value) for key, value in department_ids.items()}
+        )
+        self.role_rule_ids: Mapping[str, FrozenSet[int]] = MappingProxyType(
+            {key: frozenset(value) for key, value in role_ids.items()}
+        )
+        all_ids = company_ids.union(*department_ids.values(), *role_ids.values())
+        self.all_rules: Mapping[int, RuleInfo] = MappingProxyType(
+            {rule_id: rules[rule_id] for rule_id in sorted(all_ids)}
+        )
+        self._by_target: Dict[Tuple[Optional[int], Optional[str]], Mapping[int, RuleInfo]] = {}
+
+    @staticmethod
+    def pack_in_effect(pack: Optional[RulePackInfo], period_start: date) -> bool:
+        """Active pack whose [effective_from, effective_to] covers period start"""
+        return (
+            pack is not None and
+            pack.status == RulePackStatus.ACTIVE and
+            pack.effective_from <= period_start and
+            (pack.effective_to is None or pack.effective_to >= period_start)
+        )
+
+    def rule_ids_for(self, department_id: Optional[int], role: Any) -> FrozenSet[int]:
+        """Ids of rules applicable to a department/role"""
+        return frozenset(self.rules_for(department_id, role))
+
+    def rules_for(self, department_id: Optional[int], role: Any) -> Mapping[int, RuleInfo]:
+        """Rules applicable to a user in the given department with the given role"""
+        key = (department_id, _role_key(role))
+        rules = self._by_target.get(key)
+        if rules is None:
+            rule_ids = (
+                self.company_rule_ids |
+                self.department_rule_ids.get(department_id, frozenset()) |
+                self.role_rule_ids.get(key[1], frozenset())
+            )
+            rules = MappingProxyType({rule_id: self.all_rules[rule_id] for rule_id in sorted(rule_ids)})
+            self._by_target[key] = rules
+        return rules
+
+
+class RuleSnapshot:
+    """Immutable set of rules and rule packs at one version"""
+
+    def __init__(self, version: Tuple[int, int], rules: Dict[int, RuleInfo], packs: Dict[int, RulePackInfo]):
+        self.version = version
+        self.rules: Mapping[int, RuleInfo] = MappingProxyType(rules)
+        self.packs: Mapping[int, RulePackInfo] = MappingProxyType(packs)
+        self._scope_by_period: Dict[date, RuleScopeIndex] = {}
+        self._plan_by_period: Dict[date, ScoringPlan] = {}
+        self._lock = threading.Lock()
+
+    def get_rule(self, rule_id: int) -> Optional[RuleInfo]:
+        """Get any rule by id, active or not"""
+        return self.rules.get(rule_id)
+
+    def scope_index(self, period_start: date) -> RuleScopeIndex:
+        """Compiled scope index for the period starting at period_start"""
+        index = self._scope_by_period.get(period_start)
+        if index is not None:
+            return index
+
+        with self._lock:
+            index = self._scope_by_period.get(period_start)
+            if index is None:
+                index = RuleScopeIndex(self.rules, self.packs, period_start)
+                self._scope_by_period[period_start] = index
+        return index
+
+    def active_rules(self, period_start: date) -> Mapping[int, RuleInfo]:
+        """Every active rule in effect at period start, regardless of scope"""
+        return self.scope_index(period_start).all_rules
+
+    def scoring_plan(self, period_start: date) -> ScoringPlan:
+        """Compiled scoring plan for the period starting at period_start"""
+        plan = self._plan_by_period.get(period_start)
+        if plan is None:
+            plan = compile_scoring_plan(self.active_rules(period_start), self.packs)
+            with self._lock:
+                plan = self._plan_by_period.setdefault(period_start, plan)
+        return plan
+
+
+class RuleSnapshotCache:
+    """Process-wide holder of the current RuleSnapshot"""
+
+    def __init__(self, redis_url: Optional[str] = None, check_interval: Optional[float] = None):
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.check_interval = (
+            settings.RULE_CACHE_VERSION_CHECK_SECONDS if check_interval is None else check_interval
+        )
+        self._local_generation = 0
+        self._remote_version = 0
+        self._remote_checked_at = 0.0
+        self._redis: Optional[redis.Redis] = None
+        self._redis_retry_at = 0.0
+        self._snapshot: Optional[RuleSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self, db: Session) -> RuleSnapshot:
+        """Get the snapshot for the current version, loading it if stale"""
+        version = self.version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._load(db, version)
+                self._snapshot = snapshot
+        return snapshot
+
+    def active_rules(self, db: Session, year: int, month: int) -> Mapping[int, RuleInfo]:
+        """Active rules for a monthly period, regardless of scope"""
+        return self.snapshot(db).active_rules(date(year, month, 1))
+
+    def scope_index(self, db: Session, year: int, month: int) -> RuleScopeIndex:
+        """Compiled scope index for a monthly period"""
+        return self.snapshot(db).scope_index(date(year, month, 1))
+
+    def scoring_plan(self, db: Session, year: int, month: int) -> ScoringPlan:
+        """Compiled scoring plan for a monthly period"""
+        return self.snapshot(db).scoring_plan(date(year, month, 1))
+
+    def get_rule(self, db: Session, rule_id: int) -> Optional[RuleInfo]:
+        """Get a rule by id"""
+        return self.snapshot(db).get_rule(rule_id)
+
+    def version(self) -> Tuple[int, int]:
+        """Current version stamp: (local generation, shared Redis counter)"""
+        now = time.monotonic()
+        if now - self._remote_checked_at >= self.check_interval:
+            self._remote_checked_at = now
+            client = self._client()
+            if client is not None:
+                try:
+                    self._remote_version = int(client.get(_VERSION_KEY) or 0)
+                except redis.RedisError as e:
+                    self._redis_unavailable(e)
+        return (self._local_generation, self._remote_version)
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot here and tell other workers to do the same"""
+        self._local_generation += 1
+        client = self._client()
+        if client is not None:
+            try:
+                self._remote_version = int(client.incr(_VERSION_KEY))
+            except redis.RedisError as e:
+                self._redis_unavailable(e)
+
+    def _load(self, db: Session, version: Tuple[int, int]) -> RuleSnapshot:
+        rules = {rule.id: _copy_row(RuleInfo, rule) for rule in db.exec(select(Rule)).all()}
+        packs = {pack.id: _copy_row(RulePackInfo, pack) for pack in db.exec(select(RulePack)).all()}
+        return RuleSnapshot(version, rules, packs)
+
+    def _client(self) -> Optional[redis.Redis]:
+        if self._redis is None and time.monotonic() >= self._redis_retry_at:
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_connect_timeout=0.2, socket_timeout=0.2
+            )
+        return self._redis
+
+    def _redis_unavailable(self, error: Exception) -> None:
+        # Fall back to in-process invalidation and retry Redis later
+        logger.warning(f"Rule snapshot version check unavailable, using local invalidation: {error}")
+        self._redis = None
+        self._redis_retry_at = time.monotonic() + 30
+
+
+rule_snapshot_cache = RuleSnapshotCache()
+
+
+@event.listens_for(Session, "before_flush")
+def _track_rule_writes(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Rule, RulePack)):
+            session.info[_SESSION_FLAG] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(_SESSION_FLAG, False):
+        rule_snapshot_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _invalidate_after_rollback(session: Session) -> None:
+    # A snapshot may have been loaded from the rolled-back state
+    if session.info.pop(_SESSION_FLAG, False):
+        rule_snapshot_cache.invalidate()
@@ -0,0 +1,97 @@
+"""
+Scoring scheduler - Nightly dirty-set recalculation
+
+On by default (SCORING_SCHEDULER_ENABLED). Every worker wakes at the
+scheduled hour, but a per-day Redis key lets only one of them run the job;
+without Redis each worker runs it, so set SCORING_SCHEDULER_ENABLED=false on
+all but one worker there. The recalculation
+runs in a worker thread so the event loop keeps serving requests.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+import redis
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.scoring import ScoringEngine
+
+logger = logging.getLogger(__name__)
+
+_RUN_KEY = "hr:scoring_dirty_run:{day}"
+
+
+class ScoringScheduler:
+    """Run `ScoringEngine.recalculate_dirty` daily at SCORING_SCHEDULE_HOUR"""
+
+    def __init__(self, hour: Optional[int] = None, redis_url: Optional[str] = None):
+        self.hour = settings.SCORING_SCHEDULE_HOUR if hour is None else hour
+        self.redis_url = redis_url or settings.REDIS_URL
+        self._task: Optional[asyncio.Task] = None
+
+    def seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+        """Seconds from now until the next scheduled run"""
+        now = now or datetime.now()
+        next_run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    def claim_run(self, day: date) -> bool:
+        """Claim the day's run; False when another worker already has it"""
+        try:
+            client = redis.Redis.from_url(self.redis_url, socket_connect_timeout=0.2, socket_timeout=0.2)
+            return bool(client.set(_RUN_KEY.format(day=day.isoformat()), os.getpid(), nx=True, ex=86400))
+        except redis.RedisError as e:
+            logger.warning(f"Scoring scheduler lock unavailable, running in this worker: {e}")
+            return True
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Recalculate every dirty (user, period) pair once, off the event loop"""
+        results = await asyncio.get_running_loop().run_in_executor(None, self._recalculate)
+
+        logger.info(
+            f"Dirty-set recalculation finished: {results['successful']} ok, "
+            f"{results['failed']} failed, periods={results['periods']}"
+        )
+        return results
+
+    @staticmethod
+    def _recalculate() -> Dict[str, Any]:
+        # Blocking database work; runs in an executor thread with its own loop
+        with Session(engine) as db:
+            return asyncio.run(ScoringEngine(db).recalculate_dirty())
+
+    async def run_forever(self) -> None:
+        """Sleep until the scheduled hour, recalculate, repeat"""
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run())
+            if not self.claim_run(date.today()):
+                continue
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Dirty-set recalculation failed: {e}")
+
+    def start(self) -> None:
+        """Start the scheduler loop in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        """Cancel the scheduler loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+scoring_scheduler = ScoringScheduler()
@@ -0,0 +1,227 @@
+"""
+Score ledger - Append-only history of event contributions to monthly scores
+
+Every change of an event's contribution (see `ScoringEngine.event_contribution`)
+is appended to `score_ledger` as a -1 row for the old values and a +1 row for
+the new ones. Replaying a (user, period) up to a timestamp gives the events
+that counted at that moment, so past scores can be recomputed without the
+events table and current scores can be rebuilt from the ledger alone.
+
+`recorded_at` is stored as naive UTC, like the other timestamps in this
+schema. Timezone-aware `recorded_at` / `as_of` arguments are converted to it;
+naive ones are taken to be UTC already.
+
+Events that predate the ledger are seeded with `reconcile_all`
+(scripts/reconcile_score_ledger.py).
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select, and_
+
+from app.models import Event, EventStatus, ScoreLedgerEntry
+from app.services.scoring_plan import EventRow
+
+CONTRIBUTION_FIELDS = ("user_id", "rule_id", "final_score", "original_score", "adjusted_score")
+
+
+class ScoreLedger:
+    """Append and replay score ledger entries"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+        recorded_at: Optional[datetime] = None
+    ) -> int:
+        """Append the change between two contribution snapshots; the caller commits
+
+        Returns the number of entries written.
+        """
+        return self.record_changes([(before, after)], recorded_at)
+
+    def record_changes(
+        self,
+        changes: Sequence[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]],
+        recorded_at: Optional[datetime] = None
+    ) -> int:
+        """Append many (before, after) changes with one insert; the caller commits"""
+        recorded_at = _utc_naive(recorded_at) or datetime.utcnow()
+        entries = []
+        for before, after in changes:
+            if before == after:
+                continue
+            if before:
+                entries.append(self._entry(before, -1, recorded_at))
+            if after:
+                entries.append(self._entry(after, 1, recorded_at))
+
+        if entries:
+            self.db.execute(insert(ScoreLedgerEntry.__table__), entries)
+        return len(entries)
+
+    def contributions(
+        self,
+        user_id: int,
+        year: int,
+        month: int,
+        as_of: Optional[datetime] = None
+    ) -> List[EventRow]:
+        """Event rows that counted for a user's month at `as_of` (now when None)
+
+        Rows are in event id order, the order the scoring kernel reads events in.
+        """
+        statement = select(
+            ScoreLedgerEntry.event_id, ScoreLedgerEntry.sign,
+            *(getattr(ScoreLedgerEntry, field) for field in CONTRIBUTION_FIELDS)
+        ).where(self._range(user_id, year, month, as_of)).order_by(ScoreLedgerEntry.id)
+
+        live: Dict[int, EventRow] = {}
+        for event_id, sign, *row in self.db.exec(statement).all():
+            if sign > 0:
+                live[event_id] = tuple(row)
+            else:
+                live.pop(event_id, None)
+
+        return [live[event_id] for event_id in sorted(live)]
+
+    def rule_totals(
+        self,
+        user_id: int,
+        year: int,
+        month: int,
+        as_of: Optional[datetime] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """Per-rule event count and raw score total at `as_of`
+
+        Totals are sums of event final scores, before per-event bounds, the
+        monthly cap and category weights are applied.
+        """
+        statement = select(
+            ScoreLedgerEntry.rule_id,
+            func.sum(ScoreLedgerEntry.sign),
+            func.sum(ScoreLedgerEntry.sign * ScoreLedgerEntry.final_score)
+        ).where(self._range(user_id, year, month, as_of)).group_by(ScoreLedgerEntry.rule_id)
+
+        return {
+            rule_id: {"events": int(events), "original_total": float(total or 0.0)}
+            for rule_id, events, total in self.db.exec(statement).all()
+            if events
+        }
+
+    def reconcile_all(self) -> Dict[str, int]:
+        """Reconcile every month with approved events or ledger entries
+
+        Each month is committed on its own. Run after upgrading to seed the
+        ledger and whenever events were written outside the ORM.
+        """
+        months = set(self.db.exec(
+            select(Event.period_year, Event.period_month).where(Event.status == EventStatus.APPROVED).distinct()
+        ).all())
+        months.update(self.db.exec(
+            select(ScoreLedgerEntry.period_year, ScoreLedgerEntry.period_month).distinct()
+        ).all())
+
+        totals = {"months": len(months), "added": 0, "removed": 0}
+        for year, month in sorted(months):
+            counts = self.reconcile(year, month)
+            totals["added"] += counts["added"]
+            totals["removed"] += counts["removed"]
+        return totals
+
+    def reconcile(self, year: int, month: int) -> Dict[str, int]:
+        """Bring a month's ledger in line with its approved events and commit
+
+        Seeds the ledger for events that predate it and repairs drift from
+        writes that bypassed `ScoringEngine.apply_event_change`.
+        """
+        live: Dict[int, Dict[str, Any]] = {}
+        statement = select(
+            ScoreLedgerEntry.event_id, ScoreLedgerEntry.sign, ScoreLedgerEntry.period_year,
+            ScoreLedgerEntry.period_month,
+            *(getattr(ScoreLedgerEntry, field) for field in CONTRIBUTION_FIELDS)
+        ).where(
+            and_(ScoreLedgerEntry.period_year == year, ScoreLedgerEntry.period_month == month)
+        ).order_by(ScoreLedgerEntry.id)
+        for event_id, sign, *values in self.db.exec(statement).all():
+            if sign > 0:
+                live[event_id] = dict(zip(("period_year", "period_month") + CONTRIBUTION_FIELDS, values))
+                live[event_id]["event_id"] = event_id
+            else:
+                live.pop(event_id, None)
+
+        events = self.db.exec(
+            select(
+                Event.id, Event.period_year, Event.period_month,
+                *(getattr(Event, field) for field in CONTRIBUTION_FIELDS)
+            ).where(
+                and_(
+                    Event.period_year == year,
+                    Event.period_month == month,
+                    Event.status == EventStatus.APPROVED
+                )
+            )
+        ).all()
+
+        counts = {"added": 0, "removed": 0}
+        recorded_at = datetime.utcnow()
+        entries = []
+        for event_id, *values in events:
+            current = dict(zip(("period_year", "period_month") + CONTRIBUTION_FIELDS, values))
+            current["event_id"] = event_id
+            recorded = live.pop(event_id, None)
+            if recorded == current:
+                continue
+            if recorded:
+                entries.append(self._entry(recorded, -1, recorded_at))
+                counts["removed"] += 1
+            entries.append(self._entry(current, 1, recorded_at))
+            counts["added"] += 1
+
+        # Still live in the ledger but no longer approved in this month
+        for recorded in live.values():
+            entries.append(self._entry(recorded, -1, recorded_at))
+            counts["removed"] += 1
+
+        if entries:
+            self.db.execute(insert(ScoreLedgerEntry.__table__), entries)
+        self.db.commit()
+        return counts
+
+    @staticmethod
+    def _range(user_id: int, year: int, month: int, as_of: Optional[datetime]):
+        condition = and_(
+            ScoreLedgerEntry.user_id == user_id,
+            ScoreLedgerEntry.period_year == year,
+            ScoreLedgerEntry.period_month == month
+        )
+        if as_of is not None:
+            condition = and_(condition, ScoreLedgerEntry.recorded_at <= _utc_naive(as_of))
+        return condition
+
+    @staticmethod
+    def _entry(contribution: Dict[str, Any], sign: int, recorded_at: datetime) -> Dict[str, Any]:
+        return {
+            "event_id": contribution["event_id"],
+            "user_id": contribution["user_id"],
+            "period_year": contribution["period_year"],
+            "period_month": contribution["period_month"],
+            "rule_id": contribution["rule_id"],
+            "sign": sign,
+            "final_score": contribution["final_score"],
+            "original_score": contribution["original_score"],
+            "adjusted_score": contribution["adjusted_score"],
+            "recorded_at": recorded_at
+        }
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC stored in recorded_at"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,166 @@
+"""
+Score rollups - Quarterly and yearly scores materialized from monthly scores
+
+Quarterly and yearly Score rows are built from the user's monthly Score rows
+and their rule_breakdown; events are never rescanned. Rule caps are monthly,
+so each month's capped (and weighted) rule total is added as is and
+`cap_applied` is set when any month hit the cap. Refreshing after a month
+changes only rebuilds that month's quarter and year for the given users.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, select, and_
+
+from app.models import Period, PeriodType, Score
+from app.services.period_registry import period_registry
+from app.services.score_writer import ScoreRow, ScoreWriter
+from app.services.scoring_plan import COMPUTATION_VERSION
+
+SUMMED_FIELDS = (
+    "positive_score", "negative_score", "adjusted_score",
+    "total_events", "positive_events", "negative_events", "pending_events",
+    "events_computed_count"
+)
+
+
+def aggregate_monthly_scores(monthly_scores: Iterable[Score]) -> Dict[str, Any]:
+    """Combine monthly Score rows (in month order) into rollup score fields"""
+
+    data: Dict[str, Any] = {field: 0 for field in SUMMED_FIELDS}
+    total_score = 0.0
+    rule_breakdown: Dict[str, Dict[str, Any]] = {}
+    has_adjustments = False
+    needs_recalculation = False
+
+    for score in monthly_scores:
+        total_score += score.total_score
+        for field in SUMMED_FIELDS:
+            data[field] += getattr(score, field) or 0
+        has_adjustments = has_adjustments or score.has_adjustments
+        needs_recalculation = needs_recalculation or score.needs_recalculation
+
+        for rule_id, entry in (score.rule_breakdown or {}).items():
+            merged = rule_breakdown.get(str(rule_id))
+            if merged is None:
+                rule_breakdown[str(rule_id)] = {
+                    "rule_name": entry["rule_name"],
+                    "events": entry["events"],
+                    "total_score": entry["total_score"],
+                    "cap_applied": entry["cap_applied"],
+                    "original_total": entry["original_total"],
+                    "months_capped": int(entry["cap_applied"])
+                }
+            else:
+                merged["events"] += entry["events"]
+                merged["total_score"] += entry["total_score"]
+                merged["original_total"] += entry["original_total"]
+                merged["cap_applied"] = merged["cap_applied"] or entry["cap_applied"]
+                merged["months_capped"] += int(entry["cap_applied"])
+
+    for field in ("positive_score", "negative_score", "adjusted_score"):
+        data[field] = round(data[field], 2)
+
+    data.update({
+        "total_score": round(total_score, 2),
+        "rule_breakdown": rule_breakdown,
+        "has_adjustments": has_adjustments,
+        "needs_recalculation": needs_recalculation,
+        "computation_version": COMPUTATION_VERSION
+    })
+    return data
+
+
+class ScoreRollupService:
+    """Build quarterly and yearly Score rows from monthly ones"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh_month(
+        self,
+        year: int,
+        month: int,
+        user_ids: Optional[Sequence[int]] = None
+    ) -> List[Period]:
+        """Rebuild the quarter and year containing a month
+
+        Only the given users are refreshed (all users with monthly scores that
+        year when None). Returns the rollup periods that were rebuilt.
+        """
+
+        quarter = (month - 1) // 3 + 1
+        periods = [
+            self.get_or_create_period(PeriodType.QUARTERLY, year, quarter),
+            self.get_or_create_period(PeriodType.YEARLY, year)
+        ]
+        return self._rebuild(year, periods, user_ids)
+
+    def rollup_year(self, year: int, user_ids: Optional[Sequence[int]] = None) -> List[Period]:
+        """Rebuild all four quarters and the year"""
+
+        periods = [self.get_or_create_period(PeriodType.QUARTERLY, year, quarter) for quarter in range(1, 5)]
+        periods.append(self.get_or_create_period(PeriodType.YEARLY, year))
+        return self._rebuild(year, periods, user_ids)
+
+    def get_or_create_period(self, period_type: PeriodType, year: int, quarter: Optional[int] = None) -> Period:
+        """Get existing quarterly/yearly period or create new one"""
+        return period_registry.resolve(self.db, period_type, year, quarter=quarter)
+
+    def _rebuild(self, year: int, periods: List[Period], user_ids: Optional[Sequence[int]]) -> List[Period]:
+        # One query for the year's monthly rows, grouped by user in month order
+        statement = select(Score).where(
+            and_(Score.period_year == year, Score.period_type == PeriodType.MONTHLY)
+        ).order_by(Score.user_id, Score.period_month)
+        if user_ids is not None:
+            statement = statement.where(Score.user_id.in_(user_ids))
+
+        monthly_by_user: Dict[int, List[Score]] = {}
+        for score in self.db.exec(statement).all():
+            monthly_by_user.setdefault(score.user_id, []).append(score)
+
+        # Aggregate every period before writing: each write commits, which
+        # would expire the monthly rows and reload them one by one
+        rebuilt = [period for period in periods if not period.is_locked]
+        changes = [self._plan_period(period, monthly_by_user, user_ids) for period in rebuilt]
+
+        for period, (rows, obsolete) in zip(rebuilt, changes):
+            if obsolete:
+                self.db.execute(
+                    delete(Score).where(and_(Score.period_id == period.id, Score.user_id.in_(obsolete)))
+                )
+            ScoreWriter(self.db).write(period, rows)
+
+        self.db.commit()
+        return rebuilt
+
+    def _plan_period(
+        self,
+        period: Period,
+        monthly_by_user: Dict[int, List[Score]],
+        user_ids: Optional[Sequence[int]]
+    ) -> Tuple[List[ScoreRow], List[int]]:
+        """Rollup rows to write and user ids whose rollup row must be removed"""
+        statement = select(Score.user_id, Score.is_locked).where(Score.period_id == period.id)
+        if user_ids is not None:
+            statement = statement.where(Score.user_id.in_(user_ids))
+        existing = dict(self.db.exec(statement).all())
+
+        first_month, last_month = period.start_date.month, period.end_date.month
+        rows = []
+        obsolete = []
+        for user_id in sorted(set(monthly_by_user) | set(existing)):
+            if existing.get(user_id):
+                continue  # Locked
+
+            months = [
+                monthly for monthly in monthly_by_user.get(user_id, ())
+                if first_month <= monthly.period_month <= last_month
+            ]
+            if months:
+                rows.append((user_id, months[-1].department_id, aggregate_monthly_scores(months)))
+            elif user_id in existing:
+                obsolete.append(user_id)
+
+        return rows, obsolete
@@ -0,0 +1,151 @@
+"""
+Score writer - Bulk upsert of computed Score rows with change detection
+
+Computed scores are written with one dialect-appropriate upsert per batch
+(MySQL ON DUPLICATE KEY UPDATE, SQLite/PostgreSQL ON CONFLICT) keyed by the
+(user_id, period_id) unique constraint. Each payload is hashed into
+`Score.content_hash`; rows whose stored hash matches, and which are not
+flagged for recalculation, are skipped so unchanged users cost no writes.
+Monthly writes also replace the users' per-rule accumulators.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlmodel import Session, select, and_
+
+from app.core.config import settings
+from app.models import Period, PeriodType, Score
+from app.services.rule_accumulators import RuleAccumulators
+
+# (user_id, department_id, score_data)
+ScoreRow = Tuple[int, Optional[int], Dict[str, Any]]
+
+_UPSERT_DIALECTS = {
+    "mysql": mysql.insert,
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert
+}
+
+
+def score_content_hash(department_id: Optional[int], score_data: Dict[str, Any]) -> str:
+    """Stable hash of a computed score payload"""
+    payload = {key: value for key, value in score_data.items() if key != "needs_recalculation"}
+    if payload.get("rule_breakdown") is not None:
+        # Keys become strings once stored as JSON; hash them the same way
+        payload["rule_breakdown"] = {str(key): value for key, value in payload["rule_breakdown"].items()}
+    payload["department_id"] = department_id
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ScoreWriter:
+    """Write computed scores for one period in batches"""
+
+    def __init__(self, db: Session, batch_size: Optional[int] = None):
+        self.db = db
+        self.batch_size = batch_size or settings.SCORING_BATCH_SIZE
+
+    def write(self, period: Period, rows: Iterable[ScoreRow]) -> Dict[str, int]:
+        """Upsert changed rows and commit; returns inserted/updated/unchanged counts"""
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        batch: List[ScoreRow] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._write_batch(period, batch, counts)
+                batch = []
+        if batch:
+            self._write_batch(period, batch, counts)
+
+        self.db.commit()
+        return counts
+
+    def _write_batch(self, period: Period, batch: Sequence[ScoreRow], counts: Dict[str, int]) -> None:
+        stored = {
+            user_id: (content_hash, needs_recalculation)
+            for user_id, content_hash, needs_recalculation in self.db.exec(
+                select(Score.user_id, Score.content_hash, Score.needs_recalculation).where(
+                    and_(Score.period_id == period.id, Score.user_id.in_([row[0] for row in batch]))
+                )
+            ).all()
+        }
+
+        now = datetime.now()
+        values = []
+        for user_id, department_id, score_data in batch:
+            content_hash = score_content_hash(department_id, score_data)
+            needs_recalculation = score_data.get("needs_recalculation", False)
+
+            if user_id in stored:
+                if stored[user_id] == (content_hash, needs_recalculation):
+                    counts["unchanged"] += 1
+                    continue
+                counts["updated"] += 1
+            else:
+                counts["inserted"] += 1
+
+            values.append({
+                **score_data,
+                "user_id": user_id,
+                "period_id": period.id,
+                "period_year": period.year,
+                "period_month": period.month,
+                "period_quarter": period.quarter,
+                "period_type": period.type,
+                "department_id": department_id,
+                "content_hash": content_hash,
+                "computed_at": now,
+                "is_locked": period.is_locked,
+                "needs_recalculation": needs_recalculation,
+                "created_at": now,
+                "updated_at": now
+            })
+
+        if values:
+            self._upsert(values)
+            if period.type == PeriodType.MONTHLY:
+                RuleAccumulators(self.db).replace(
+                    period.year, period.month, {row["user_id"]: row.get("rule_breakdown") for row in values}
+                )
+
+    def _upsert(self, values: List[Dict[str, Any]]) -> None:
+        """Insert rows, updating computed fields when (user_id, period_id) exists"""
+
+        table = Score.__table__
+        insert = _UPSERT_DIALECTS.get(self.db.get_bind().dialect.name)
+        # Keep identity, creation time and lock state of existing rows
+        updated_columns = [
+            key for key in values[0]
+            if key not in ("user_id", "period_id", "created_at", "is_locked")
+        ]
+
+        if insert is None:
+            for row in values:
+                score = self.db.exec(
+                    select(Score).where(and_(Score.user_id == row["user_id"], Score.period_id == row["period_id"]))
+                ).first()
+                if score is None:
+                    score = Score(**row)
+                else:
+                    for key in updated_columns:
+                        setattr(score, key, row[key])
+                self.db.add(score)
+            self.db.flush()
+            return
+
+        statement = insert(table)
+        if self.db.get_bind().dialect.name == "mysql":
+            statement = statement.on_duplicate_key_update(
+                {key: statement.inserted[key] for key in updated_columns}
+            )
+        else:
+            statement = statement.on_conflict_do_update(
+                index_elements=["user_id", "period_id"],
+                set_={key: statement.excluded[key] for key in updated_columns}
+            )
+        self.db.execute(statement, values)
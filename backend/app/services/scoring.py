@@ -2,18 +2,40 @@
 Scoring engine - Calculate performance scores based on events and rules
 """
 
-from typing import Dict, Any, List, Optional
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields as dataclass_fields, replace as dataclass_replace
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
 from datetime import datetime, date
-from sqlmodel import Session, select, and_, func
+from sqlalchemy import case, delete, exists, update
+from sqlmodel import Session, create_engine, select, and_, func
 from collections import defaultdict
 
+import numpy as np
+
 from app.models import (
-    Event, EventStatus, User, Rule, RulePack, Score, Period, PeriodType,
-    ScoreCreate, ScoreUpdate
+    Event, EventStatus, User, RulePackStatus, Score, Period, PeriodType,
+    PendingScore, ScoreCreate, ScoreUpdate
 )
+from app.core.config import settings
 from app.services.audit import AuditService
+from app.services import dirty_tracking  # noqa: F401  (registers flush listeners)
+from app.services.period_registry import period_registry
+from app.services.rule_accumulators import RuleAccumulators
+from app.services.rule_cache import RuleInfo, RuleScopeIndex, rule_snapshot_cache
+from app.services.score_ledger import ScoreLedger
+from app.services.score_rollup import ScoreRollupService
+from app.services.score_writer import ScoreWriter
+from app.services.scoring_kernel import (
+    columns_from_rows, competition_ranks, evaluate_period, load_period_columns, period_columns_cache
+)
+from app.services.scoring_plan import compile_scoring_plan, event_row
 from app.models import AuditAction, AuditEntityType
 
+logger = logging.getLogger(__name__)
+
 
 class ScoringEngine:
     def __init__(self, db: Session):
@@ -52,12 +74,9 @@ class ScoringEngine:
         score_data = self._calculate_scores(events, active_rules, user, period)
         
         # Create or update score record
-        if existing_score:
-            updated_score = await self._update_score_record(existing_score, score_data)
-        else:
-            updated_score = await self._create_score_record(user_id, period.id, score_data)
+        ScoreWriter(self.db).write(period, [(user.id, user.department_id, score_data)])
         
-        return updated_score
+        return self._get_existing_score(user_id, period.id)
 
     async def calculate_department_scores(
         self,
@@ -89,57 +108,645 @@ class ScoringEngine:
         
         # Calculate rankings
         await self._calculate_department_rankings(department_id, period_year, period_month)
+        await self._calculate_period_comparisons(
+            self._get_or_create_period(period_year, period_month), [user.id for user in users]
+        )
         
         return scores
 
     async def calculate_company_scores(
+        self,
+        period_year: int,
+        period_month: int,
+        recalculate: bool = False,
+        batch: bool = True
+    ) -> List[Score]:
+        """Calculate scores for all active users in the company
+        
+        By default the whole period is scored set-based (see
+        `_calculate_company_scores_batch`). Pass batch=False to fall back to
+        one `calculate_user_score` call per user.
+        """
+        
+        if batch:
+            scores = await self._calculate_company_scores_batch(
+                period_year, period_month, recalculate
+            )
+        else:
+            # Get all active users
+            statement = select(User).where(User.status == "active")
+            users = self.db.exec(statement).all()
+            
+            scores = []
+            for user in users:
+                try:
+                    score = await self.calculate_user_score(
+                        user.id, period_year, period_month, recalculate
+                    )
+                    scores.append(score)
+                except Exception as e:
+                    print(f"Error calculating score for user {user.id}: {e}")
+        
+        # Calculate company-wide rankings and changes against the previous month
+        await self._calculate_company_rankings(period_year, period_month)
+        await self._calculate_period_comparisons(self._get_or_create_period(period_year, period_month))
+        
+        # Quarterly and yearly rollups follow the month
+        await self.refresh_rollups(period_year, period_month)
+        
+        return scores
+
+    async def _calculate_company_scores_batch(
         self,
         period_year: int,
         period_month: int,
         recalculate: bool = False
     ) -> List[Score]:
-        """Calculate scores for all active users in the company"""
+        """Calculate scores for all active users with a fixed number of queries
+        
+        Loads users, existing scores, approved events and active rules once for
+        the whole period, evaluates every user in memory with the same
+        compiled ScoringPlan used by the per-user path and writes all Score rows
+        in a single transaction.
+        """
+        
+        period = self._get_or_create_period(period_year, period_month)
         
         # Get all active users
-        statement = select(User).where(User.status == "active")
-        users = self.db.exec(statement).all()
+        users = self.db.exec(select(User).where(User.status == "active")).all()
         
-        scores = []
-        for user in users:
+        return self._score_users_batch(period, users, recalculate)
+
+    def _score_users_batch(
+        self,
+        period: Period,
+        users: List[User],
+        recalculate: bool = False,
+        errors: Optional[List[str]] = None,
+        restrict_to_users: bool = False
+    ) -> List[Score]:
+        """Score a set of users for one period and commit once
+        
+        When restrict_to_users is set, events are loaded only for the given
+        users (used for small dirty chunks); otherwise the whole period is read
+        in one query. If the vectorized kernel raises, the users are scored one
+        by one and only those that fail are appended to `errors` when given.
+        """
+        
+        user_ids = [user.id for user in users]
+        
+        # Existing scores for the period: user id -> needs_recalculation
+        statement = select(Score.user_id, Score.needs_recalculation).where(Score.period_id == period.id)
+        if restrict_to_users:
+            statement = statement.where(Score.user_id.in_(user_ids))
+        existing_scores = dict(self.db.exec(statement).all())
+        
+        # Approved events for the period as columns, in one query
+        columns = load_period_columns(
+            self.db, period.year, period.month, user_ids=user_ids if restrict_to_users else None
+        )
+        
+        # Compile the period's scope index and plan once; per-user lookups are O(1)
+        scope_index = rule_snapshot_cache.scope_index(self.db, period.year, period.month)
+        plan = rule_snapshot_cache.scoring_plan(self.db, period.year, period.month)
+        
+        # Users whose score is missing, stale or explicitly recalculated
+        to_score = {
+            user.id: user for user in users
+            if recalculate
+            or user.id not in existing_scores
+            or existing_scores[user.id]
+        }
+        
+        # Evaluate the plan for every user with the vectorized kernel
+        try:
+            score_data_by_user = evaluate_period(
+                plan,
+                columns.select(np.isin(columns.user_ids, list(to_score))),
+                lambda user_id: scope_index.rules_for(
+                    to_score[user_id].department_id, to_score[user_id].role
+                ),
+                user_ids=list(to_score)
+            )
+        except Exception as e:
+            # One bad user must not fail the rest: redo the chunk user by user
+            logger.warning(f"Batch scoring failed for period {period.name}, scoring users one by one: {e}")
+            score_data_by_user = self._score_users_individually(period, to_score, scope_index, errors)
+        
+        # Bulk upsert; users whose payload did not change are not written
+        ScoreWriter(self.db).write(period, (
+            (user_id, user.department_id, score_data_by_user[user_id])
+            for user_id, user in to_score.items() if user_id in score_data_by_user
+        ))
+        
+        return self._get_period_scores(period, user_ids, restrict_to_users)
+
+    def _score_users_individually(
+        self,
+        period: Period,
+        users: Dict[int, User],
+        scope_index: RuleScopeIndex,
+        errors: Optional[List[str]] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """Per-user fallback for a batch that raised; failures go to `errors`"""
+        
+        score_data_by_user = {}
+        for user_id, user in users.items():
             try:
-                score = await self.calculate_user_score(
-                    user.id, period_year, period_month, recalculate
-                )
-                scores.append(score)
+                events = self._get_events_for_period(user_id, period.year, period.month)
+                rules = scope_index.rules_for(user.department_id, user.role)
+                score_data_by_user[user_id] = self._calculate_scores(events, rules, user, period)
             except Exception as e:
-                print(f"Error calculating score for user {user.id}: {e}")
+                logger.warning(f"Scoring failed for user {user_id} in period {period.name}: {e}")
+                if errors is not None:
+                    errors.append(f"User {user_id}: {str(e)}")
         
-        # Calculate company-wide rankings
-        await self._calculate_company_rankings(period_year, period_month)
+        return score_data_by_user
+
+    def _get_period_scores(self, period: Period, user_ids: List[int], restrict_to_users: bool) -> List[Score]:
+        """Score rows of a period for the given users, in user order
         
-        return scores
+        Takes ids rather than User objects: after the writer's commit the users
+        are expired and reading `user.id` would reload each one.
+        """
+        
+        statement = select(Score).where(Score.period_id == period.id)
+        if restrict_to_users:
+            statement = statement.where(Score.user_id.in_(user_ids))
+        scores = {score.user_id: score for score in self.db.exec(statement).all()}
+        return [scores[user_id] for user_id in user_ids if user_id in scores]
 
-    def _get_or_create_period(self, year: int, month: int) -> Period:
-        """Get existing period or create new one"""
+    @staticmethod
+    def event_contribution(event: Event) -> Optional[Dict[str, Any]]:
+        """Snapshot the scoring-relevant fields of an event
+        
+        Returns None when the event does not count towards scores (only
+        approved events do). Take one snapshot before and one after changing
+        an event and pass both to `apply_event_change`.
+        """
+        
+        if event is None or event.status != EventStatus.APPROVED:
+            return None
+        
+        return {
+            "event_id": event.id,
+            "user_id": event.user_id,
+            "period_year": event.period_year,
+            "period_month": event.period_month,
+            "rule_id": event.rule_id,
+            "original_score": event.original_score,
+            "adjusted_score": event.adjusted_score,
+            "final_score": event.final_score
+        }
+
+    async def apply_event_change(
+        self,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]]
+    ) -> None:
+        """Adjust stored scores in place for a single event change
+        
+        `before` and `after` are `event_contribution` snapshots (None when the
+        event did not / no longer counts). Only the owning Score rows and the
+        affected rule_breakdown entries are touched; the rule cap is
+        re-evaluated for that rule alone. The change is appended to the score
+        ledger in the same transaction. Ranks, comparisons and rollups are
+        left to the dirty-set run (see `recalculate_dirty`).
+        """
+        
+        await self.apply_event_changes([(before, after)])
+
+    async def apply_event_changes(
+        self,
+        changes: Sequence[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+    ) -> None:
+        """Apply many (before, after) event changes in the caller's transaction
+        
+        Changes to the same (user, month, rule) are applied together. Each
+        affected month is flagged with `needs_refresh` for its ranks,
+        comparisons and rollups. Flushes but does not commit: the caller
+        commits the event write and its score changes together.
+        """
+        
+        changes = [(before, after) for before, after in changes if before != after]
+        if not changes:
+            return
+        
+        ScoreLedger(self.db).record_changes(changes)
+        
+        grouped: Dict[tuple, Dict[str, list]] = defaultdict(lambda: {"removed": [], "added": []})
+        for before, after in changes:
+            if before:
+                key = (before["user_id"], before["period_year"], before["period_month"], before["rule_id"])
+                grouped[key]["removed"].append(before)
+            if after:
+                key = (after["user_id"], after["period_year"], after["period_month"], after["rule_id"])
+                grouped[key]["added"].append(after)
+        
+        for (user_id, year, month, rule_id), delta in grouped.items():
+            self._apply_event_delta(user_id, year, month, rule_id, delta["removed"], delta["added"])
+        
+        months = {(year, month) for _, year, month, _ in grouped}
+        for year, month in months:
+            period = self._find_period(PeriodType.MONTHLY, year, month=month)
+            if period is not None and not period.is_locked and not period.needs_refresh:
+                period.needs_refresh = True
+                self.db.add(period)
+            period_columns_cache.invalidate_on_commit(self.db, year, month)
+        
+        self.db.flush()
+
+    def _apply_event_delta(
+        self,
+        user_id: int,
+        year: int,
+        month: int,
+        rule_id: int,
+        removed: List[Dict[str, Any]],
+        added: List[Dict[str, Any]]
+    ) -> Optional[Score]:
+        """Apply removed/added event contributions to one user's monthly score"""
         
-        # Check if period exists
-        statement = select(Period).where(
+        statement = select(Score).where(
             and_(
-                Period.type == PeriodType.MONTHLY,
-                Period.year == year,
-                Period.month == month
+                Score.user_id == user_id,
+                Score.period_year == year,
+                Score.period_month == month,
+                Score.period_type == PeriodType.MONTHLY
             )
         )
-        period = self.db.exec(statement).first()
+        score = self.db.exec(statement).first()
+        
+        # Nothing computed yet: leave it to the nightly dirty-set run
+        if not score:
+            self.mark_for_recalculation([(user_id, year, month)])
+            return None
+        
+        # Locked, or a full recalculation is already due
+        if score.is_locked or score.needs_recalculation:
+            return None
+        
+        # Event counts include events whose rule is no longer active
+        event_delta = len(added) - len(removed)
+        score.total_events += event_delta
+        score.events_computed_count += event_delta
+        
+        user = self.db.get(User, user_id)
+        rule = self._get_active_rules(user, year, month).get(rule_id) if user else None
+        if rule:
+            plan = rule_snapshot_cache.scoring_plan(self.db, year, month)
+            positive_score = score.positive_score
+            negative_score = score.negative_score
+            adjusted_score = score.adjusted_score
+            
+            for sign, contributions in ((-1, removed), (1, added)):
+                for contribution in contributions:
+                    final_score = plan.clamp(rule_id, contribution["final_score"])
+                    if final_score > 0:
+                        score.positive_events += sign
+                        positive_score += sign * final_score
+                    else:
+                        score.negative_events += sign
+                        negative_score += sign * final_score
+                    
+                    if (
+                        contribution["adjusted_score"] is not None and
+                        contribution["adjusted_score"] != contribution["original_score"]
+                    ):
+                        adjusted_score += sign * (contribution["adjusted_score"] - contribution["original_score"])
+            
+            # JSON columns are not mutation-tracked, so rebuild the breakdown
+            rule_breakdown = {
+                str(key): dict(value) for key, value in (score.rule_breakdown or {}).items()
+            }
+            entry = rule_breakdown.get(str(rule_id), {
+                "rule_name": rule.name,
+                "events": 0,
+                "total_score": 0.0,
+                "cap_applied": False,
+                "original_total": 0.0
+            })
+            
+            # Re-evaluate the cap and weight for this rule from its running total
+            accumulator = RuleAccumulators(self.db).apply(
+                user_id, year, month, rule_id, plan,
+                removed=[plan.clamp(rule_id, c["final_score"]) for c in removed],
+                added=[plan.clamp(rule_id, c["final_score"]) for c in added],
+                seed=rule_breakdown.get(str(rule_id))
+            )
+            
+            if accumulator.events > 0:
+                entry.update({
+                    "rule_name": rule.name,
+                    "events": accumulator.events,
+                    "total_score": accumulator.capped_total,
+                    "cap_applied": accumulator.cap_applied,
+                    "original_total": accumulator.raw_total
+                })
+                rule_breakdown[str(rule_id)] = entry
+            else:
+                rule_breakdown.pop(str(rule_id), None)
+            
+            score.rule_breakdown = rule_breakdown
+            score.total_score = round(sum(item["total_score"] for item in rule_breakdown.values()), 2)
+            score.positive_score = round(positive_score, 2)
+            score.negative_score = round(negative_score, 2)
+            score.adjusted_score = round(adjusted_score, 2)
+            score.has_adjustments = score.adjusted_score != 0
         
-        if not period:
-            # Create new period
-            period = Period.generate_monthly_period(year, month)
-            self.db.add(period)
-            self.db.commit()
-            self.db.refresh(period)
+        score.computed_at = datetime.now()
+        # Edited in place: the stored payload hash no longer describes the row
+        score.content_hash = None
+        self.db.add(score)
         
-        return period
+        return score
+
+    def score_from_ledger(
+        self,
+        user_id: int,
+        period_year: int,
+        period_month: int,
+        as_of: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Score fields for a user's month as of a point in time, from the ledger
+        
+        Replays the score ledger instead of reading events. Rules are the
+        period's current rules, so only event history is travelled.
+        """
+        
+        user = self.db.get(User, user_id)
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+        
+        scope_index = rule_snapshot_cache.scope_index(self.db, period_year, period_month)
+        plan = rule_snapshot_cache.scoring_plan(self.db, period_year, period_month)
+        rows = ScoreLedger(self.db).contributions(user_id, period_year, period_month, as_of)
+        
+        return evaluate_period(
+            plan,
+            columns_from_rows(rows),
+            lambda _: scope_index.rules_for(user.department_id, user.role),
+            user_ids=[user_id]
+        )[user_id]
+
+    async def rebuild_score_from_ledger(
+        self,
+        user_id: int,
+        period_year: int,
+        period_month: int
+    ) -> Score:
+        """Rewrite a user's monthly Score row from the ledger without reading events"""
+        
+        period = self._get_or_create_period(period_year, period_month)
+        if period.is_locked:
+            raise ValueError(f"期間 {period.name} 已鎖定")
+        
+        user = self.db.get(User, user_id)
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+        department_id = user.department_id
+        
+        score_data = self.score_from_ledger(user_id, period_year, period_month)
+        ScoreWriter(self.db).write(period, [(user_id, department_id, score_data)])
+        
+        return self._get_existing_score(user_id, period.id)
+
+    def mark_for_recalculation(self, pairs: List[tuple]) -> int:
+        """Flag (user_id, year, month) pairs for the nightly dirty-set run
+        
+        Existing monthly scores get needs_recalculation set; pairs without a
+        score yet are queued as PendingScore rows, so no zero score shows up
+        in rankings before the job computes it. Locked periods are skipped.
+        Does not commit.
+        """
+        
+        marked = 0
+        for user_id, year, month in sorted(set(pairs)):
+            period = self._get_or_create_period(year, month)
+            if period.is_locked:
+                continue
+            
+            score = self._get_existing_score(user_id, period.id)
+            if score:
+                if score.is_locked or score.needs_recalculation:
+                    continue
+                score.needs_recalculation = True
+                self.db.add(score)
+            else:
+                pending = self.db.exec(
+                    select(PendingScore.id).where(
+                        and_(PendingScore.user_id == user_id, PendingScore.period_id == period.id)
+                    )
+                ).first()
+                if pending is not None or not self.db.get(User, user_id):
+                    continue
+                self.db.add(PendingScore(user_id=user_id, period_id=period.id))
+            
+            marked += 1
+        
+        return marked
+
+    async def recalculate_dirty(self, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Recalculate scores flagged with needs_recalculation and compute pending ones
+        
+        Dirty rows are processed in chunks of SCORING_BATCH_SIZE per period
+        with one commit per chunk; rankings are refreshed once per touched
+        period afterwards, as are periods flagged `needs_refresh` by
+        incremental event changes. Pending scores are dequeued once written.
+        """
+        
+        batch_size = batch_size or settings.SCORING_BATCH_SIZE
+        
+        statement = select(Score.user_id, Score.period_id).where(
+            and_(
+                Score.needs_recalculation == True,
+                Score.is_locked == False,
+                Score.period_type == PeriodType.MONTHLY
+            )
+        )
+        has_score = exists().where(
+            and_(Score.user_id == PendingScore.user_id, Score.period_id == PendingScore.period_id)
+        )
+        pending = select(PendingScore.user_id, PendingScore.period_id).join(
+            Period, Period.id == PendingScore.period_id
+        ).where(and_(Period.is_locked == False, ~has_score))
+        dirty = sorted(
+            set(self.db.exec(statement).all()) | set(self.db.exec(pending).all()),
+            key=lambda row: (row[1], row[0])
+        )
+        
+        user_ids_by_period: Dict[int, List[int]] = defaultdict(list)
+        for user_id, period_id in dirty:
+            user_ids_by_period[period_id].append(user_id)
+        
+        # Periods edited incrementally since the last run
+        stale_periods = set(self.db.exec(
+            select(Period.id).where(and_(Period.needs_refresh == True, Period.is_locked == False))
+        ).all())
+        for period_id in sorted(stale_periods - set(user_ids_by_period)):
+            user_ids_by_period[period_id] = []
+        
+        results = {
+            "periods": [],
+            "total_users": len(dirty),
+            "successful": 0,
+            "failed": 0,
+            "errors": []
+        }
+        
+        for period_id, user_ids in user_ids_by_period.items():
+            period = self.db.get(Period, period_id)
+            results["periods"].append(period.name)
+            
+            for start in range(0, len(user_ids), batch_size):
+                chunk = user_ids[start:start + batch_size]
+                users = self.db.exec(select(User).where(User.id.in_(chunk))).all()
+                
+                errors: List[str] = []
+                self._score_users_batch(
+                    period, users, recalculate=True, errors=errors, restrict_to_users=True
+                )
+                results["successful"] += len(users) - len(errors)
+                results["failed"] += len(chunk) - len(users) + len(errors)
+                results["errors"].extend(errors)
+            
+            # Rankings depend on every score in the period (company pass covers departments);
+            # after incremental edits every user's comparisons and rollups are refreshed
+            refreshed = None if period_id in stale_periods else user_ids
+            await self._calculate_company_rankings(period.year, period.month)
+            await self._calculate_period_comparisons(period, refreshed)
+            await self.refresh_rollups(period.year, period.month, refreshed)
+            
+            if period.needs_refresh:
+                period.needs_refresh = False
+                self.db.add(period)
+                self.db.commit()
+        
+        # Scored now, or by a full calculation since they were queued
+        self.db.execute(delete(PendingScore).where(has_score))
+        self.db.commit()
+        
+        return results
+
+    async def simulate_period(
+        self,
+        period_year: int,
+        period_month: int,
+        rule_pack_id: Optional[int] = None,
+        rule_changes: Optional[Mapping[int, Mapping[str, Any]]] = None,
+        superseded_pack_ids: Sequence[int] = ()
+    ) -> Dict[str, Any]:
+        """What-if: re-score a period in memory under changed rules, writing nothing
+        
+        `rule_pack_id` is treated as active for the period (typically a DRAFT
+        pack), `superseded_pack_ids` as inactive (the packs it would replace),
+        and `rule_changes` maps rule ids to edited Rule values, e.g.
+        {12: {"caps": 20, "active": False}}. Events keep their recorded
+        scores, so caps, bounds, category weights, scope and active flags are
+        what change. Returns per-user and per-department deltas against the
+        current rules, with rank changes.
+        """
+        
+        snapshot = rule_snapshot_cache.snapshot(self.db)
+        period_start = date(period_year, period_month, 1)
+        
+        rules = dict(snapshot.rules)
+        packs = dict(snapshot.packs)
+        if rule_pack_id is not None:
+            if rule_pack_id not in packs:
+                raise ValueError(f"規則包不存在: {rule_pack_id}")
+            packs[rule_pack_id] = dataclass_replace(
+                packs[rule_pack_id], status=RulePackStatus.ACTIVE,
+                effective_from=min(packs[rule_pack_id].effective_from, period_start), effective_to=None
+            )
+        for pack_id in superseded_pack_ids:
+            if pack_id in packs:
+                packs[pack_id] = dataclass_replace(packs[pack_id], status=RulePackStatus.INACTIVE)
+        
+        editable = {field.name for field in dataclass_fields(RuleInfo)} - {"id", "rule_pack_id"}
+        for rule_id, changes in (rule_changes or {}).items():
+            if rule_id not in rules:
+                raise ValueError(f"規則不存在: {rule_id}")
+            unknown = set(changes) - editable
+            if unknown:
+                raise ValueError(f"無法模擬的規則欄位: {', '.join(sorted(unknown))}")
+            rules[rule_id] = dataclass_replace(rules[rule_id], **changes)
+        
+        baseline_index = snapshot.scope_index(period_start)
+        baseline_plan = snapshot.scoring_plan(period_start)
+        scenario_index = RuleScopeIndex(rules, packs, period_start)
+        scenario_plan = compile_scoring_plan(scenario_index.all_rules, packs)
+        
+        # Active users and the period's cached event columns
+        users = self.db.exec(
+            select(User.id, User.department_id, User.role).where(User.status == "active").order_by(User.id)
+        ).all()
+        user_ids = [user_id for user_id, _, _ in users]
+        targets = {user_id: (department_id, role) for user_id, department_id, role in users}
+        columns = period_columns_cache.get(self.db, period_year, period_month)
+        columns = columns.select(np.isin(columns.user_ids, user_ids))
+        
+        def evaluate(index, plan):
+            results = evaluate_period(
+                plan, columns, lambda user_id: index.rules_for(*targets[user_id]), user_ids=user_ids
+            )
+            return np.array([results[user_id]["total_score"] for user_id in user_ids], dtype=np.float64)
+        
+        baseline = evaluate(baseline_index, baseline_plan)
+        simulated = evaluate(scenario_index, scenario_plan)
+        
+        department_ids = np.array(
+            [-1 if targets[user_id][0] is None else targets[user_id][0] for user_id in user_ids], dtype=np.int64
+        )
+        baseline_rank = competition_ranks(baseline)
+        simulated_rank = competition_ranks(simulated)
+        baseline_department_rank = competition_ranks(baseline, department_ids)
+        simulated_department_rank = competition_ranks(simulated, department_ids)
+        
+        user_results = []
+        for i, user_id in enumerate(user_ids):
+            user_results.append({
+                "user_id": user_id,
+                "department_id": targets[user_id][0],
+                "baseline_score": float(baseline[i]),
+                "simulated_score": float(simulated[i]),
+                "delta": round(float(simulated[i] - baseline[i]), 2),
+                "baseline_rank": int(baseline_rank[i]),
+                "simulated_rank": int(simulated_rank[i]),
+                "rank_change": int(baseline_rank[i] - simulated_rank[i]),
+                "baseline_department_rank": int(baseline_department_rank[i]),
+                "simulated_department_rank": int(simulated_department_rank[i])
+            })
+        
+        department_results = []
+        for department_id in np.unique(department_ids).tolist():
+            members = department_ids == department_id
+            baseline_total = float(baseline[members].sum())
+            simulated_total = float(simulated[members].sum())
+            department_results.append({
+                "department_id": None if department_id == -1 else department_id,
+                "users": int(members.sum()),
+                "baseline_total": round(baseline_total, 2),
+                "simulated_total": round(simulated_total, 2),
+                "delta": round(simulated_total - baseline_total, 2),
+                "baseline_average": round(baseline_total / members.sum(), 2),
+                "simulated_average": round(simulated_total / members.sum(), 2)
+            })
+        
+        return {
+            "period": f"{period_year}-{period_month:02d}",
+            "total_users": len(user_ids),
+            "changed_users": sum(1 for result in user_results if result["delta"] != 0),
+            "rank_changes": sum(1 for result in user_results if result["rank_change"] != 0),
+            "total_delta": round(float(simulated.sum() - baseline.sum()), 2),
+            "users": user_results,
+            "departments": department_results
+        }
+
+    def _get_or_create_period(self, year: int, month: int) -> Period:
+        """Get existing period or create new one"""
+        
+        return period_registry.monthly(self.db, year, month)
 
     def _get_existing_score(self, user_id: int, period_id: int) -> Optional[Score]:
         """Get existing score record"""
@@ -152,168 +759,74 @@ class ScoringEngine:
         )
         return self.db.exec(statement).first()
 
-    def _get_events_for_period(self, user_id: int, year: int, month: int) -> List[Event]:
-        """Get approved events for user in specified period"""
+    def _get_events_for_period(
+        self,
+        user_id: Optional[int],
+        year: int,
+        month: int,
+        user_ids: Optional[List[int]] = None
+    ) -> List[Event]:
+        """Get approved events for user (or every user when None) in specified period"""
         
         statement = select(Event).where(
             and_(
-                Event.user_id == user_id,
                 Event.period_year == year,
                 Event.period_month == month,
                 Event.status == EventStatus.APPROVED
             )
         )
+        
+        if user_id is not None:
+            statement = statement.where(Event.user_id == user_id)
+        elif user_ids is not None:
+            statement = statement.where(Event.user_id.in_(user_ids))
+        
+        # Stable order keeps per-user and batch sums identical
+        statement = statement.order_by(Event.user_id, Event.id)
         return self.db.exec(statement).all()
 
-    def _get_active_rules(self, user: User, year: int, month: int) -> Dict[int, Rule]:
-        """Get active rules applicable to the user"""
+    def _get_active_rules(self, user: Optional[User], year: int, month: int) -> Mapping[int, RuleInfo]:
+        """Get active rules applicable to the user
         
-        # For now, get all active rules from active rule packs
-        # TODO: Implement rule pack scope filtering (company/department/role)
+        Rule pack scope (company/department/role) and effective dates are
+        resolved through the period's compiled scope index. Without a user,
+        every active rule in effect for the period is returned.
+        """
         
-        statement = select(Rule).join(RulePack).where(
-            and_(
-                Rule.active == True,
-                RulePack.status == "active",
-                RulePack.effective_from <= date(year, month, 1)
-            )
-        )
+        scope_index = rule_snapshot_cache.scope_index(self.db, year, month)
+        if user is None:
+            return scope_index.all_rules
         
-        rules = self.db.exec(statement).all()
-        return {rule.id: rule for rule in rules}
+        return scope_index.rules_for(user.department_id, user.role)
 
     def _calculate_scores(
         self,
         events: List[Event],
-        rules: Dict[int, Rule],
+        rules: Mapping[int, RuleInfo],
         user: User,
         period: Period
     ) -> Dict[str, Any]:
-        """Calculate score components from events and rules"""
-        
-        total_score = 0.0
-        positive_score = 0.0
-        negative_score = 0.0
-        adjusted_score = 0.0
-        
-        total_events = len(events)
-        positive_events = 0
-        negative_events = 0
-        
-        rule_breakdown = defaultdict(lambda: {
-            "rule_name": "",
-            "events": 0,
-            "total_score": 0.0,
-            "cap_applied": False
-        })
-        
-        # Group events by rule for cap calculation
-        events_by_rule = defaultdict(list)
-        for event in events:
-            events_by_rule[event.rule_id].append(event)
-        
-        # Calculate scores with caps
-        for rule_id, rule_events in events_by_rule.items():
-            rule = rules.get(rule_id)
-            if not rule:
-                continue
-            
-            rule_total = 0.0
-            for event in rule_events:
-                rule_total += event.final_score
-                
-                if event.final_score > 0:
-                    positive_events += 1
-                    positive_score += event.final_score
-                else:
-                    negative_events += 1
-                    negative_score += event.final_score
-                
-                # Track adjustments
-                if event.is_adjusted:
-                    adjusted_score += (event.adjusted_score or 0) - event.original_score
-            
-            # Apply caps if defined
-            original_rule_total = rule_total
-            if rule.caps and abs(rule_total) > rule.caps:
-                rule_total = rule.caps if rule_total > 0 else -rule.caps
-                rule_breakdown[rule_id]["cap_applied"] = True
-            
-            total_score += rule_total
-            
-            rule_breakdown[rule_id].update({
-                "rule_name": rule.name,
-                "events": len(rule_events),
-                "total_score": rule_total,
-                "original_total": original_rule_total
-            })
+        """Calculate score components from events and rules
         
-        return {
-            "total_score": round(total_score, 2),
-            "positive_score": round(positive_score, 2),
-            "negative_score": round(negative_score, 2),
-            "adjusted_score": round(adjusted_score, 2),
-            "total_events": total_events,
-            "positive_events": positive_events,
-            "negative_events": negative_events,
-            "pending_events": 0,  # Only counting approved events
-            "rule_breakdown": dict(rule_breakdown),
-            "events_computed_count": total_events,
-            "computation_version": "1.0",
-            "has_adjustments": adjusted_score != 0
-        }
-
-    async def _create_score_record(
-        self,
-        user_id: int,
-        period_id: int,
-        score_data: Dict[str, Any]
-    ) -> Score:
-        """Create new score record"""
-        
-        user = self.db.get(User, user_id)
-        period = self.db.get(Period, period_id)
-        
-        score = Score(
-            user_id=user_id,
-            period_id=period_id,
-            period_year=period.year,
-            period_month=period.month,
-            period_quarter=period.quarter,
-            period_type=period.type,
-            department_id=user.department_id,
-            **score_data,
-            computed_at=datetime.now(),
-            is_locked=period.is_locked,
-            needs_recalculation=False
-        )
-        
-        self.db.add(score)
-        self.db.commit()
-        self.db.refresh(score)
+        Clamps, caps and category weights come from the period's compiled
+        ScoringPlan; `rules` restricts which rules apply to this user.
+        """
         
-        return score
+        plan = rule_snapshot_cache.scoring_plan(self.db, period.year, period.month)
+        return plan.evaluate_user((event_row(event) for event in events), rules)
 
-    async def _update_score_record(
+    async def refresh_rollups(
         self,
-        score: Score,
-        score_data: Dict[str, Any]
-    ) -> Score:
-        """Update existing score record"""
-        
-        # Update score fields
-        for key, value in score_data.items():
-            if hasattr(score, key):
-                setattr(score, key, value)
-        
-        score.computed_at = datetime.now()
-        score.needs_recalculation = False
-        
-        self.db.add(score)
-        self.db.commit()
-        self.db.refresh(score)
+        period_year: int,
+        period_month: int,
+        user_ids: Optional[List[int]] = None
+    ) -> None:
+        """Rebuild the quarterly and yearly scores containing a month from monthly scores"""
         
-        return score
+        periods = ScoreRollupService(self.db).refresh_month(period_year, period_month, user_ids)
+        for period in periods:
+            await self._calculate_period_rankings(period.id)
+            await self._calculate_period_comparisons(period, user_ids)
 
     async def _calculate_department_rankings(
         self,
@@ -323,23 +836,19 @@ class ScoringEngine:
     ) -> None:
         """Calculate rankings within department"""
         
-        # Get all scores for the department in this period
-        statement = select(Score).where(
-            and_(
-                Score.department_id == department_id,
-                Score.period_year == period_year,
-                Score.period_month == period_month
-            )
-        ).order_by(Score.total_score.desc())
-        
-        scores = self.db.exec(statement).all()
+        period_filter = and_(
+            Score.department_id == department_id,
+            Score.period_year == period_year,
+            Score.period_month == period_month
+        )
         
-        # Assign rankings and percentiles
-        total_users = len(scores)
-        for rank, score in enumerate(scores, 1):
-            score.rank_department = rank
-            score.percentile_department = ((total_users - rank + 1) / total_users) * 100
-            self.db.add(score)
+        if self._supports_window_ranking():
+            self._update_rankings(period_filter, company=False)
+        else:
+            scores = self.db.exec(
+                select(Score).where(period_filter).order_by(Score.total_score.desc(), Score.id)
+            ).all()
+            self._assign_ranks(scores, "rank_department", "percentile_department")
         
         self.db.commit()
 
@@ -348,34 +857,224 @@ class ScoringEngine:
         period_year: int,
         period_month: int
     ) -> None:
-        """Calculate company-wide rankings"""
+        """Calculate company-wide rankings, and every department's, in one pass"""
         
-        # Get all scores for this period
-        statement = select(Score).where(
-            and_(
-                Score.period_year == period_year,
-                Score.period_month == period_month
+        self._rank_scores(and_(
+            Score.period_year == period_year,
+            Score.period_month == period_month
+        ))
+
+    async def _calculate_period_rankings(self, period_id: int) -> None:
+        """Calculate company and department rankings for any period (e.g. rollups)"""
+        
+        self._rank_scores(Score.period_id == period_id)
+
+    def _rank_scores(self, period_filter) -> None:
+        """Rank the scores matching period_filter company-wide and per department"""
+        
+        if self._supports_window_ranking():
+            self._update_rankings(period_filter, company=True)
+        else:
+            scores = self.db.exec(
+                select(Score).where(period_filter).order_by(Score.total_score.desc(), Score.id)
+            ).all()
+            self._assign_ranks(scores, "rank_company", "percentile_company")
+            
+            by_department: Dict[int, List[Score]] = defaultdict(list)
+            for score in scores:
+                if score.department_id is not None:
+                    by_department[score.department_id].append(score)
+            for department_scores in by_department.values():
+                self._assign_ranks(department_scores, "rank_department", "percentile_department")
+        
+        self.db.commit()
+
+    def _supports_update_from(self) -> bool:
+        """Whether the database accepts UPDATE ... FROM (UPDATE ... JOIN on MySQL)"""
+        
+        if self.db.get_bind().dialect.name == "sqlite":
+            return sqlite3.sqlite_version_info >= (3, 33, 0)
+        return True
+
+    def _supports_window_ranking(self) -> bool:
+        """Whether the database can rank with window functions and UPDATE ... FROM/JOIN"""
+        
+        dialect = self.db.get_bind().dialect
+        if dialect.name == "sqlite":
+            # Window functions arrived in 3.25, UPDATE ... FROM in 3.33
+            return self._supports_update_from()
+        if dialect.name == "mysql":
+            version = dialect.server_version_info or ()
+            if getattr(dialect, "is_mariadb", False):
+                return version >= (10, 2)
+            return version >= (8, 0)
+        return True
+
+    def _update_rankings(self, period_filter, company: bool) -> None:
+        """Write RANK() based rankings and percentiles with a single UPDATE
+        
+        Percentile keeps the stored definition: (n - rank + 1) / n * 100,
+        so the top score is 100. Tied scores share a rank.
+        """
+        
+        order = Score.total_score.desc()
+        columns = [
+            Score.id,
+            func.rank().over(partition_by=Score.department_id, order_by=order).label("department_rank"),
+            func.count().over(partition_by=Score.department_id).label("department_size")
+        ]
+        if company:
+            columns += [
+                func.rank().over(order_by=order).label("company_rank"),
+                func.count().over().label("company_size")
+            ]
+        ranked = select(*columns).where(period_filter).subquery()
+        
+        def percentile(rank, size):
+            return (size - rank + 1) * 1.0 / size * 100
+        
+        has_department = Score.department_id != None
+        values = {
+            "rank_department": case((has_department, ranked.c.department_rank), else_=None),
+            "percentile_department": case(
+                (has_department, percentile(ranked.c.department_rank, ranked.c.department_size)),
+                else_=None
             )
-        ).order_by(Score.total_score.desc())
+        }
+        if company:
+            values["rank_company"] = ranked.c.company_rank
+            values["percentile_company"] = percentile(ranked.c.company_rank, ranked.c.company_size)
         
-        scores = self.db.exec(statement).all()
+        self.db.execute(
+            update(Score)
+            .where(Score.id == ranked.c.id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _assign_ranks(scores: List[Score], rank_field: str, percentile_field: str) -> None:
+        """Assign competition ranks (ties share a rank) to scores sorted by total_score desc"""
         
-        # Assign company rankings and percentiles
         total_users = len(scores)
-        for rank, score in enumerate(scores, 1):
-            score.rank_company = rank
-            score.percentile_company = ((total_users - rank + 1) / total_users) * 100
-            self.db.add(score)
+        rank = 0
+        previous_total = None
+        for position, score in enumerate(scores, 1):
+            if score.total_score != previous_total:
+                rank = position
+                previous_total = score.total_score
+            setattr(score, rank_field, rank)
+            setattr(score, percentile_field, ((total_users - rank + 1) / total_users) * 100)
+
+    async def _calculate_period_comparisons(
+        self,
+        period: Period,
+        user_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """Fill previous-period comparison fields for a period and the period after it
+        
+        The following period is refreshed too because its comparison is
+        against this period's (possibly changed) totals.
+        """
+        
+        previous_period = self._adjacent_period(period, -1)
+        self._compare_with_previous(period, previous_period, user_ids)
+        
+        next_period = self._adjacent_period(period, 1)
+        if next_period is not None:
+            self._compare_with_previous(next_period, period, user_ids)
         
         self.db.commit()
 
+    def _adjacent_period(self, period: Period, offset: int) -> Optional[Period]:
+        """The existing period of the same type before (-1) or after (+1) this one"""
+        
+        if period.type == PeriodType.MONTHLY:
+            index = period.year * 12 + (period.month - 1) + offset
+            return self._find_period(PeriodType.MONTHLY, index // 12, month=index % 12 + 1)
+        if period.type == PeriodType.QUARTERLY:
+            index = period.year * 4 + (period.quarter - 1) + offset
+            return self._find_period(PeriodType.QUARTERLY, index // 4, quarter=index % 4 + 1)
+        return self._find_period(PeriodType.YEARLY, period.year + offset)
+
+    def _find_period(
+        self,
+        period_type: PeriodType,
+        year: int,
+        month: Optional[int] = None,
+        quarter: Optional[int] = None
+    ) -> Optional[Period]:
+        """Look up a period without creating it"""
+        
+        return period_registry.find(self.db, period_type, year, month, quarter)
+
+    def _compare_with_previous(
+        self,
+        period: Period,
+        previous_period: Optional[Period],
+        user_ids: Optional[Sequence[int]] = None
+    ) -> None:
+        """Set previous_total_score / score_change(_percent) for a period's scores in bulk"""
+        
+        current_filter = and_(Score.period_id == period.id, Score.is_locked == False)
+        if user_ids is not None:
+            current_filter = and_(current_filter, Score.user_id.in_(user_ids))
+        
+        if previous_period is None or self._supports_update_from():
+            # Clear, then join the prior period's totals in a single UPDATE
+            self.db.execute(
+                update(Score).where(current_filter).values(
+                    previous_total_score=None, score_change=None, score_change_percent=None
+                ).execution_options(synchronize_session=False)
+            )
+            if previous_period is None:
+                return
+            prior = select(Score.user_id, Score.total_score).where(
+                Score.period_id == previous_period.id
+            ).subquery()
+            change = Score.total_score - prior.c.total_score
+            self.db.execute(
+                update(Score)
+                .where(and_(current_filter, Score.user_id == prior.c.user_id))
+                .values(
+                    previous_total_score=prior.c.total_score,
+                    score_change=func.round(change, 2),
+                    score_change_percent=case(
+                        (prior.c.total_score != 0, func.round(change * 100.0 / func.abs(prior.c.total_score), 2)),
+                        else_=None
+                    )
+                )
+                .execution_options(synchronize_session=False)
+            )
+            return
+        
+        # Fallback: two queries and the arithmetic in Python
+        previous_totals = dict(self.db.exec(
+            select(Score.user_id, Score.total_score).where(Score.period_id == previous_period.id)
+        ).all())
+        for score in self.db.exec(select(Score).where(current_filter)).all():
+            previous_total = previous_totals.get(score.user_id)
+            score.previous_total_score = previous_total
+            score.score_change = None if previous_total is None else round(score.total_score - previous_total, 2)
+            score.score_change_percent = (
+                round((score.total_score - previous_total) * 100.0 / abs(previous_total), 2)
+                if previous_total else None
+            )
+            self.db.add(score)
+
     async def recalculate_period(
         self,
         period_year: int,
         period_month: int,
-        department_id: Optional[int] = None
+        department_id: Optional[int] = None,
+        workers: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Recalculate all scores for a period"""
+        """Recalculate all scores for a period
+        
+        With more than one worker (default settings.SCORING_WORKERS), users are
+        partitioned by department and each partition is scored in its own
+        process; see `_recalculate_partitions_parallel`.
+        """
         
         base_query = select(User).where(User.status == "active")
         
@@ -392,15 +1091,27 @@ class ScoringEngine:
             "errors": []
         }
         
-        for user in users:
-            try:
-                await self.calculate_user_score(
-                    user.id, period_year, period_month, recalculate=True
-                )
-                results["successful"] += 1
-            except Exception as e:
-                results["failed"] += 1
-                results["errors"].append(f"User {user.id}: {str(e)}")
+        workers = settings.SCORING_WORKERS if workers is None else workers
+        database_url = self._shared_database_url()
+        
+        if workers > 1 and database_url is not None:
+            partition_results = await self._recalculate_partitions_parallel(
+                period_year, period_month, users, workers, database_url
+            )
+            for partition_result in partition_results:
+                results["successful"] += partition_result["successful"]
+                results["failed"] += partition_result["failed"]
+                results["errors"].extend(partition_result["errors"])
+        else:
+            for user in users:
+                try:
+                    await self.calculate_user_score(
+                        user.id, period_year, period_month, recalculate=True
+                    )
+                    results["successful"] += 1
+                except Exception as e:
+                    results["failed"] += 1
+                    results["errors"].append(f"User {user.id}: {str(e)}")
         
         # Recalculate rankings
         if department_id:
@@ -408,4 +1119,82 @@ class ScoringEngine:
         else:
             await self._calculate_company_rankings(period_year, period_month)
         
-        return results
\ No newline at end of file
+        await self._calculate_period_comparisons(
+            self._get_or_create_period(period_year, period_month),
+            [user.id for user in users] if department_id else None
+        )
+        await self.refresh_rollups(
+            period_year, period_month, [user.id for user in users] if department_id else None
+        )
+        
+        return results
+
+    async def _recalculate_partitions_parallel(
+        self,
+        period_year: int,
+        period_month: int,
+        users: List[User],
+        workers: int,
+        database_url: str
+    ) -> List[Dict[str, Any]]:
+        """Score users in a process pool, one partition per department
+        
+        Partitions are ordered by department id and users by id, so the merged
+        results do not depend on the worker count. Rankings are left to the
+        caller, which runs them once after every partition has finished.
+        """
+        
+        # Create the period up front so workers never race to insert it
+        period = self._get_or_create_period(period_year, period_month)
+        self.db.commit()
+        
+        partitions: Dict[Optional[int], List[int]] = defaultdict(list)
+        for user in users:
+            partitions[user.department_id].append(user.id)
+        ordered = sorted(partitions.items(), key=lambda item: (item[0] is None, item[0] or 0))
+        
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=min(workers, len(ordered) or 1)) as pool:
+            futures = [
+                loop.run_in_executor(
+                    pool, recalculate_partition, database_url, period.id, sorted(user_ids)
+                )
+                for _, user_ids in ordered
+            ]
+            return await asyncio.gather(*futures)
+
+    def _shared_database_url(self) -> Optional[str]:
+        """URL other processes can open, or None for a private in-memory database"""
+        
+        url = self.db.get_bind().url
+        if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+            return None
+        return url.render_as_string(hide_password=False)
+
+
+def recalculate_partition(database_url: str, period_id: int, user_ids: List[int]) -> Dict[str, Any]:
+    """Process-pool worker: score one partition of users with its own engine and session"""
+    
+    worker_engine = create_engine(database_url, pool_pre_ping=True)
+    results = {"successful": 0, "failed": 0, "errors": []}
+    try:
+        with Session(worker_engine) as db:
+            scoring_engine = ScoringEngine(db)
+            period = db.get(Period, period_id)
+            batch_size = settings.SCORING_BATCH_SIZE
+            
+            for start in range(0, len(user_ids), batch_size):
+                chunk = user_ids[start:start + batch_size]
+                users = db.exec(select(User).where(User.id.in_(chunk)).order_by(User.id)).all()
+                
+                errors: List[str] = []
+                scoring_engine._score_users_batch(
+                    period, users, recalculate=True, errors=errors, restrict_to_users=True
+                )
+                results["successful"] += len(users) - len(errors)
+                results["failed"] += len(chunk) - len(users) + len(errors)
+                results["errors"].extend(errors)
+    finally:
+        worker_engine.dispose()
+    
+    return results
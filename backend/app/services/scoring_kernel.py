@@ -0,0 +1,267 @@
+"""
+Scoring kernel - Columnar, vectorized evaluation of a whole period
+
+Loads (user_id, rule_id, final_score, original_score, adjusted_score) for a
+period into NumPy arrays with one query and evaluates a ScoringPlan with
+grouped array operations instead of walking ORM Event objects.
+
+The output is the same per-user dict `ScoringPlan.evaluate` returns. Sums are
+taken with np.bincount, which adds in event order, and rule totals are
+combined in first-seen order, so results match the row-by-row path exactly.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select, and_
+
+from app.core.config import settings
+from app.models import Event, EventStatus
+from app.services.scoring_plan import COMPUTATION_VERSION, ScoringPlan
+
+
+class PeriodColumns(NamedTuple):
+    """Approved events of a period as parallel arrays, ordered by (user_id, id)"""
+    user_ids: np.ndarray
+    rule_ids: np.ndarray
+    final_scores: np.ndarray
+    original_scores: np.ndarray
+    adjusted_scores: np.ndarray  # NaN where not adjusted
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def select(self, mask: np.ndarray) -> "PeriodColumns":
+        """Rows where mask is true"""
+        return PeriodColumns(*(column[mask] for column in self))
+
+
+def load_period_columns(
+    db: Session,
+    year: int,
+    month: int,
+    user_ids: Optional[Sequence[int]] = None
+) -> PeriodColumns:
+    """Load a period's approved events as columns with a single query"""
+
+    statement = select(
+        Event.user_id, Event.rule_id, Event.final_score, Event.original_score, Event.adjusted_score
+    ).where(
+        and_(
+            Event.period_year == year,
+            Event.period_month == month,
+            Event.status == EventStatus.APPROVED
+        )
+    )
+    if user_ids is not None:
+        statement = statement.where(Event.user_id.in_(user_ids))
+    statement = statement.order_by(Event.user_id, Event.id)
+
+    rows = db.exec(statement).all()
+    return columns_from_rows(rows)
+
+
+def columns_from_rows(rows: Sequence[Sequence[Any]]) -> PeriodColumns:
+    """Build PeriodColumns from (user_id, rule_id, final, original, adjusted) rows"""
+    if not rows:
+        empty_int = np.empty(0, dtype=np.int64)
+        empty_float = np.empty(0, dtype=np.float64)
+        return PeriodColumns(empty_int, empty_int, empty_float, empty_float, empty_float)
+
+    user_ids, rule_ids, final_scores, original_scores, adjusted_scores = zip(*rows)
+    return PeriodColumns(
+        np.array(user_ids, dtype=np.int64),
+        np.array(rule_ids, dtype=np.int64),
+        np.array(final_scores, dtype=np.float64),
+        np.array(original_scores, dtype=np.float64),
+        np.array(adjusted_scores, dtype=np.float64)  # None becomes NaN
+    )
+
+
+class PeriodColumnsCache:
+    """Short-lived in-process cache of whole-period event columns
+    
+    Used by read-only consumers (simulations) that evaluate the same period
+    repeatedly. Entries expire after CACHE_TTL seconds and are dropped when
+    a transaction that ran `ScoringEngine.apply_event_change` for the period
+    commits.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.CACHE_TTL if ttl is None else ttl
+        self._entries: Dict[Tuple[int, int], Tuple[float, PeriodColumns]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, year: int, month: int) -> PeriodColumns:
+        """Columns for every approved event of the period"""
+        entry = self._entries.get((year, month))
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        columns = load_period_columns(db, year, month)
+        with self._lock:
+            self._entries[(year, month)] = (time.monotonic(), columns)
+        return columns
+
+    def invalidate(self, year: Optional[int] = None, month: Optional[int] = None) -> None:
+        """Drop one period, or everything when no period is given"""
+        with self._lock:
+            if year is None:
+                self._entries.clear()
+            else:
+                self._entries.pop((year, month), None)
+
+
+    def invalidate_on_commit(self, session: Session, year: int, month: int) -> None:
+        """Drop a period once `session` commits"""
+        session.info.setdefault(_STALE_KEY, set()).add((year, month))
+
+
+_STALE_KEY = "period_columns_stale"
+
+period_columns_cache = PeriodColumnsCache()
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_after_commit(session: OrmSession) -> None:
+    for year, month in session.info.pop(_STALE_KEY, ()):
+        period_columns_cache.invalidate(year, month)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_after_rollback(session: OrmSession) -> None:
+    session.info.pop(_STALE_KEY, None)
+
+
+def competition_ranks(totals: np.ndarray, groups: Optional[np.ndarray] = None) -> np.ndarray:
+    """RANK() of each total in descending order, optionally within groups
+    
+    Ties share a rank, matching the stored rank_company/rank_department.
+    """
+    ranks = np.zeros(len(totals), dtype=np.int64)
+    if groups is None:
+        groups = np.zeros(len(totals), dtype=np.int64)
+
+    for group in np.unique(groups):
+        members = np.flatnonzero(groups == group)
+        descending = np.sort(-totals[members])
+        ranks[members] = np.searchsorted(descending, -totals[members], side="left") + 1
+    return ranks
+
+
+def evaluate_period(
+    plan: ScoringPlan,
+    columns: PeriodColumns,
+    rule_ids_for_user: Callable[[int], Collection[int]],
+    user_ids: Sequence[int] = ()
+) -> Dict[int, Dict[str, Any]]:
+    """Vectorized equivalent of `ScoringPlan.evaluate`"""
+
+    # Users: rows are grouped by user; include requested users without events
+    all_user_ids = np.union1d(columns.user_ids, np.asarray(user_ids, dtype=np.int64))
+    n_users = len(all_user_ids)
+    user_index = np.searchsorted(all_user_ids, columns.user_ids)
+
+    rule_count = len(plan.rule_ids)
+    plan_rule_ids = np.asarray(plan.rule_ids, dtype=np.int64)
+    caps = np.asarray(plan.caps, dtype=np.float64)
+    floors = np.asarray(plan.floors, dtype=np.float64)
+    ceilings = np.asarray(plan.ceilings, dtype=np.float64)
+    weights = np.asarray(plan.weights, dtype=np.float64)
+
+    # Rule position in the plan (-1 when the rule is not active this period)
+    rule_pos = np.searchsorted(plan_rule_ids, columns.rule_ids)
+    known = rule_pos < rule_count
+    known[known] = plan_rule_ids[rule_pos[known]] == columns.rule_ids[known]
+    rule_pos = np.where(known, rule_pos, -1)
+
+    # Applicability matrix users x rules, built once per distinct rule set
+    applicable = np.zeros((n_users, max(rule_count, 1)), dtype=bool)
+    masks_by_rule_set: Dict[int, Tuple[Collection[int], np.ndarray]] = {}
+    for row, user_id in enumerate(all_user_ids.tolist()):
+        rule_ids = rule_ids_for_user(user_id)
+        cached = masks_by_rule_set.get(id(rule_ids))
+        if cached is None:
+            mask = np.isin(plan_rule_ids, np.fromiter(rule_ids, dtype=np.int64, count=len(rule_ids)))
+            # Keep the rule set referenced so its id cannot be reused
+            cached = masks_by_rule_set[id(rule_ids)] = (rule_ids, mask)
+        applicable[row, :rule_count] = cached[1]
+
+    valid = known.copy()
+    valid[known] = applicable[user_index[known], rule_pos[known]]
+
+    v_user = user_index[valid]
+    v_pos = rule_pos[valid]
+    values = np.clip(columns.final_scores[valid], floors[v_pos], ceilings[v_pos])
+
+    # Per-user event counts (every approved event, applicable or not)
+    total_events = np.bincount(user_index, minlength=n_users)
+
+    # Positive/negative splits
+    positive = values > 0
+    positive_score = np.bincount(v_user[positive], weights=values[positive], minlength=n_users)
+    positive_events = np.bincount(v_user[positive], minlength=n_users)
+    negative_score = np.bincount(v_user[~positive], weights=values[~positive], minlength=n_users)
+    negative_events = np.bincount(v_user[~positive], minlength=n_users)
+
+    # Adjustment totals
+    adjusted = columns.adjusted_scores[valid]
+    original = columns.original_scores[valid]
+    is_adjusted = ~np.isnan(adjusted) & (adjusted != original)
+    adjusted_total = np.bincount(
+        v_user[is_adjusted], weights=adjusted[is_adjusted] - original[is_adjusted], minlength=n_users
+    )
+
+    # Per (user, rule) raw totals, counts, caps and weights
+    group = v_user * max(rule_count, 1) + v_pos
+    group_keys, first_seen, group_index = np.unique(group, return_index=True, return_inverse=True)
+    raw_totals = np.bincount(group_index, weights=values, minlength=len(group_keys))
+    group_counts = np.bincount(group_index, minlength=len(group_keys))
+    group_user = group_keys // max(rule_count, 1)
+    group_pos = group_keys % max(rule_count, 1)
+    group_caps = caps[group_pos]
+    cap_applied = np.abs(raw_totals) > group_caps
+    capped = np.where(cap_applied, np.where(raw_totals > 0, group_caps, -group_caps), raw_totals)
+    weighted = capped * weights[group_pos]
+
+    # Assemble breakdowns in first-seen rule order per user
+    order = np.lexsort((first_seen, group_user))
+    breakdowns: List[Dict[int, Dict[str, Any]]] = [{} for _ in range(n_users)]
+    totals = [0.0] * n_users
+    for user_row, pos, raw_total, count, applied, rule_total in zip(
+        group_user[order].tolist(), group_pos[order].tolist(), raw_totals[order].tolist(),
+        group_counts[order].tolist(), cap_applied[order].tolist(), weighted[order].tolist()
+    ):
+        totals[user_row] += rule_total
+        breakdowns[user_row][plan.rule_ids[pos]] = {
+            "rule_name": plan.names[pos],
+            "events": count,
+            "total_score": rule_total,
+            "cap_applied": applied,
+            "original_total": raw_total
+        }
+
+    results: Dict[int, Dict[str, Any]] = {}
+    for row, user_id in enumerate(all_user_ids.tolist()):
+        adjusted_score = float(adjusted_total[row])
+        events = int(total_events[row])
+        results[user_id] = {
+            "total_score": round(totals[row], 2),
+            "positive_score": round(float(positive_score[row]), 2),
+            "negative_score": round(float(negative_score[row]), 2),
+            "adjusted_score": round(adjusted_score, 2),
+            "total_events": events,
+            "positive_events": int(positive_events[row]),
+            "negative_events": int(negative_events[row]),
+            "pending_events": 0,  # Only counting approved events
+            "rule_breakdown": breakdowns[row],
+            "events_computed_count": events,
+            "computation_version": COMPUTATION_VERSION,
+            "has_adjustments": adjusted_score != 0
+        }
+
+    return results
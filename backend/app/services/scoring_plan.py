@@ -0,0 +1,179 @@
+"""
+Scoring plan - Rule packs compiled into flat per-rule arrays
+
+A `ScoringPlan` is compiled once per period from the active rules and their
+rule packs, then reused for every employee:
+
+- floors / ceilings: Rule.min_score / Rule.max_score, clamp each event score
+- caps: Rule.caps, monthly cap on the absolute rule total per user
+- weights: RulePack.weight_config["category_weights"][Rule.category],
+  multiplier applied to the capped rule total (default 1.0)
+
+`evaluate` applies the plan to a whole period's events in one pass.
+"""
+
+import math
+from typing import Any, Callable, Collection, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+COMPUTATION_VERSION = "1.1"
+
+# (user_id, rule_id, final_score, original_score, adjusted_score)
+EventRow = Tuple[int, int, float, float, Optional[float]]
+
+
+def event_row(event) -> EventRow:
+    """Project an Event (or event_contribution dict) onto the plan's row layout"""
+    if isinstance(event, dict):
+        return (
+            event["user_id"], event["rule_id"], event["final_score"],
+            event["original_score"], event["adjusted_score"]
+        )
+    return (event.user_id, event.rule_id, event.final_score, event.original_score, event.adjusted_score)
+
+
+class ScoringPlan:
+    """Flat, immutable scoring arrays for one period"""
+
+    def __init__(self, rules: Mapping[int, Any], packs: Mapping[int, Any]):
+        rule_list = sorted(rules.values(), key=lambda rule: rule.id)
+
+        self.rule_ids: Tuple[int, ...] = tuple(rule.id for rule in rule_list)
+        self.index: Dict[int, int] = {rule_id: pos for pos, rule_id in enumerate(self.rule_ids)}
+        self.names: Tuple[str, ...] = tuple(rule.name for rule in rule_list)
+        self.caps: Tuple[float, ...] = tuple(rule.caps if rule.caps else math.inf for rule in rule_list)
+        self.floors: Tuple[float, ...] = tuple(
+            rule.min_score if rule.min_score is not None else -math.inf for rule in rule_list
+        )
+        self.ceilings: Tuple[float, ...] = tuple(
+            rule.max_score if rule.max_score is not None else math.inf for rule in rule_list
+        )
+        self.weights: Tuple[float, ...] = tuple(
+            self._category_weight(packs.get(rule.rule_pack_id), rule.category) for rule in rule_list
+        )
+
+    @staticmethod
+    def _category_weight(pack: Any, category: Optional[str]) -> float:
+        weight_config = getattr(pack, "weight_config", None) or {}
+        category_weights = weight_config.get("category_weights") or {}
+        return float(category_weights.get(category, 1.0)) if category else 1.0
+
+    def clamp(self, rule_id: int, score: float) -> float:
+        """Clamp a single event score to the rule's [min_score, max_score]"""
+        pos = self.index[rule_id]
+        return min(max(score, self.floors[pos]), self.ceilings[pos])
+
+    def rule_total(self, rule_id: int, original_total: float) -> Tuple[float, bool]:
+        """Apply cap and category weight to a rule's raw total"""
+        pos = self.index[rule_id]
+        rule_total = original_total
+        cap_applied = False
+        if abs(rule_total) > self.caps[pos]:
+            rule_total = self.caps[pos] if rule_total > 0 else -self.caps[pos]
+            cap_applied = True
+        return rule_total * self.weights[pos], cap_applied
+
+    def evaluate(
+        self,
+        rows: Iterable[EventRow],
+        rule_ids_for_user: Callable[[int], Collection[int]],
+        user_ids: Sequence[int] = ()
+    ) -> Dict[int, Dict[str, Any]]:
+        """Score every user in one pass over the period's approved events
+
+        `rule_ids_for_user` returns the rule ids applicable to a user (see
+        RuleScopeIndex). Users listed in `user_ids` get a result even without
+        events.
+        """
+
+        states: Dict[int, Dict[str, Any]] = {}
+        applicable: Dict[int, Collection[int]] = {}
+
+        def new_state():
+            return {
+                "events": 0,
+                "positive": [0.0, 0],
+                "negative": [0.0, 0],
+                "adjusted": 0.0,
+                "rules": {}  # rule_id -> [raw total, event count], in first-seen order
+            }
+
+        for user_id in user_ids:
+            states[user_id] = new_state()
+
+        for user_id, rule_id, final_score, original_score, adjusted_score in rows:
+            state = states.get(user_id)
+            if state is None:
+                state = states[user_id] = new_state()
+            state["events"] += 1
+
+            rule_ids = applicable.get(user_id)
+            if rule_ids is None:
+                rule_ids = applicable[user_id] = rule_ids_for_user(user_id)
+            if rule_id not in rule_ids or rule_id not in self.index:
+                continue
+
+            value = self.clamp(rule_id, final_score)
+            rule_state = state["rules"].get(rule_id)
+            if rule_state is None:
+                rule_state = state["rules"][rule_id] = [0.0, 0]
+            rule_state[0] += value
+            rule_state[1] += 1
+
+            bucket = state["positive"] if value > 0 else state["negative"]
+            bucket[0] += value
+            bucket[1] += 1
+
+            # Track adjustments
+            if adjusted_score is not None and adjusted_score != original_score:
+                state["adjusted"] += (adjusted_score or 0) - original_score
+
+        return {user_id: self._finalize(state) for user_id, state in states.items()}
+
+    def evaluate_user(self, rows: Iterable[EventRow], rule_ids: Collection[int]) -> Dict[str, Any]:
+        """Score a single user's events"""
+        results = self.evaluate(rows, lambda user_id: rule_ids)
+        if not results:
+            return self._finalize(None)
+        return next(iter(results.values()))
+
+    def _finalize(self, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Turn per-user accumulators into Score fields"""
+
+        total_score = 0.0
+        rule_breakdown: Dict[int, Dict[str, Any]] = {}
+
+        for rule_id, (original_rule_total, count) in (state["rules"].items() if state else ()):
+            rule_total, cap_applied = self.rule_total(rule_id, original_rule_total)
+            total_score += rule_total
+            rule_breakdown[rule_id] = {
+                "rule_name": self.names[self.index[rule_id]],
+                "events": count,
+                "total_score": rule_total,
+                "cap_applied": cap_applied,
+                "original_total": original_rule_total
+            }
+
+        total_events = state["events"] if state else 0
+        positive_score, positive_events = state["positive"] if state else (0.0, 0)
+        negative_score, negative_events = state["negative"] if state else (0.0, 0)
+        adjusted_score = state["adjusted"] if state else 0.0
+
+        return {
+            "total_score": round(total_score, 2),
+            "positive_score": round(positive_score, 2),
+            "negative_score": round(negative_score, 2),
+            "adjusted_score": round(adjusted_score, 2),
+            "total_events": total_events,
+            "positive_events": positive_events,
+            "negative_events": negative_events,
+            "pending_events": 0,  # Only counting approved events
+            "rule_breakdown": rule_breakdown,
+            "events_computed_count": total_events,
+            "computation_version": COMPUTATION_VERSION,
+            "has_adjustments": adjusted_score != 0
+        }
+
+
+def compile_scoring_plan(rules: Mapping[int, Any], packs: Mapping[int, Any]) -> ScoringPlan:
+    """Compile the active rules of a period (and their packs) into a ScoringPlan"""
+    return ScoringPlan(rules, packs)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scoring engine against a synthetic large organization
+
+Generates departments, users, one company rule pack and events (90% approved) with
+bulk inserts, then times the scoring operations and reports wall time, SQL
+statement count and peak Python memory for each as JSON.
+
+    python scripts/benchmark_scoring.py --users 10000 --departments 200 --events 2000000
+    python scripts/benchmark_scoring.py --skip-generate --operations company_scores rankings
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import event as sa_event, func, insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.config import settings
+from app.models import (
+    Department, Event, EventSource, EventStatus, Rule, RuleDirection, RulePack,
+    RulePackScope, RulePackStatus, User, UserRole, UserStatus
+)
+from app.services.scoring import ScoringEngine
+
+OPERATIONS = (
+    "company_scores",
+    "company_scores_unchanged",
+    "user_score",
+    "recalculate_period",
+    "rankings"
+)
+
+# Set from --no-memory in main()
+TRACE_MEMORY = True
+
+DEFAULT_DATABASE_URL = f"sqlite:///{Path(tempfile.gettempdir()) / 'hr_scoring_benchmark.db'}"
+
+
+def log(message: str) -> None:
+    # Progress goes to stderr so stdout stays valid JSON
+    print(message, file=sys.stderr)
+
+
+def chunked(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_insert(engine, table, rows: Iterable[Dict[str, Any]], chunk_size: int) -> int:
+    """executemany INSERT in chunks, one transaction per chunk"""
+    count = 0
+    for chunk in chunked(rows, chunk_size):
+        with engine.begin() as conn:
+            conn.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def benchmark_months(year: int, month: int, months: int) -> List[tuple]:
+    """The `months` months ending with (year, month), oldest first"""
+    result = []
+    for offset in range(months - 1, -1, -1):
+        index = year * 12 + (month - 1) - offset
+        result.append((index // 12, index % 12 + 1))
+    return result
+
+
+def generate_organization(engine, args: argparse.Namespace) -> Dict[str, Any]:
+    """Populate an empty database with a synthetic organization"""
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        if db.exec(select(func.count()).select_from(User)).one():
+            raise SystemExit(
+                "Database already contains users; use --skip-generate to benchmark it as is"
+            )
+
+    log(f"🏢 Creating {args.departments} departments...")
+    bulk_insert(engine, Department.__table__, (
+        {
+            "name": f"部門 {index:04d}",
+            "code": f"D{index:05d}",
+            "level": 0,
+            "is_active": True,
+            "created_at": now
+        }
+        for index in range(1, args.departments + 1)
+    ), args.chunk_size)
+
+    with Session(engine) as db:
+        department_ids = db.exec(select(Department.id).order_by(Department.id)).all()
+
+    log(f"👥 Creating {args.users} users...")
+    bulk_insert(engine, User.__table__, (
+        {
+            "ldap_uid": f"bench{index:07d}",
+            "username": f"bench{index:07d}",
+            "email": f"bench{index:07d}@example.com",
+            "name": f"員工 {index:07d}",
+            "department_id": department_ids[index % len(department_ids)],
+            "status": UserStatus.ACTIVE,
+            "role": UserRole.MANAGER if index % 25 == 0 else UserRole.EMPLOYEE,
+            "created_at": now
+        }
+        for index in range(args.users)
+    ), args.chunk_size)
+
+    with Session(engine) as db:
+        users = db.exec(select(User.id, User.department_id).order_by(User.id)).all()
+
+    log(f"📋 Creating rule pack with {args.rules} rules...")
+    months = benchmark_months(args.year, args.month, args.months)
+    with engine.begin() as conn:
+        conn.execute(insert(RulePack.__table__), [{
+            "name": "Benchmark rules",
+            "version": "1.0.0",
+            "scope": RulePackScope.COMPANY,
+            "status": RulePackStatus.ACTIVE,
+            "effective_from": date(months[0][0], months[0][1], 1),
+            "created_by": users[0].id,
+            "created_at": now
+        }])
+    with Session(engine) as db:
+        rule_pack_id = db.exec(select(RulePack.id)).one()
+
+    rules = []
+    for index in range(args.rules):
+        negative = index % 4 == 3
+        base_score = float(rng.randint(1, 10)) * (-1 if negative else 1)
+        rules.append({
+            "rule_pack_id": rule_pack_id,
+            "code": f"R{index:03d}",
+            "name": f"規則 {index:03d}",
+            "direction": RuleDirection.NEGATIVE if negative else RuleDirection.POSITIVE,
+            "base_score": base_score,
+            "weight": rng.choice([1.0, 1.0, 0.8, 0.5]),
+            "caps": abs(base_score) * rng.randint(3, 8) if index % 3 == 0 else None,
+            "min_score": -20.0 if negative else None,
+            "max_score": None if negative else 20.0,
+            "active": True,
+            "sort_order": index,
+            "created_at": now
+        })
+    bulk_insert(engine, Rule.__table__, rules, args.chunk_size)
+
+    with Session(engine) as db:
+        rule_rows = db.exec(select(Rule.id, Rule.base_score).order_by(Rule.id)).all()
+
+    log(f"🎪 Creating {args.events} events over {len(months)} month(s)...")
+
+    def events() -> Iterator[Dict[str, Any]]:
+        for index in range(args.events):
+            user_id, department_id = users[rng.randrange(len(users))]
+            rule_id, base_score = rule_rows[rng.randrange(len(rule_rows))]
+            year, month = months[index % len(months)]
+            adjusted = round(base_score * rng.uniform(0.5, 1.5), 1) if rng.random() < 0.05 else None
+            yield {
+                "user_id": user_id,
+                "reporter_id": users[rng.randrange(len(users))].id,
+                "department_id": department_id,
+                "rule_id": rule_id,
+                "original_score": base_score,
+                "adjusted_score": adjusted,
+                "final_score": base_score if adjusted is None else adjusted,
+                "occurred_at": date(year, month, rng.randint(1, 28)),
+                "description": "benchmark",
+                "evidence_count": 0,
+                "source": EventSource.MANUAL,
+                "status": EventStatus.APPROVED if rng.random() < 0.9 else EventStatus.PENDING,
+                "is_locked": False,
+                "period_year": year,
+                "period_month": month,
+                "period_quarter": (month - 1) // 3 + 1,
+                "created_at": now
+            }
+
+    bulk_insert(engine, Event.__table__, events(), args.chunk_size)
+
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "departments": len(department_ids),
+        "users": len(users),
+        "rules": len(rule_rows),
+        "events": args.events,
+        "months": [f"{year}-{month:02d}" for year, month in months]
+    }
+
+
+@contextmanager
+def measure(engine, name: str, results: List[Dict[str, Any]], **details: Any) -> Iterator[Dict[str, Any]]:
+    """Record wall time, statement count and peak traced memory of the block
+
+    tracemalloc slows Python-heavy code several times over; run with
+    --no-memory for representative wall times.
+    """
+
+    # executemany counts once, as it is one round of the DBAPI
+    counter = {"queries": 0}
+
+    def count_query(*_):
+        counter["queries"] += 1
+
+    sa_event.listen(engine, "before_cursor_execute", count_query)
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"operation": name, **details}
+    try:
+        yield result
+    finally:
+        seconds = time.perf_counter() - started
+        peak = None
+        if TRACE_MEMORY:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        sa_event.remove(engine, "before_cursor_execute", count_query)
+
+        result.update({
+            "seconds": round(seconds, 3),
+            "queries": counter["queries"],
+            "peak_memory_mb": None if peak is None else round(peak / (1024 * 1024), 2)
+        })
+        results.append(result)
+        memory = "" if peak is None else f", {result['peak_memory_mb']} MB"
+        log(f"⏱️  {name}: {result['seconds']}s, {result['queries']} queries{memory}")
+
+
+async def run_benchmarks(engine, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Time each selected scoring operation on the target period"""
+
+    results: List[Dict[str, Any]] = []
+    year, month = args.year, args.month
+    rng = random.Random(args.seed)
+
+    with Session(engine) as db:
+        user_ids = db.exec(select(User.id).where(User.status == UserStatus.ACTIVE)).all()
+        department_id = db.exec(
+            select(User.department_id)
+            .where(User.department_id.is_not(None))
+            .group_by(User.department_id)
+            .order_by(func.count().desc())
+        ).first()
+
+    if "company_scores" in args.operations:
+        with Session(engine) as db, measure(engine, "calculate_company_scores", results, users=len(user_ids)) as result:
+            result["scores"] = len(await ScoringEngine(db).calculate_company_scores(year, month, recalculate=True))
+
+    if "company_scores_unchanged" in args.operations:
+        # Same inputs again: exercises content-hash change detection in the writer
+        with Session(engine) as db, measure(engine, "calculate_company_scores (unchanged)", results, users=len(user_ids)) as result:
+            result["scores"] = len(await ScoringEngine(db).calculate_company_scores(year, month, recalculate=True))
+
+    if "user_score" in args.operations and user_ids:
+        sample = rng.sample(list(user_ids), min(args.user_samples, len(user_ids)))
+        with Session(engine) as db, measure(engine, "calculate_user_score", results, calls=len(sample)) as result:
+            engine_ = ScoringEngine(db)
+            for user_id in sample:
+                await engine_.calculate_user_score(user_id, year, month, recalculate=True)
+        result["seconds_per_call"] = round(result["seconds"] / len(sample), 4)
+        result["queries_per_call"] = round(result["queries"] / len(sample), 2)
+
+    if "recalculate_period" in args.operations:
+        workers = settings.SCORING_WORKERS if args.workers is None else args.workers
+        with Session(engine) as db, measure(engine, "recalculate_period", results, workers=workers) as result:
+            summary = await ScoringEngine(db).recalculate_period(year, month, workers=workers)
+            result.update(successful=summary["successful"], failed=summary["failed"])
+        # Worker processes use their own engines; only the coordinator's statements are counted
+        result["queries_counted_in_workers"] = workers <= 1
+
+    if "rankings" in args.operations:
+        with Session(engine) as db, measure(engine, "_calculate_company_rankings", results):
+            await ScoringEngine(db)._calculate_company_rankings(year, month)
+
+        if department_id is not None:
+            with Session(engine) as db, measure(engine, "_calculate_department_rankings", results, department_id=department_id):
+                await ScoringEngine(db)._calculate_department_rankings(department_id, year, month)
+
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    today = date.today()
+    parser = argparse.ArgumentParser(description="Benchmark the scoring engine on a synthetic organization")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL,
+                        help="SQLite or MySQL URL (default: a file in the temp directory)")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--departments", type=int, default=200)
+    parser.add_argument("--events", type=int, default=2000000)
+    parser.add_argument("--rules", type=int, default=40)
+    parser.add_argument("--months", type=int, default=2,
+                        help="Spread events over this many months ending with the benchmarked one")
+    parser.add_argument("--year", type=int, default=today.year)
+    parser.add_argument("--month", type=int, default=today.month)
+    parser.add_argument("--user-samples", type=int, default=50,
+                        help="Number of calculate_user_score calls to time")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Workers for recalculate_period (default: SCORING_WORKERS)")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-generate", action="store_true",
+                        help="Benchmark the existing data instead of generating it")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc peak memory tracking (it inflates wall times)")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
+    """Generate data, run benchmarks and emit the JSON report"""
+    global TRACE_MEMORY
+
+    args = parse_args(argv)
+    TRACE_MEMORY = not args.no_memory
+    engine = create_engine(args.database_url)
+
+    report: Dict[str, Any] = {
+        "database": engine.dialect.name,
+        "period": f"{args.year}-{args.month:02d}",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "memory_traced": TRACE_MEMORY,
+        "generation": None
+    }
+
+    if not args.skip_generate:
+        log("🚀 Generating synthetic organization...")
+        report["generation"] = generate_organization(engine, args)
+        log(f"✅ Generated in {report['generation']['seconds']}s")
+
+    log("📊 Running benchmarks...")
+    report["results"] = await run_benchmarks(engine, args)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        log(f"💾 Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
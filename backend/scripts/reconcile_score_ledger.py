@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Reconcile the score ledger with approved events
+
+Seeds the ledger for events that predate it (run once after upgrading past
+migration 004) and repairs drift from writes that bypassed the scoring
+engine. Safe to re-run: months already in line are left untouched.
+
+    python scripts/reconcile_score_ledger.py
+    python scripts/reconcile_score_ledger.py --period 2024-01
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Add parent directory to path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlmodel import Session, create_engine
+
+from app.core.config import settings
+from app.services.score_ledger import ScoreLedger
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reconcile the score ledger with approved events")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--period", help="Only this month (YYYY-MM); default: every month")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    engine = create_engine(args.database_url)
+
+    with Session(engine) as session:
+        ledger = ScoreLedger(session)
+        if args.period:
+            year, month = map(int, args.period.split("-"))
+            result = {"months": 1, **ledger.reconcile(year, month)}
+        else:
+            result = ledger.reconcile_all()
+
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,18 @@ Pytest configuration and fixtures for testing
 
 import pytest
 import asyncio
-from typing import Generator
+from datetime import date
+from typing import Generator, Optional
 from fastapi.testclient import TestClient
-from sqlmodel import Session, create_engine, SQLModel
+from sqlmodel import Session, create_engine, SQLModel, select
 from sqlmodel.pool import StaticPool
 
 from app.main import app
 from app.core.database import get_db
+from app.services.auth import get_current_user
 from app.core.config import settings
-from app.models import *  # Import all models
+# Importing app.models registers every table with the metadata
+from app.models import Department, Event, EventSource, EventStatus, PeriodType, Rule, RulePack, Score, User
 
 # Test database URL - use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -37,6 +40,14 @@ def session_fixture():
     # Create tables
     SQLModel.metadata.create_all(engine)
     
+    # Each test starts from a fresh database, so drop cached rule snapshots, period ids and summaries
+    from app.services.rule_cache import rule_snapshot_cache
+    from app.services.period_registry import period_registry
+    from app.services.event_summary import event_summary_cache
+    rule_snapshot_cache.invalidate()
+    period_registry.clear()
+    event_summary_cache.invalidate()
+    
     with Session(engine) as session:
         yield session
     
@@ -51,7 +62,8 @@ def client_fixture(session: Session):
 
     app.dependency_overrides[get_db] = get_session_override
     
-    client = TestClient(app)
+    # localhost is in the default ALLOWED_HOSTS
+    client = TestClient(app, base_url="http://localhost")
     yield client
     
     app.dependency_overrides.clear()
@@ -184,6 +196,116 @@ def admin_auth_headers(client: TestClient, sample_admin_user):
     
     return {"Authorization": f"Bearer {token_data['access_token']}"}
 
+SCORE_FIELDS = [
+    "total_score", "positive_score", "negative_score", "adjusted_score",
+    "total_events", "positive_events", "negative_events", "events_computed_count",
+    "has_adjustments", "department_id"
+]
+
+def _make_event(user, rule, final_score, status=EventStatus.APPROVED, month=1, adjusted_score=None):
+    """Build an event for a user/rule in 2024"""
+    return Event(
+        user_id=user.id,
+        reporter_id=user.id,
+        department_id=user.department_id,
+        rule_id=rule.id,
+        original_score=rule.base_score,
+        adjusted_score=adjusted_score,
+        final_score=final_score,
+        occurred_at=date(2024, month, 10),
+        description="scoring test event",
+        status=status,
+        source=EventSource.MANUAL,
+        period_year=2024,
+        period_month=month,
+        period_quarter=(month - 1) // 3 + 1
+    )
+
+def _score_values(score):
+    """Comparable scalar values of a Score row"""
+    return tuple(getattr(score, field) for field in SCORE_FIELDS)
+
+@pytest.fixture
+def make_event():
+    """Build events for a user/rule in 2024 (not added to the session)"""
+    return _make_event
+
+@pytest.fixture
+def score_values():
+    """Comparable scalar values of a Score row"""
+    return _score_values
+
+@pytest.fixture
+def scoring_org(session: Session):
+    """Create two departments, a handful of users, capped rules and events"""
+    departments = [Department(name=f"部門{i}", code=f"D{i}") for i in range(2)]
+    session.add_all(departments)
+    session.commit()
+    
+    users = []
+    for i in range(6):
+        user = User(
+            ldap_uid=f"user{i}",
+            username=f"user{i}",
+            email=f"user{i}@example.com",
+            name=f"使用者{i}",
+            department_id=departments[i % 2].id,
+            role="admin" if i == 0 else "employee"
+        )
+        users.append(user)
+    session.add_all(users)
+    session.commit()
+    
+    rule_pack = RulePack(
+        name="測試規則包",
+        status="active",
+        scope="company",
+        effective_from=date(2024, 1, 1),
+        created_by=users[0].id
+    )
+    session.add(rule_pack)
+    session.commit()
+    
+    rules = [
+        Rule(rule_pack_id=rule_pack.id, code="BONUS", name="加分", base_score=5.0, caps=12.0, category="quality"),
+        Rule(rule_pack_id=rule_pack.id, code="PENALTY", name="扣分", base_score=-3.0, caps=5.0, category="quality"),
+        Rule(rule_pack_id=rule_pack.id, code="OPEN", name="不設上限", base_score=1.5, category="teamwork"),
+    ]
+    session.add_all(rules)
+    session.commit()
+    
+    events = []
+    for i, user in enumerate(users[1:], 1):
+        for _ in range(i):
+            events.append(_make_event(user, rules[0], 5.0))
+        events.append(_make_event(user, rules[1], -3.0))
+        events.append(_make_event(user, rules[1], -3.0, status=EventStatus.PENDING))
+        events.append(_make_event(user, rules[2], 1.5, adjusted_score=2.5 if i % 2 else None))
+    session.add_all(events)
+    session.commit()
+    
+    return {"departments": departments, "users": users, "rule_pack": rule_pack, "rules": rules}
+
+@pytest.fixture
+def snapshot_scores(session: Session):
+    """Return comparable monthly score values keyed by user id (from `session` unless given)"""
+    def snapshot(db: Optional[Session] = None):
+        scores = (db or session).exec(
+            select(Score).where(Score.period_type == PeriodType.MONTHLY).order_by(Score.user_id)
+        ).all()
+        return {
+            score.user_id: (_score_values(score), score.rule_breakdown, score.rank_company)
+            for score in scores
+        }
+    return snapshot
+
+@pytest.fixture
+def login_as(client: TestClient):
+    """Authenticate API requests as a given user without the login flow"""
+    def login(user):
+        app.dependency_overrides[get_current_user] = lambda: user
+    return login
+
 class TestHelpers:
     """Helper utilities for testing"""
     
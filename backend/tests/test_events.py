@@ -5,9 +5,12 @@ Test cases for event management API
 import pytest
 from datetime import date, datetime
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, select
 
+from app.core.config import settings
 from app.models import Event, EventStatus, EventSource
+from app.services.scoring import ScoringEngine
+
 
 class TestEventAPI:
     """Test event management endpoints"""
@@ -232,4 +235,631 @@ class TestEventAPI:
         helpers.assert_response_success(response)
         data = response.json()
         
-        assert "items" in data
\ No newline at end of file
+        assert "items" in data
+    
+    def test_bulk_create_events(self, client: TestClient, session: Session, scoring_org, login_as, monkeypatch):
+        """POST /events/bulk reports each item; validation and size limits fail the request"""
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        url = f"{settings.API_V1_STR}/events/bulk"
+        items = [
+            {"user_id": users[1].id, "rule_id": rules[0].id, "occurred_at": "2024-01-15", "description": "批次事件",
+             "source": "redmine", "external_id": "issue-1"},
+            {"user_id": users[2].id, "rule_id": 9999, "occurred_at": "2024-01-15", "description": "未知規則"},
+        ]
+        
+        login_as(users[0])
+        response = client.post(url, json={"events": items})
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["created"], data["failed"]) == (1, 1)
+        assert data["results"][1]["error"] == "規則不存在"
+        
+        # Retrying is a no-op; employees only create events for themselves
+        assert client.post(url, json={"events": items[:1]}).json()["unchanged"] == 1
+        login_as(users[2])
+        data = client.post(url, json={"events": items[:1]}).json()
+        assert data["results"][0]["error"] == "員工只能為自己建立事件"
+        
+        assert client.post(url, json={"events": []}).status_code == 422
+        monkeypatch.setattr(settings, "EVENT_BULK_MAX_ITEMS", 1)
+        assert client.post(url, json={"events": items}).status_code == 400
+    
+    def test_approve_events_batch(self, client: TestClient, session: Session, scoring_org, login_as, monkeypatch):
+        """POST /events/approve-batch is for managers and admins and reports skipped events"""
+        users = scoring_org["users"]
+        url = f"{settings.API_V1_STR}/events/approve-batch"
+        pending = [
+            event.id for event in session.exec(select(Event).where(Event.status == EventStatus.PENDING)).all()
+        ]
+        
+        login_as(users[1])
+        response = client.post(url, json={"event_ids": pending, "status": "approved"})
+        assert response.status_code == 403
+        
+        login_as(users[0])
+        assert client.post(url, json={"event_ids": pending, "status": "pending"}).status_code == 400
+        assert client.post(url, json={"event_ids": [], "status": "approved"}).status_code == 422
+        assert client.post(url, json={"event_ids": pending, "status": "unknown"}).status_code == 422
+        monkeypatch.setattr(settings, "EVENT_APPROVE_BATCH_MAX_ITEMS", 1)
+        assert client.post(url, json={"event_ids": pending, "status": "approved"}).status_code == 400
+        monkeypatch.undo()
+        
+        response = client.post(url, json={"event_ids": pending + [9999], "status": "approved", "review_notes": "批次核准"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["updated_ids"] == pending
+        assert data["skipped"] == [{"event_id": 9999, "reason": "事件不存在"}]
+    
+    def test_event_list_cursor_header(self, client: TestClient, session: Session, scoring_org, login_as):
+        """Full pages set X-Next-Cursor; following it walks the list without repeats"""
+        url = f"{settings.API_V1_STR}/events/"
+        login_as(scoring_org["users"][0])
+        everything = [event["id"] for event in client.get(url, params={"limit": 100}).json()]
+        
+        walked, params = [], {"limit": 4}
+        while True:
+            response = client.get(url, params=params)
+            assert response.status_code == 200
+            walked.extend(event["id"] for event in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            params = {"limit": 4, "cursor": cursor}
+        assert walked == everything
+        
+        assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get(url, params={"limit": 0}).status_code == 422
+    
+    def test_event_list_search_params(self, client: TestClient, session: Session, scoring_org, login_as, make_event):
+        """search ranks matches without a cursor; rank_by_relevance=false pages them with one"""
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        url = f"{settings.API_V1_STR}/events/"
+        for description in ("協助同事完成專案", "協助客戶排除問題，並協助新人上手"):
+            event = make_event(users[1], rules[0], 5.0)
+            event.description = description
+            session.add(event)
+        session.commit()
+        
+        login_as(users[0])
+        response = client.get(url, params={"search": "協助", "limit": 1})
+        assert [event["description"] for event in response.json()] == ["協助客戶排除問題，並協助新人上手"]
+        assert "X-Next-Cursor" not in response.headers
+        
+        response = client.get(url, params={"search": "協助", "rank_by_relevance": "false", "limit": 1})
+        assert response.headers["X-Next-Cursor"]
+        
+        # Employees only find their own events
+        login_as(users[2])
+        assert client.get(url, params={"search": "協助"}).json() == []
+        assert client.get(url, params={"search": "協助", "rank_by_relevance": "maybe"}).status_code == 422
+
+
+class TestEventService:
+    """Test event service operations"""
+    
+    @pytest.mark.asyncio
+    async def test_bulk_event_creation_prefetches_and_reports_per_item(self, session: Session, scoring_org, snapshot_scores):
+        """Bulk creation validates with prefetched lookups, inserts once and scores incrementally"""
+        from sqlalchemy import event as sa_event
+        from app.models import AuditLog, EventCreate
+        from app.services.event import EventService
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        items = [
+            EventCreate(user_id=users[1 + i % 5].id, rule_id=rules[i % 3].id,
+                        occurred_at=date(2024, 1, 1 + i), description=f"批次事件 {i}")
+            for i in range(20)
+        ]
+        items[3] = EventCreate(user_id=9999, rule_id=rules[0].id, occurred_at=date(2024, 1, 5), description="無此人")
+        items[7] = EventCreate(user_id=users[1].id, rule_id=9999, occurred_at=date(2024, 1, 5), description="無此規則")
+        
+        statements, commits = [], []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(" ".join(statement.split()))
+        
+        def record_commit(session):
+            commits.append(session)
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        sa_event.listen(session, "after_commit", record_commit)
+        result = await EventService(session).create_events_bulk(items, users[0])
+        sa_event.remove(session, "after_commit", record_commit)
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        
+        assert (result["total"], result["created"], result["failed"]) == (20, 18, 2)
+        assert [r["index"] for r in result["results"] if not r["success"]] == [3, 7]
+        assert result["results"][3]["error"] == "目標使用者不存在"
+        assert result["results"][7]["error"] == "規則不存在"
+        assert all(r["status"] == EventStatus.APPROVED for r in result["results"] if r["success"])
+        
+        # One user lookup and one audit insert; commits do not grow with the batch
+        assert sum("FROM users WHERE users.id IN" in s for s in statements) == 1
+        assert sum(s.startswith("INSERT INTO audit_logs") for s in statements) == 1
+        assert len(commits) < 10
+        assert len(session.exec(select(AuditLog)).all()) == 18
+        
+        incremental = snapshot_scores()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        recalculated = snapshot_scores()
+        for user_id, (values, breakdown, _) in recalculated.items():
+            assert incremental[user_id][0] == values
+            assert incremental[user_id][1] == breakdown
+    
+    @pytest.mark.asyncio
+    async def test_event_write_and_score_change_commit_together(self, session: Session, scoring_org, monkeypatch, snapshot_scores):
+        """A failed score update rolls the event write back with it; a successful one commits once"""
+        from sqlalchemy import event as sa_event
+        from app.models import AuditLog, EventCreate, EventUpdate, ScoreLedgerEntry
+        from app.services.event import EventService
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        service = EventService(session)
+        before = snapshot_scores()
+        counts = lambda: tuple(len(session.exec(select(model)).all()) for model in (Event, AuditLog, ScoreLedgerEntry))
+        initial = counts()
+        
+        def failing_delta(self, *args, **kwargs):
+            raise RuntimeError("score update failed")
+        
+        with monkeypatch.context() as patch:
+            patch.setattr(ScoringEngine, "_apply_event_delta", failing_delta)
+            with pytest.raises(RuntimeError):
+                await service.create_event(
+                    EventCreate(user_id=users[1].id, rule_id=rules[2].id, occurred_at=date(2024, 1, 3), description="回滾"), users[0]
+                )
+            event = session.exec(select(Event).where(Event.user_id == users[2].id, Event.status == EventStatus.APPROVED)).first()
+            with pytest.raises(RuntimeError):
+                await service.update_event(event, EventUpdate(adjusted_score=-9.0, adjustment_reason="test"), users[0])
+        
+        assert counts() == initial
+        session.refresh(event)
+        assert event.adjusted_score != -9.0
+        assert snapshot_scores() == before
+        
+        commits = []
+        record_commit = lambda session: commits.append(session)
+        sa_event.listen(session, "after_commit", record_commit)
+        await service.update_event(event, EventUpdate(adjusted_score=-9.0, adjustment_reason="test"), users[0])
+        sa_event.remove(session, "after_commit", record_commit)
+        assert len(commits) == 1
+        session.rollback()
+        assert session.get(Event, event.id).adjusted_score == -9.0
+        assert snapshot_scores()[users[2].id] != before[users[2].id]
+    
+    @pytest.mark.asyncio
+    async def test_external_events_are_upserted_on_retry(self, session: Session, scoring_org, monkeypatch, make_event, snapshot_scores):
+        """Retried (source, external_id) payloads update in place or are no-ops, never duplicates"""
+        from fastapi import HTTPException
+        from sqlalchemy import event as sa_event
+        from sqlalchemy.exc import IntegrityError
+        from app.models import EventCreate
+        from app.services.event import EventService
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        service = EventService(session)
+        
+        def payload(i, **overrides):
+            data = dict(
+                user_id=users[1 + i % 5].id, rule_id=rules[0].id, occurred_at=date(2024, 1, 3),
+                description=f"Redmine #{i}", source=EventSource.REDMINE, external_id=f"issue-{i}"
+            )
+            data.update(overrides)
+            return EventCreate(**data)
+        
+        first = await service.create_events_bulk([payload(i) for i in range(4)] + [payload(0)], users[0])
+        assert [r["action"] for r in first["results"]] == ["created"] * 4 + ["unchanged"]
+        assert first["results"][4]["event_id"] == first["results"][0]["event_id"]
+        event_count = len(session.exec(select(Event)).all())
+        
+        # A retried batch: one lookup for all items, no new rows
+        statements = []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(" ".join(statement.split()))
+        
+        retry = [payload(i) for i in range(4)]
+        retry[2] = payload(2, rule_id=rules[2].id, description="Redmine #2 (edited)")
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        second = await service.create_events_bulk(retry, users[0])
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        
+        # Events created by an admin are approved: a changed payload is rejected
+        assert (second["created"], second["updated"], second["unchanged"], second["failed"]) == (0, 0, 3, 1)
+        assert second["results"][2]["error"] == "事件已審核，無法由外部來源修改"
+        assert sum("FROM events WHERE events.external_id IN" in s for s in statements) == 1
+        assert len(session.exec(select(Event)).all()) == event_count
+        
+        approved = session.get(Event, first["results"][2]["event_id"])
+        assert (approved.rule_id, approved.description, approved.final_score) == (rules[0].id, "Redmine #2", 5.0)
+        
+        with pytest.raises(HTTPException) as error:
+            await service.create_event(payload(3, description="Redmine #3 (v2)"), users[0])
+        assert error.value.status_code == 409
+        
+        # Pending events take the retried payload
+        reporter = users[1]
+        created = await service.create_events_bulk([payload(10, user_id=reporter.id)], reporter)
+        event_count += 1
+        edited = await service.create_events_bulk(
+            [payload(10, user_id=reporter.id, rule_id=rules[2].id, description="Redmine #10 (edited)")], reporter
+        )
+        assert (edited["updated"], edited["results"][0]["event_id"]) == (1, created["results"][0]["event_id"])
+        event = session.get(Event, created["results"][0]["event_id"])
+        assert (event.rule_id, event.description, event.final_score, event.status) == (
+            rules[2].id, "Redmine #10 (edited)", 1.5, EventStatus.PENDING
+        )
+        
+        # The single-event path upserts too
+        again = await service.create_event(payload(10, user_id=reporter.id, description="Redmine #10 (v2)"), reporter)
+        assert (again.id, again.description) == (event.id, "Redmine #10 (v2)")
+        assert len(session.exec(select(Event)).all()) == event_count
+        
+        # Managers may only retry events of their own department
+        manager = users[2]
+        manager.role = "manager"
+        session.add(manager)
+        session.commit()
+        with pytest.raises(HTTPException) as error:
+            await service.create_event(payload(0), manager)
+        assert error.value.status_code == 403
+        
+        incremental = snapshot_scores()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        recalculated = snapshot_scores()
+        for user_id, (values, breakdown, _) in recalculated.items():
+            assert incremental[user_id][0] == values
+            assert incremental[user_id][1] == breakdown
+        
+        # A concurrent retry inserted the event after this request looked it up
+        lookup = EventService._find_external_events
+        lookups = []
+        
+        def stale_lookup(self, payloads):
+            lookups.append(payloads)
+            return {} if len(lookups) == 1 else lookup(self, payloads)
+        
+        with monkeypatch.context() as patch:
+            patch.setattr(EventService, "_find_external_events", stale_lookup)
+            raced = await service.create_event(payload(10, user_id=reporter.id, description="Redmine #10 (v3)"), reporter)
+            assert (raced.id, raced.description, len(lookups)) == (event.id, "Redmine #10 (v3)", 2)
+            lookups.clear()
+            with pytest.raises(HTTPException) as error:
+                await service.create_event(payload(1, description="Redmine #1 (v2)"), users[0])
+            assert error.value.status_code == 409
+            lookups.clear()
+            assert (await service.create_event(payload(1), users[0])).id == first["results"][1]["event_id"]
+        assert len(session.exec(select(Event)).all()) == event_count
+        
+        # The unique constraint backs the lookup
+        session.add(make_event(users[1], rules[0], 5.0))
+        duplicate = make_event(users[2], rules[0], 5.0)
+        duplicate.source, duplicate.external_id = EventSource.REDMINE, "issue-1"
+        session.add(duplicate)
+        with pytest.raises(IntegrityError):
+            session.commit()
+        session.rollback()
+        
+        # A concurrent insert won the race: only the conflicting item fails
+        monkeypatch.setattr(service, "_find_external_events", lambda payloads: {})
+        raced = await service.create_events_bulk([payload(1), payload(9)], users[0])
+        assert [r["success"] for r in raced["results"]] == [False, True]
+        assert raced["results"][0]["error"] == "事件資料衝突，無法建立"
+        assert len(session.exec(select(Event)).all()) == event_count + 1
+    
+    def test_event_list_hydration_is_batched(self, session: Session, scoring_org):
+        """to_read_models matches to_read_model with a fixed number of queries per page"""
+        from sqlalchemy import event as sa_event
+        from app.services.event import EventService
+        
+        users = scoring_org["users"]
+        events = session.exec(select(Event).order_by(Event.id)).all()
+        for event in events[::3]:
+            event.reviewed_by = users[0].id
+            event.reviewed_at = datetime(2024, 1, 20)
+        events[1].department_id = None
+        session.commit()
+        
+        service = EventService(session)
+        expected = [service.to_read_model(event).model_dump() for event in events]
+        
+        session.expire_all()
+        events = session.exec(select(Event).order_by(Event.id)).all()
+        statements = []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(statement)
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        batched = service.to_read_models(events)
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        
+        assert [event.model_dump() for event in batched] == expected
+        assert any(event.reviewer_name == users[0].name for event in batched)
+        assert batched[1].department_name is None
+        # Users and departments: one query each, however many events; rules come from the snapshot
+        assert len(statements) == 2
+        assert service.to_read_models([]) == []
+    
+    @pytest.mark.asyncio
+    async def test_event_list_cursor_pagination(self, session: Session, scoring_org):
+        """Cursor pages walk the filtered list in order without gaps or repeats"""
+        from fastapi import HTTPException, Response
+        from app.api.api_v1.endpoints.events import get_events
+        
+        users = scoring_org["users"]
+        events = session.exec(select(Event)).all()
+        for i, event in enumerate(events):
+            # Shared timestamps exercise the id tie-breaker
+            event.created_at = datetime(2024, 1, 1 + i // 4)
+        session.commit()
+        
+        async def page(current_user, cursor=None, skip=0, limit=5, status_filter=None):
+            response = Response()
+            result = await get_events(
+                response=response, skip=skip, limit=limit, status_filter=status_filter, user_id=None,
+                department_id=None, project_id=None, date_from=None, date_to=None, search=None,
+                cursor=cursor, current_user=current_user, db=session
+            )
+            return [event.id for event in result], response.headers.get("X-Next-Cursor")
+        
+        for current_user, status_filter in [(users[0], None), (users[0], EventStatus.APPROVED), (users[5], None)]:
+            everything, _ = await page(current_user, limit=100, status_filter=status_filter)
+            walked, cursor = [], None
+            while True:
+                ids, cursor = await page(current_user, cursor=cursor, status_filter=status_filter)
+                walked.extend(ids)
+                if cursor is None:
+                    break
+            assert walked == everything
+            assert len(everything) > 5
+        
+        # Offset pages hand out a cursor too; cursor mode ignores skip
+        everything, _ = await page(users[0], limit=100)
+        first, cursor = await page(users[0], skip=5)
+        second, _ = await page(users[0], cursor=cursor, skip=50)
+        assert first + second == everything[5:15]
+        
+        with pytest.raises(HTTPException) as error:
+            await page(users[0], cursor="not-a-cursor")
+        assert error.value.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_event_search_uses_ngram_index(self, session: Session, scoring_org, make_event):
+        """Search matches CJK substrings through the FTS index, ranked, and follows edits"""
+        from sqlalchemy import text
+        from fastapi import Response
+        from app.api.api_v1.endpoints.events import get_events
+        from app.services.event_search import EventSearch
+        
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        texts = {
+            "help": "主動協助同事完成專案交付",
+            "help_twice": "協助客戶排除問題，並協助新人上手",
+            "late": "專案延遲交付",
+            "english": "Fixed the Redmine sync",
+        }
+        created = {}
+        for key, description in texts.items():
+            event = make_event(users[1], rules[0], 5.0)
+            event.description = description
+            session.add(event)
+            session.commit()
+            created[key] = event.id
+        
+        async def search(term, rank_by_relevance=True, cursor=None, limit=50):
+            response = Response()
+            result = await get_events(
+                response=response, skip=0, limit=limit, status_filter=None, user_id=None, department_id=None,
+                project_id=None, date_from=None, date_to=None, search=term, rank_by_relevance=rank_by_relevance,
+                cursor=cursor, current_user=users[0], db=session
+            )
+            return [event.id for event in result], response.headers.get("X-Next-Cursor")
+        
+        # Multi-character, single-character (including run endings) and word prefixes
+        assert (await search("協助"))[0] == [created["help_twice"], created["help"]]
+        assert set((await search("交付"))[0]) == {created["help"], created["late"]}
+        assert set((await search("付"))[0]) == {created["help"], created["late"]}
+        assert (await search("完成專案"))[0] == [created["help"]]
+        assert (await search("專案 延遲"))[0] == [created["late"]]
+        assert (await search("redm"))[0] == [created["english"]]
+        assert (await search("協專"))[0] == []
+        
+        # Latin words match by prefix only, unlike the former LIKE substring search
+        assert (await search("mine"))[0] == []
+        
+        # Unranked search walks newest first with cursors
+        ids, cursor = await search("協助", rank_by_relevance=False, limit=1)
+        assert ids == [created["help_twice"]] and cursor
+        assert (await search("協助", rank_by_relevance=False, cursor=cursor, limit=1))[0] == [created["help"]]
+        
+        # Edits and deletes reach the index on flush
+        edited = session.get(Event, created["late"])
+        edited.description = "專案準時完成"
+        session.delete(session.get(Event, created["help"]))
+        session.commit()
+        assert (await search("交付"))[0] == []
+        assert (await search("準時"))[0] == [created["late"]]
+        
+        # Rebuild covers rows written around the ORM
+        session.execute(text("DELETE FROM events_fts"))
+        assert (await search("準時"))[0] == []
+        assert EventSearch(session).rebuild(chunk_size=7) == len(session.exec(select(Event)).all())
+        session.commit()
+        assert (await search("準時"))[0] == [created["late"]]
+    
+    def test_event_search_index_created_for_existing_database(self, session: Session, scoring_org, make_event):
+        """A database without the FTS table keeps accepting event writes until startup builds it"""
+        from sqlalchemy import text
+        from app.services.event_search import EventSearch
+        
+        session.execute(text("DROP TABLE events_fts"))
+        session.commit()
+        
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        event = make_event(users[1], rules[0], 5.0)
+        event.description = "主動協助同事"
+        session.add(event)
+        session.commit()
+        event.description = "主動協助同事完成專案"
+        session.add(event)
+        session.commit()
+        
+        search = EventSearch(session)
+        matches = lambda term: session.exec(search.filter(select(Event), term)).all()
+        assert [match.id for match in matches("協助同事完成")] == [event.id]
+        
+        assert search.ensure_index() == len(session.exec(select(Event)).all())
+        session.commit()
+        assert search.ensure_index() == 0
+        assert [match.id for match in matches("完成 同事")] == [event.id]
+        assert "events_fts" in str(search.filter(select(Event), "完成"))
+    
+    @pytest.mark.asyncio
+    async def test_events_summary_aggregates_in_sql_and_caches(self, session: Session, scoring_org, make_event):
+        """The GROUP BY summary matches per-event counting, per scope, and follows event commits"""
+        from sqlalchemy import event as sa_event
+        from app.services.event import EventService
+        
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        users[2].role = "manager"
+        session.add(make_event(users[3], rules[0], 5.0, status=EventStatus.REJECTED))
+        session.add(make_event(users[3], rules[2], 0.0))
+        session.add(make_event(users[1], rules[0], 5.0, month=2))
+        session.commit()
+        
+        def expected(user):
+            events = [
+                e for e in session.exec(select(Event).where(Event.period_year == 2024, Event.period_month == 1)).all()
+                if (user.role != "employee" or e.user_id == user.id)
+                and (user.role != "manager" or e.department_id == user.department_id)
+            ]
+            approved = [e.final_score for e in events if e.status == EventStatus.APPROVED]
+            return {
+                "period": "2024-01",
+                "total_events": len(events),
+                "approved_events": len(approved),
+                "pending_events": sum(1 for e in events if e.status == EventStatus.PENDING),
+                "rejected_events": sum(1 for e in events if e.status == EventStatus.REJECTED),
+                "total_score": round(sum(approved), 2),
+                "positive_score": round(sum(s for s in approved if s > 0), 2),
+                "negative_score": round(sum(s for s in approved if s < 0), 2),
+                "positive_events": sum(1 for s in approved if s > 0),
+                "negative_events": sum(1 for s in approved if s < 0),
+                "average_score": round(sum(approved) / len(approved), 2) if approved else 0
+            }
+        
+        service = EventService(session)
+        for user in (users[0], users[2], users[3]):
+            assert await service.get_events_summary(user, 2024, 1) == expected(user)
+        assert (await service.get_events_summary(users[0], 2030, 1))["total_events"] == 0
+        
+        # Served from the cache until an event of the period is committed
+        statements = []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(statement)
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        cached = await service.get_events_summary(users[0], 2024, 1)
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        assert statements == [] and cached == expected(users[0])
+        
+        session.add(make_event(users[3], rules[1], -3.0))
+        session.commit()
+        assert (await service.get_events_summary(users[0], 2024, 1))["total_events"] == cached["total_events"] + 1
+        
+        moved = session.exec(select(Event).where(Event.period_month == 2)).first()
+        moved.period_month = 1
+        session.commit()
+        assert await service.get_events_summary(users[0], 2024, 1) == expected(users[0])
+        assert await service.get_events_summary(users[3], 2024, 1) == expected(users[3])
+    
+    @pytest.mark.asyncio
+    async def test_batch_approval_updates_set_and_reports_skips(self, session: Session, scoring_org, make_event, snapshot_scores):
+        """One guarded UPDATE and one audit insert per batch; ineligible events are skipped with reasons"""
+        from sqlalchemy import event as sa_event
+        from app.models import AuditAction, AuditLog, EventApproval
+        from app.services.event import EventService
+        from app.services.period_registry import period_registry
+        
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        manager = users[2]
+        manager.role = "manager"
+        locked = make_event(users[4], rules[0], 5.0, status=EventStatus.PENDING, month=2)
+        session.add(locked)
+        period_registry.monthly(session, 2024, 2).is_locked = True
+        session.commit()
+        
+        pending = session.exec(select(Event).where(Event.status == EventStatus.PENDING, Event.period_month == 1)).all()
+        own = [e.id for e in pending if e.department_id == manager.department_id]
+        other = [e.id for e in pending if e.department_id != manager.department_id]
+        approved_id = session.exec(
+            select(Event.id).where(Event.status == EventStatus.APPROVED, Event.department_id == manager.department_id)
+        ).first()
+        service = EventService(session)
+        pending_before = (await service.get_events_summary(users[0], 2024, 1))["pending_events"]
+        
+        statements = []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(" ".join(statement.split()))
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        result = await service.approve_events(
+            own + other + [approved_id, 9999, locked.id, own[0]],
+            EventApproval(status=EventStatus.APPROVED, review_notes="月底批次核准"),
+            manager
+        )
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        
+        assert result["updated_ids"] == own and result["total"] == len(pending) + 3
+        assert {s["event_id"]: s["reason"] for s in result["skipped"]} == {
+            **{event_id: "權限不足" for event_id in other},
+            approved_id: "只能審核待審核狀態的事件",
+            9999: "事件不存在",
+            locked.id: "事件已鎖定，無法修改",
+        }
+        assert sum(s.startswith("UPDATE events SET") for s in statements) == 1
+        assert sum(s.startswith("INSERT INTO audit_logs") for s in statements) == 1
+        assert all(session.get(Event, event_id).reviewed_by == manager.id for event_id in own)
+        assert (await service.get_events_summary(users[0], 2024, 1))["pending_events"] == pending_before - len(own)
+        
+        # Approved events are scored incrementally
+        incremental = snapshot_scores()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        recalculated = snapshot_scores()
+        for user_id, (values, breakdown, _) in recalculated.items():
+            assert incremental[user_id][0] == values
+            assert incremental[user_id][1] == breakdown
+        
+        # Rejections leave scores alone
+        rejected = await service.approve_events(other, EventApproval(status=EventStatus.REJECTED), users[0])
+        assert rejected["updated_ids"] == other and rejected["skipped"] == []
+        assert snapshot_scores() == recalculated
+        assert len(session.exec(select(AuditLog).where(AuditLog.action == AuditAction.REJECT)).all()) == len(other)
+        
+        # An event reviewed elsewhere between the read and the UPDATE is reported, not overwritten
+        racing = [make_event(users[1], rules[0], 5.0, status=EventStatus.PENDING) for _ in range(2)]
+        session.add_all(racing)
+        session.commit()
+        racing_ids = [event.id for event in racing]
+        
+        def review_elsewhere(connection, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE events SET"):
+                cursor.execute("UPDATE events SET status = 'REJECTED' WHERE id = ?", (racing_ids[0],))
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", review_elsewhere)
+        raced = await service.approve_events(racing_ids, EventApproval(status=EventStatus.APPROVED), users[0])
+        sa_event.remove(session.get_bind(), "before_cursor_execute", review_elsewhere)
+        assert raced["updated_ids"] == racing_ids[1:]
+        assert raced["skipped"] == [{"event_id": racing_ids[0], "reason": "事件狀態已變更，請重新整理"}]
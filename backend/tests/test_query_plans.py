@@ -0,0 +1,181 @@
+"""
+Query plan regression tests - hot queries must seek through an index
+
+Each test captures the SQL a hot code path actually runs and EXPLAINs it.
+A full scan of `events` or `scores`, or a plan that skips the expected
+composite index, fails. Plans are checked on SQLite always and on MySQL
+when TEST_MYSQL_URL points at a scratch database.
+"""
+
+import os
+import re
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import event as sa_event
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Department, Event, EventSource, EventStatus, Rule, RulePack, User
+from app.services.event import EventService
+from app.services.scoring import ScoringEngine
+from app.services.scoring_kernel import load_period_columns
+
+MYSQL_URL = os.environ.get("TEST_MYSQL_URL")
+HOT_TABLES = ("events", "scores")
+
+DIALECTS = ["sqlite", pytest.param("mysql", marks=pytest.mark.skipif(not MYSQL_URL, reason="TEST_MYSQL_URL not set"))]
+
+
+@pytest.fixture(params=DIALECTS)
+def plan_session(request):
+    """A session on each database whose plans are checked"""
+    if request.param == "sqlite":
+        yield request.getfixturevalue("session")
+        return
+
+    engine = create_engine(MYSQL_URL)
+    SQLModel.metadata.create_all(engine)
+    from app.services.rule_cache import rule_snapshot_cache
+    from app.services.period_registry import period_registry
+    from app.services.event_summary import event_summary_cache
+    rule_snapshot_cache.invalidate()
+    period_registry.clear()
+    event_summary_cache.invalidate()
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def plan_org(plan_session: Session):
+    """Departments, users with a manager and an employee, and a month of events"""
+    departments = [Department(name=f"部門{i}", code=f"D{i}") for i in range(3)]
+    plan_session.add_all(departments)
+    plan_session.commit()
+
+    users = [
+        User(
+            ldap_uid=f"plan{i}", username=f"plan{i}", email=f"plan{i}@example.com", name=f"使用者{i}",
+            department_id=departments[i % 3].id, role="admin" if i == 0 else "manager" if i == 1 else "employee"
+        )
+        for i in range(30)
+    ]
+    plan_session.add_all(users)
+    plan_session.commit()
+
+    pack = RulePack(name="規則包", status="active", scope="company", effective_from=date(2024, 1, 1), created_by=users[0].id)
+    plan_session.add(pack)
+    plan_session.commit()
+    rules = [
+        Rule(rule_pack_id=pack.id, code=f"R{i}", name=f"規則{i}", base_score=2.0 - i, caps=10.0, category="quality")
+        for i in range(4)
+    ]
+    plan_session.add_all(rules)
+    plan_session.commit()
+
+    statuses = [EventStatus.APPROVED, EventStatus.APPROVED, EventStatus.PENDING, EventStatus.REJECTED]
+    events = [
+        Event(
+            user_id=user.id, reporter_id=users[0].id, department_id=user.department_id, rule_id=rules[i % 4].id,
+            original_score=rules[i % 4].base_score, final_score=rules[i % 4].base_score,
+            occurred_at=date(2024, month, 1 + i % 28), description=f"查詢計畫事件 {i}",
+            status=statuses[i % 4], source=EventSource.MANUAL,
+            period_year=2024, period_month=month, period_quarter=1
+        )
+        for user in users for month in (1, 2, 3) for i in range(6)
+    ]
+    plan_session.add_all(events)
+    plan_session.commit()
+
+    return {"departments": departments, "users": users, "rules": rules}
+
+
+@contextmanager
+def capturing(db: Session):
+    """Collect (statement, parameters) of reads and updates of the hot tables"""
+    statements: List[Tuple[str, Any]] = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE")) and re.search(
+            r"\b(FROM|UPDATE)\s+(%s)\b" % "|".join(HOT_TABLES), statement
+        ):
+            statements.append((statement, parameters))
+
+    sa_event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        sa_event.remove(db.get_bind(), "before_cursor_execute", record)
+
+
+def explain(db: Session, statement: str, parameters: Any) -> List[Dict[str, Any]]:
+    """Plan rows as dicts with the table, access type and index used"""
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        plan = []
+        for row in rows:
+            match = re.match(r"(SCAN|SEARCH) (\w+)(?: USING (?:COVERING )?INDEX (\w+))?", row.detail)
+            if match:
+                plan.append({"table": match.group(2), "full_scan": match.group(1) == "SCAN",
+                             "index": match.group(3), "detail": row.detail})
+        return plan
+
+    rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+    return [
+        {"table": row["table"], "full_scan": row["type"] in ("ALL", "index"), "index": row["key"], "detail": dict(row)}
+        for row in rows
+    ]
+
+
+def assert_seeks(db: Session, statements: List[Tuple[str, Any]], *indexes: str) -> None:
+    """Hot tables are read through one of `indexes` (or by primary key), never scanned"""
+    assert statements, "no statement against the hot tables was captured"
+    for statement, parameters in statements:
+        plan = [row for row in explain(db, statement, parameters) if row["table"] in HOT_TABLES]
+        assert plan, statement
+        for row in plan:
+            assert not row["full_scan"], (statement, row["detail"])
+            assert row["index"] in indexes or "PRIMARY" in str(row["detail"]).upper(), (statement, row["detail"])
+        assert any(row["index"] in indexes for row in plan), (statement, [row["detail"] for row in plan])
+
+
+class TestQueryPlans:
+    """Hot queries use the composite indexes"""
+
+    def test_period_event_loads_seek_by_period_and_status(self, plan_session: Session, plan_org):
+        users = plan_org["users"]
+        with capturing(plan_session) as statements:
+            load_period_columns(plan_session, 2024, 1)
+            load_period_columns(plan_session, 2024, 1, [user.id for user in users[:5]])
+            ScoringEngine(plan_session)._get_events_for_period(users[3].id, 2024, 1)
+        assert len(statements) == 3
+        assert_seeks(plan_session, statements, "ix_events_period_status_user", "ix_events_user_period_status")
+
+    @pytest.mark.asyncio
+    async def test_event_summaries_seek_by_role_scope(self, plan_session: Session, plan_org):
+        users = plan_org["users"]
+        service = EventService(plan_session)
+
+        for user, index in [
+            (users[0], "ix_events_period_status_user"),
+            (users[1], "ix_events_department_period_status"),
+            (users[2], "ix_events_user_period_status"),
+        ]:
+            with capturing(plan_session) as statements:
+                await service.get_events_summary(user, 2024, 1)
+            assert len(statements) == 1
+            assert_seeks(plan_session, statements, index)
+
+    @pytest.mark.asyncio
+    async def test_rankings_seek_by_period_and_department(self, plan_session: Session, plan_org):
+        engine = ScoringEngine(plan_session)
+        await engine.calculate_company_scores(2024, 1)
+
+        with capturing(plan_session) as statements:
+            await engine._calculate_company_rankings(2024, 1)
+            await engine._calculate_department_rankings(plan_org["departments"][1].id, 2024, 1)
+        assert_seeks(plan_session, statements, "ix_scores_period_department_total")
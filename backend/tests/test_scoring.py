@@ -0,0 +1,829 @@
+"""
+Test cases for the scoring engine
+"""
+
+import pytest
+from datetime import date
+from sqlmodel import Session, select
+
+from app.models import (
+    RulePack, Rule, Event, EventStatus, Score, PeriodType, PendingScore
+)
+from app.services.rule_cache import rule_snapshot_cache
+from app.services.scoring import ScoringEngine
+from app.services.scoring_kernel import columns_from_rows, evaluate_period
+
+
+class TestScoringEngine:
+    """Test scoring engine calculations"""
+    
+    @pytest.mark.asyncio
+    async def test_batch_company_scores_match_per_user(self, session: Session, scoring_org, snapshot_scores):
+        """Set-based company scoring must produce the same rows as the per-user path"""
+        engine = ScoringEngine(session)
+        
+        await engine.calculate_company_scores(2024, 1, recalculate=True, batch=False)
+        per_user = snapshot_scores()
+        
+        await engine.calculate_company_scores(2024, 1, recalculate=True, batch=True)
+        batched = snapshot_scores()
+        
+        assert len(per_user) == len(scoring_org["users"])
+        assert batched == per_user
+    
+    @pytest.mark.asyncio
+    async def test_batch_company_scores_apply_caps(self, session: Session, scoring_org):
+        """Rule caps are applied per user in batch mode"""
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        
+        user = scoring_org["users"][5]
+        bonus = scoring_org["rules"][0]
+        score = session.exec(select(Score).where(Score.user_id == user.id, Score.period_type == PeriodType.MONTHLY)).one()
+        
+        entry = score.rule_breakdown[str(bonus.id)]
+        assert entry["cap_applied"] is True
+        assert entry["total_score"] == 12.0
+        assert entry["original_total"] == 25.0
+    
+    @pytest.mark.asyncio
+    async def test_batch_failure_falls_back_to_per_user(self, session: Session, scoring_org, monkeypatch, capsys, caplog, snapshot_scores, score_values):
+        """A kernel error only fails the users that also fail on the per-user path"""
+        import app.services.scoring as scoring_module
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1, recalculate=True, batch=False)
+        per_user = snapshot_scores()
+        session.exec(Score.__table__.delete())
+        session.commit()
+        
+        broken = scoring_org["users"][3]
+        calculate_scores = ScoringEngine._calculate_scores
+        
+        def failing_kernel(*args, **kwargs):
+            raise ValueError("kernel failure")
+        
+        def failing_user(self, events, rules, user, period):
+            if user.id == broken.id:
+                raise ValueError("bad user")
+            return calculate_scores(self, events, rules, user, period)
+        
+        monkeypatch.setattr(scoring_module, "evaluate_period", failing_kernel)
+        monkeypatch.setattr(ScoringEngine, "_calculate_scores", failing_user)
+        
+        errors = []
+        period = engine._get_or_create_period(2024, 1)
+        scores = engine._score_users_batch(period, scoring_org["users"], recalculate=True, errors=errors)
+        
+        assert errors == [f"User {broken.id}: bad user"]
+        assert capsys.readouterr().out == ""
+        assert f"Scoring failed for user {broken.id}" in caplog.text
+        assert sorted(score.user_id for score in scores) == sorted(
+            user.id for user in scoring_org["users"] if user.id != broken.id
+        )
+        for score in scores:
+            assert score_values(score) == per_user[score.user_id][0]
+    
+    @pytest.mark.asyncio
+    async def test_incremental_event_changes_match_full_recalculation(self, session: Session, scoring_org, snapshot_scores):
+        """Approving, re-scoring and deleting events keeps scores in sync without a rescan"""
+        from app.models import EventApproval, EventUpdate
+        from app.services.event import EventService
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        
+        admin = scoring_org["users"][0]
+        event_service = EventService(session)
+        events = session.exec(select(Event).order_by(Event.id)).all()
+        
+        pending = next(e for e in events if e.status == EventStatus.PENDING)
+        await event_service.approve_event(
+            pending, EventApproval(status=EventStatus.APPROVED), admin
+        )
+        
+        capped = next(e for e in events if e.user_id == scoring_org["users"][3].id)
+        await event_service.update_event(
+            capped, EventUpdate(adjusted_score=-20.0, adjustment_reason="test"), admin
+        )
+        
+        removed = next(e for e in events if e.user_id == scoring_org["users"][1].id)
+        await event_service.delete_event(removed, admin)
+        
+        incremental = snapshot_scores()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        
+        recalculated = snapshot_scores()
+        for user_id, (values, breakdown, _) in recalculated.items():
+            assert incremental[user_id][0] == values
+            assert incremental[user_id][1] == breakdown
+    
+    @pytest.mark.asyncio
+    async def test_event_approval_defers_ranks_to_dirty_run(self, session: Session, scoring_org, make_event, snapshot_scores):
+        """An approval updates the score at once; the dirty-set run brings ranks up to date"""
+        from app.models import EventApproval
+        from app.services.event import EventService
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        ranks_before = {user_id: rank for user_id, (_, _, rank) in snapshot_scores().items()}
+        
+        # Enough to move user 1 to first place
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        assert ranks_before[users[1].id] != 1
+        pending = make_event(users[1], rules[2], 30.0, status=EventStatus.PENDING)
+        session.add(pending)
+        session.commit()
+        total_before = engine._get_existing_score(users[1].id, engine._get_or_create_period(2024, 1).id).total_score
+        await EventService(session).approve_event(pending, EventApproval(status=EventStatus.APPROVED), users[0])
+        
+        period = engine._get_or_create_period(2024, 1)
+        score = engine._get_existing_score(users[1].id, period.id)
+        assert score.total_score == total_before + 30.0
+        assert period.needs_refresh
+        assert {user_id: rank for user_id, (_, _, rank) in snapshot_scores().items()} == ranks_before
+        
+        await engine.recalculate_dirty()
+        incremental = snapshot_scores()
+        assert incremental[users[1].id][2] == 1
+        assert not engine._get_or_create_period(2024, 1).needs_refresh
+        
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        assert snapshot_scores() == incremental
+    
+    @pytest.mark.asyncio
+    async def test_rule_edit_marks_only_affected_scores(self, session: Session, scoring_org, snapshot_scores):
+        """Changing a rule flags exactly the users with approved events on it"""
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        
+        bonus = scoring_org["rules"][0]
+        bonus.caps = 7.0
+        session.add(bonus)
+        session.commit()
+        
+        flagged = set(session.exec(
+            select(Score.user_id).where(Score.needs_recalculation == True)
+        ).all())
+        expected = {user.id for user in scoring_org["users"][1:]}
+        assert flagged == expected
+        
+        results = await engine.recalculate_dirty(batch_size=2)
+        assert results["successful"] == len(expected)
+        assert results["failed"] == 0
+        
+        incremental = snapshot_scores()
+        assert not session.exec(select(Score).where(Score.needs_recalculation == True)).all()
+        
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        assert snapshot_scores() == incremental
+    
+    @pytest.mark.asyncio
+    async def test_scheduler_claims_one_run_per_day_off_the_event_loop(self, session: Session, scoring_org, monkeypatch):
+        """Only the first worker claims a day's run, which recalculates in an executor thread"""
+        import threading
+        from app.services import scheduler as scheduler_module
+        from app.services.scheduler import ScoringScheduler
+        
+        # Without Redis every enabled worker runs
+        assert ScoringScheduler(redis_url="redis://127.0.0.1:1/0").claim_run(date(2024, 2, 1))
+        
+        keys = {}
+        
+        class FakeRedis:
+            def set(self, key, value, nx=False, ex=None):
+                if nx and key in keys:
+                    return None
+                keys[key] = value
+                return True
+        
+        monkeypatch.setattr(scheduler_module.redis.Redis, "from_url", lambda *args, **kwargs: FakeRedis())
+        workers = [ScoringScheduler(), ScoringScheduler()]
+        assert [worker.claim_run(date(2024, 2, 1)) for worker in workers] == [True, False]
+        assert workers[1].claim_run(date(2024, 2, 2))
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        bonus = scoring_org["rules"][0]
+        bonus.caps = 7.0
+        session.add(bonus)
+        session.commit()
+        
+        threads = []
+        recalculate_dirty = ScoringEngine.recalculate_dirty
+        
+        async def recording(self, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return await recalculate_dirty(self, *args, **kwargs)
+        
+        monkeypatch.setattr(ScoringEngine, "recalculate_dirty", recording)
+        monkeypatch.setattr(scheduler_module, "engine", session.get_bind())
+        results = await workers[0].run_once()
+        assert (results["successful"], results["failed"]) == (len(scoring_org["users"]) - 1, 0)
+        assert threads and threads[0] is not threading.current_thread()
+    
+    @pytest.mark.asyncio
+    async def test_event_without_score_row_is_marked_dirty(self, session: Session, scoring_org, make_event):
+        """Approved events in a period with no score yet are queued for the nightly run"""
+        user = scoring_org["users"][2]
+        engine = ScoringEngine(session)
+        
+        event = make_event(user, scoring_org["rules"][2], 1.5, month=2)
+        session.add(event)
+        session.commit()
+        await engine.apply_event_change(None, ScoringEngine.event_contribution(event))
+        
+        # Queued without a zero score row that rankings would pick up
+        pending = session.exec(select(PendingScore)).one()
+        assert (pending.user_id, pending.period_id) == (user.id, engine._get_or_create_period(2024, 2).id)
+        assert not session.exec(select(Score).where(Score.period_month == 2)).all()
+        await engine.apply_event_change(None, ScoringEngine.event_contribution(event))
+        assert len(session.exec(select(PendingScore)).all()) == 1
+        
+        results = await engine.recalculate_dirty()
+        assert (results["successful"], results["failed"]) == (1, 0)
+        score = session.exec(select(Score).where(Score.user_id == user.id, Score.period_type == PeriodType.MONTHLY)).one()
+        assert score.needs_recalculation is False
+        assert score.total_score == 1.5
+        assert score.rank_company == 1
+        assert not session.exec(select(PendingScore)).all()
+        
+        # A full calculation since queueing makes the pending entry obsolete
+        other = scoring_org["users"][3]
+        event = make_event(other, scoring_org["rules"][2], 1.5, month=3)
+        session.add(event)
+        session.commit()
+        await engine.apply_event_change(None, ScoringEngine.event_contribution(event))
+        await engine.calculate_company_scores(2024, 3)
+        assert (await engine.recalculate_dirty())["total_users"] == 0
+        assert not session.exec(select(PendingScore)).all()
+    
+    def test_rule_snapshot_is_reused_until_rules_change(self, session: Session, scoring_org):
+        """The rule snapshot is loaded once and reloaded only after a rule write"""
+        from dataclasses import FrozenInstanceError
+        
+        bonus = scoring_org["rules"][0]
+        first = rule_snapshot_cache.snapshot(session)
+        assert rule_snapshot_cache.snapshot(session) is first
+        assert set(rule_snapshot_cache.active_rules(session, 2024, 1)) == {r.id for r in scoring_org["rules"]}
+        assert rule_snapshot_cache.active_rules(session, 2023, 12) == {}
+        
+        with pytest.raises(FrozenInstanceError):
+            first.get_rule(bonus.id).caps = 1.0
+        
+        bonus.caps = 99.0
+        session.add(bonus)
+        session.commit()
+        
+        second = rule_snapshot_cache.snapshot(session)
+        assert second is not first
+        assert second.version != first.version
+        assert second.get_rule(bonus.id).caps == 99.0
+    
+    @pytest.mark.asyncio
+    async def test_rule_pack_scope_and_effective_dates(self, session: Session, scoring_org, make_event):
+        """Department/role packs apply only to their targets and expired packs are ignored"""
+        from app.services.rule_cache import rule_snapshot_cache
+        
+        departments = scoring_org["departments"]
+        users = scoring_org["users"]
+        
+        department_pack = RulePack(
+            name="部門規則包", status="active", scope="department",
+            target_department_id=departments[0].id,
+            effective_from=date(2024, 1, 1), created_by=users[0].id
+        )
+        role_pack = RulePack(
+            name="角色規則包", status="active", scope="role", target_role="admin",
+            effective_from=date(2024, 1, 1), created_by=users[0].id
+        )
+        expired_pack = RulePack(
+            name="過期規則包", status="active", scope="company",
+            effective_from=date(2023, 1, 1), effective_to=date(2023, 12, 31), created_by=users[0].id
+        )
+        session.add_all([department_pack, role_pack, expired_pack])
+        session.commit()
+        
+        department_rule = Rule(rule_pack_id=department_pack.id, code="DEPT", name="部門", base_score=2.0)
+        role_rule = Rule(rule_pack_id=role_pack.id, code="ROLE", name="角色", base_score=3.0)
+        expired_rule = Rule(rule_pack_id=expired_pack.id, code="OLD", name="過期", base_score=4.0)
+        session.add_all([department_rule, role_rule, expired_rule])
+        session.commit()
+        
+        company_ids = {rule.id for rule in scoring_org["rules"]}
+        index = rule_snapshot_cache.scope_index(session, 2024, 1)
+        assert index.rule_ids_for(departments[0].id, "admin") == company_ids | {department_rule.id, role_rule.id}
+        assert index.rule_ids_for(departments[1].id, "employee") == company_ids
+        assert expired_rule.id in rule_snapshot_cache.scope_index(session, 2023, 6).company_rule_ids
+        
+        # users[1] is an employee in departments[1]: the department rule does not count
+        for rule in (department_rule, expired_rule):
+            session.add(make_event(users[1], rule, rule.base_score))
+        session.add(make_event(users[2], department_rule, 2.0))
+        session.commit()
+        
+        await ScoringEngine(session).calculate_company_scores(2024, 1, recalculate=True)
+        breakdowns = {
+            score.user_id: score.rule_breakdown
+            for score in session.exec(select(Score).where(Score.period_type == PeriodType.MONTHLY)).all()
+        }
+        assert str(department_rule.id) not in breakdowns[users[1].id]
+        assert str(expired_rule.id) not in breakdowns[users[1].id]
+        assert breakdowns[users[2].id][str(department_rule.id)]["total_score"] == 2.0
+    
+    @pytest.mark.asyncio
+    async def test_scoring_plan_applies_bounds_and_category_weights(self, session: Session, scoring_org, make_event, snapshot_scores):
+        """min/max_score clamp each event and weight_config scales category totals"""
+        rule_pack = scoring_org["rule_pack"]
+        rule_pack.weight_config = {"category_weights": {"teamwork": 2.0}}
+        open_rule = scoring_org["rules"][2]
+        open_rule.max_score = 2.0
+        session.add_all([rule_pack, open_rule])
+        session.commit()
+        
+        user = scoring_org["users"][1]
+        session.add(make_event(user, open_rule, 10.0, adjusted_score=10.0))
+        session.commit()
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1, batch=False)
+        per_user = snapshot_scores()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        assert snapshot_scores() == per_user
+        
+        score = session.exec(select(Score).where(Score.user_id == user.id, Score.period_type == PeriodType.MONTHLY)).one()
+        entry = score.rule_breakdown[str(open_rule.id)]
+        # 1.5 + min(10.0, 2.0) = 3.5 raw, doubled by the teamwork weight
+        assert entry["original_total"] == 3.5
+        assert entry["total_score"] == 7.0
+        assert score.computation_version == "1.1"
+    
+    def test_vectorized_kernel_matches_scoring_plan(self, session: Session, scoring_org):
+        """The NumPy kernel returns exactly what the row-by-row plan returns"""
+        import random
+        
+        rule_pack = scoring_org["rule_pack"]
+        rule_pack.weight_config = {"category_weights": {"quality": 1.5}}
+        session.add(rule_pack)
+        restricted_pack = RulePack(
+            name="部門規則包", status="active", scope="department",
+            target_department_id=scoring_org["departments"][1].id,
+            effective_from=date(2024, 1, 1), created_by=scoring_org["users"][0].id
+        )
+        session.add(restricted_pack)
+        session.commit()
+        restricted_rule = Rule(
+            rule_pack_id=restricted_pack.id, code="DEPT", name="部門", base_score=1.0, caps=3.0, min_score=-1.0
+        )
+        session.add(restricted_rule)
+        session.commit()
+        
+        users = scoring_org["users"]
+        rules = scoring_org["rules"] + [restricted_rule]
+        scope_index = rule_snapshot_cache.scope_index(session, 2024, 1)
+        plan = rule_snapshot_cache.scoring_plan(session, 2024, 1)
+        
+        generator = random.Random(7)
+        rows = []
+        for user in users[1:]:
+            for _ in range(generator.randint(0, 40)):
+                rule_id = generator.choice([rule.id for rule in rules] + [9999])
+                original = round(generator.uniform(-5, 5), 1)
+                adjusted = generator.choice([None, original, round(generator.uniform(-5, 5), 1)])
+                final = adjusted if adjusted is not None else original
+                rows.append((user.id, rule_id, final, original, adjusted))
+        rows.sort(key=lambda row: row[0])
+        
+        by_id = {user.id: user for user in users}
+        rule_ids_for_user = lambda user_id: scope_index.rules_for(
+            by_id[user_id].department_id, by_id[user_id].role
+        )
+        user_ids = [user.id for user in users]
+        
+        expected = plan.evaluate(rows, rule_ids_for_user, user_ids=user_ids)
+        actual = evaluate_period(plan, columns_from_rows(rows), rule_ids_for_user, user_ids=user_ids)
+        
+        assert actual == expected
+        assert any(entry["cap_applied"] for data in actual.values() for entry in data["rule_breakdown"].values())
+        assert all(
+            restricted_rule.id not in actual[user.id]["rule_breakdown"]
+            for user in users if user.department_id != scoring_org["departments"][1].id
+        )
+    
+    @pytest.mark.asyncio
+    async def test_window_rankings_match_fallback(self, session: Session, scoring_org, monkeypatch, make_event):
+        """SQL window ranking and the Python fallback agree, including ties and departments"""
+        users = scoring_org["users"]
+        # users[1] and users[3] (same department) end up tied
+        session.add(make_event(users[1], scoring_org["rules"][0], 5.0))
+        session.add(make_event(users[1], scoring_org["rules"][0], 5.0))
+        session.commit()
+        
+        engine = ScoringEngine(session)
+        assert engine._supports_window_ranking()
+        await engine.calculate_company_scores(2024, 1)
+        
+        def rankings():
+            return {
+                score.user_id: (
+                    score.rank_company, score.percentile_company,
+                    score.rank_department, score.percentile_department
+                )
+                for score in session.exec(select(Score).where(Score.period_type == PeriodType.MONTHLY)).all()
+            }
+        
+        windowed = rankings()
+        assert windowed[users[1].id][0] == windowed[users[3].id][0]
+        assert windowed[users[1].id][2] == windowed[users[3].id][2]
+        assert all(ranks[2] is not None for ranks in windowed.values())
+        assert max(ranks[1] for ranks in windowed.values()) == 100.0
+        
+        monkeypatch.setattr(ScoringEngine, "_supports_window_ranking", lambda self: False)
+        for score in session.exec(select(Score)).all():
+            score.rank_company = score.rank_department = None
+            session.add(score)
+        session.commit()
+        await engine._calculate_company_rankings(2024, 1)
+        
+        assert rankings() == windowed
+    
+    @pytest.mark.asyncio
+    async def test_parallel_recalculation_is_deterministic(self, session: Session, scoring_org, tmp_path, snapshot_scores):
+        """Department partitions scored in worker processes match the sequential run"""
+        from sqlmodel import create_engine
+        
+        # Worker processes need a database they can open themselves
+        file_engine = create_engine(f"sqlite:///{tmp_path / 'scores.db'}")
+        source = session.connection().connection.driver_connection
+        with file_engine.connect() as connection:
+            source.backup(connection.connection.driver_connection)
+        
+        outcomes = []
+        for workers in (1, 2, 3):
+            with Session(file_engine) as file_session:
+                for score in file_session.exec(select(Score)).all():
+                    file_session.delete(score)
+                file_session.commit()
+                
+                results = await ScoringEngine(file_session).recalculate_period(2024, 1, workers=workers)
+                outcomes.append((
+                    {key: results[key] for key in ("total_users", "successful", "failed", "errors")},
+                    snapshot_scores(file_session)
+                ))
+        
+        file_engine.dispose()
+        assert outcomes[0][0]["successful"] == len(scoring_org["users"])
+        assert outcomes[0][1]
+        assert outcomes[1] == outcomes[0]
+        assert outcomes[2] == outcomes[0]
+    
+    @pytest.mark.asyncio
+    async def test_quarterly_and_yearly_rollups_from_monthly_scores(self, session: Session, scoring_org, make_event):
+        """Rollups sum capped monthly totals and refresh incrementally when a month changes"""
+        from app.services.score_rollup import ScoreRollupService
+        
+        users = scoring_org["users"]
+        bonus = scoring_org["rules"][0]
+        # users[5] hits the monthly BONUS cap in January and again in February
+        for _ in range(3):
+            session.add(make_event(users[5], bonus, 5.0, month=2))
+        session.add(make_event(users[5], bonus, 5.0, month=4))
+        session.commit()
+        
+        engine = ScoringEngine(session)
+        for month in (1, 2, 4):
+            await engine.calculate_company_scores(2024, month)
+        
+        def scores_for(user_id):
+            return {
+                (score.period_type, score.period_month, score.period_quarter): score
+                for score in session.exec(select(Score).where(Score.user_id == user_id)).all()
+            }
+        
+        rows = scores_for(users[5].id)
+        january, february, april = rows[("monthly", 1, None)], rows[("monthly", 2, None)], rows[("monthly", 4, None)]
+        q1, q2, year = rows[("quarterly", None, 1)], rows[("quarterly", None, 2)], rows[("yearly", None, None)]
+        
+        assert q1.total_score == round(january.total_score + february.total_score, 2)
+        assert q2.total_score == april.total_score
+        assert year.total_score == round(q1.total_score + q2.total_score, 2)
+        assert q1.total_events == january.total_events + february.total_events
+        
+        entry = q1.rule_breakdown[str(bonus.id)]
+        # Caps are monthly: 12 + 12, not one quarterly cap of 12 on 40
+        assert entry["total_score"] == 24.0
+        assert entry["original_total"] == 40.0
+        assert entry["months_capped"] == 2
+        assert q1.rank_company is not None and q1.rank_department is not None
+        
+        # A February change flags the month; the dirty-set run refreshes Q1 and the year
+        event = make_event(users[2], scoring_org["rules"][2], 1.5, month=2)
+        session.add(event)
+        session.commit()
+        await engine.apply_event_change(None, ScoringEngine.event_contribution(event))
+        assert engine._get_or_create_period(2024, 2).needs_refresh
+        await engine.recalculate_dirty()
+        assert not engine._get_or_create_period(2024, 2).needs_refresh
+        
+        incremental = {key: score.total_score for key, score in scores_for(users[2].id).items()}
+        ScoreRollupService(session).rollup_year(2024)
+        rebuilt = {key: score.total_score for key, score in scores_for(users[2].id).items()}
+        assert incremental == rebuilt
+        assert incremental[("quarterly", None, 1)] == round(
+            incremental[("monthly", 1, None)] + incremental[("monthly", 2, None)], 2
+        )
+    
+    @pytest.mark.asyncio
+    async def test_simulation_matches_applied_rules_without_writing(self, session: Session, scoring_org, make_event, snapshot_scores):
+        """What-if results equal a real recalculation, and nothing is written"""
+        users = scoring_org["users"]
+        bonus = scoring_org["rules"][0]
+        draft_pack = RulePack(
+            name="草案規則包", status="draft", scope="company",
+            effective_from=date(2024, 6, 1), created_by=users[0].id
+        )
+        session.add(draft_pack)
+        session.commit()
+        draft_rule = Rule(rule_pack_id=draft_pack.id, code="DRAFT", name="草案", base_score=4.0, caps=6.0)
+        session.add(draft_rule)
+        session.commit()
+        for _ in range(2):
+            session.add(make_event(users[2], draft_rule, 4.0))
+        session.commit()
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        before = snapshot_scores()
+        
+        result = await engine.simulate_period(
+            2024, 1, rule_pack_id=draft_pack.id, rule_changes={bonus.id: {"caps": 7.0}}
+        )
+        assert snapshot_scores() == before
+        assert draft_pack.status == "draft"
+        
+        by_user = {entry["user_id"]: entry for entry in result["users"]}
+        assert by_user[users[1].id]["delta"] == 0
+        assert by_user[users[5].id]["delta"] == -5.0
+        assert by_user[users[2].id]["delta"] == round(6.0 - 3.0, 2)
+        assert result["total_delta"] == round(sum(entry["delta"] for entry in result["users"]), 2)
+        assert sum(entry["users"] for entry in result["departments"]) == len(users)
+        
+        with pytest.raises(ValueError):
+            await engine.simulate_period(2024, 1, rule_changes={bonus.id: {"unknown": 1}})
+        
+        # Apply the same changes for real and compare
+        draft_pack.status = "active"
+        draft_pack.effective_from = date(2024, 1, 1)
+        bonus.caps = 7.0
+        session.add_all([draft_pack, bonus])
+        session.commit()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        
+        applied = snapshot_scores()
+        for user_id, entry in by_user.items():
+            assert entry["simulated_score"] == applied[user_id][0][0]
+            assert entry["simulated_rank"] == applied[user_id][2]
+    
+    @pytest.mark.asyncio
+    async def test_previous_period_comparison(self, session: Session, scoring_org, monkeypatch, make_event):
+        """score_change is filled in bulk and follows recalculation of the prior month"""
+        users = scoring_org["users"]
+        for user in users[1:]:
+            session.add(make_event(user, scoring_org["rules"][2], 1.5, month=2))
+        session.commit()
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        await engine.calculate_company_scores(2024, 2)
+        
+        def monthly(month):
+            return {
+                score.user_id: score
+                for score in session.exec(
+                    select(Score).where(Score.period_type == PeriodType.MONTHLY, Score.period_month == month)
+                ).all()
+            }
+        
+        january, february = monthly(1), monthly(2)
+        assert all(score.performance_trend == "new" for score in january.values())
+        for user_id, score in february.items():
+            assert score.previous_total_score == january[user_id].total_score
+            assert score.score_change == round(score.total_score - january[user_id].total_score, 2)
+        assert february[users[5].id].performance_trend == "declining"
+        
+        # Recalculating January after a change refreshes February's comparison
+        session.add(make_event(users[1], scoring_org["rules"][2], 1.5, month=1))
+        session.commit()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        assert monthly(2)[users[1].id].previous_total_score == monthly(1)[users[1].id].total_score
+        
+        def comparisons():
+            return {
+                user_id: (score.previous_total_score, score.score_change, score.score_change_percent)
+                for user_id, score in monthly(2).items()
+            }
+        
+        joined = comparisons()
+        monkeypatch.setattr(ScoringEngine, "_supports_update_from", lambda self: False)
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        assert comparisons() == joined
+    
+    @pytest.mark.asyncio
+    async def test_score_writer_skips_unchanged_rows(self, session: Session, scoring_org):
+        """Bulk upsert writes only new, changed or flagged scores"""
+        from app.services.score_writer import ScoreWriter
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        period = engine._get_or_create_period(2024, 1)
+        computed_at = {
+            score.user_id: score.computed_at
+            for score in session.exec(select(Score).where(Score.period_id == period.id)).all()
+        }
+        
+        # A forced recalculation with unchanged events rewrites nothing
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        assert {
+            score.user_id: score.computed_at
+            for score in session.exec(select(Score).where(Score.period_id == period.id)).all()
+        } == computed_at
+        
+        users = scoring_org["users"]
+        plan_data = engine._calculate_scores([], {}, users[1], period)
+        writer = ScoreWriter(session, batch_size=2)
+        rows = [(user.id, user.department_id, dict(plan_data)) for user in users[1:3]]
+        assert writer.write(period, rows) == {"inserted": 0, "updated": 2, "unchanged": 0}
+        assert writer.write(period, rows) == {"inserted": 0, "updated": 0, "unchanged": 2}
+        
+        flagged = session.exec(
+            select(Score).where(Score.period_id == period.id, Score.user_id == users[1].id)
+        ).one()
+        flagged.needs_recalculation = True
+        session.add(flagged)
+        session.commit()
+        assert writer.write(period, rows) == {"inserted": 0, "updated": 1, "unchanged": 1}
+        session.refresh(flagged)
+        assert flagged.needs_recalculation is False
+        assert flagged.total_score == 0
+        assert session.exec(
+            select(Score).where(Score.period_id == period.id, Score.user_id == users[1].id)
+        ).all() == [flagged]
+    
+    @pytest.mark.asyncio
+    async def test_period_registry_resolves_once_and_stays_unique(self, session: Session, scoring_org):
+        """Periods resolve to one row per (type, name) and are looked up once per process"""
+        from sqlalchemy import event as sa_event
+        from sqlalchemy.exc import IntegrityError
+        from app.models import Period
+        from app.services.period_registry import period_registry
+        
+        first = period_registry.monthly(session, 2024, 3)
+        assert (first.name, first.type) == ("2024-03", PeriodType.MONTHLY)
+        
+        # A second resolve is an identity-map hit: no SQL at all
+        statements = []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(statement)
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        assert period_registry.monthly(session, 2024, 3) is first
+        assert ScoringEngine(session)._get_or_create_period(2024, 3) is first
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        assert statements == []
+        
+        # New periods join the caller's transaction instead of committing it
+        session.commit()
+        users = scoring_org["users"]
+        users[1].name = "未提交"
+        session.add(users[1])
+        period_registry.monthly(session, 2024, 4)
+        session.rollback()
+        assert users[1].name == "使用者1"
+        assert period_registry.find(session, PeriodType.MONTHLY, 2024, 4) is None
+        
+        # Another process already inserted the period: insert-if-missing is a no-op
+        period_registry.clear()
+        period_registry._insert_if_missing(session, Period.generate_monthly_period(2024, 3))
+        assert period_registry.monthly(session, 2024, 3).id == first.id
+        
+        session.add(Period.generate_monthly_period(2024, 3))
+        with pytest.raises(IntegrityError):
+            session.commit()
+        session.rollback()
+    
+    @pytest.mark.asyncio
+    async def test_score_ledger_time_travel_and_rebuild(self, session: Session, scoring_org, score_values):
+        """The ledger replays past scores and rebuilds current ones without reading events"""
+        from datetime import datetime, timedelta, timezone
+        from sqlalchemy import event as sa_event
+        from app.models import EventUpdate
+        from app.services.event import EventService
+        from app.services.score_ledger import ScoreLedger
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        
+        # Seed the ledger with the events that predate it; a second pass is a no-op
+        ledger = ScoreLedger(session)
+        approved = session.exec(select(Event).where(Event.status == EventStatus.APPROVED)).all()
+        assert ledger.reconcile_all() == {"months": 1, "added": len(approved), "removed": 0}
+        assert ledger.reconcile_all() == {"months": 1, "added": 0, "removed": 0}
+        assert ledger.reconcile(2024, 1) == {"added": 0, "removed": 0}
+        
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        user = users[3]
+        stored = session.exec(
+            select(Score).where(Score.user_id == user.id, Score.period_type == PeriodType.MONTHLY)
+        ).one()
+        before_values = (stored.total_score, stored.positive_score, stored.total_events, stored.rule_breakdown)
+        before_adjustment = datetime.utcnow()
+        
+        bonus = next(e for e in approved if e.user_id == user.id and e.rule_id == rules[0].id)
+        await EventService(session).update_event(
+            bonus, EventUpdate(adjusted_score=-20.0, adjustment_reason="test"), users[0]
+        )
+        
+        # As of before the adjustment the ledger reproduces the old score
+        past = engine.score_from_ledger(user.id, 2024, 1, as_of=before_adjustment)
+        assert (past["total_score"], past["positive_score"], past["total_events"]) == before_values[:3]
+        assert {str(key): value for key, value in past["rule_breakdown"].items()} == before_values[3]
+        
+        totals = ledger.rule_totals(user.id, 2024, 1)
+        assert totals[rules[0].id] == {"events": 3, "original_total": 5.0 + 5.0 - 20.0}
+        assert ledger.rule_totals(user.id, 2024, 1, as_of=before_adjustment)[rules[0].id]["original_total"] == 15.0
+        
+        # Aware timestamps are compared in UTC
+        taipei = timezone(timedelta(hours=8))
+        utc = before_adjustment.replace(tzinfo=timezone.utc)
+        for as_of in (utc, utc.astimezone(taipei)):
+            assert ledger.rule_totals(user.id, 2024, 1, as_of=as_of)[rules[0].id]["original_total"] == 15.0
+        assert ledger.rule_totals(user.id, 2024, 1, as_of=before_adjustment.replace(tzinfo=taipei)) == {}
+        
+        # Rebuilding from the ledger never reads events and matches a full recalculation
+        statements = []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(statement)
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        rebuilt = await engine.rebuild_score_from_ledger(user.id, 2024, 1)
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        assert not any("FROM events" in statement for statement in statements)
+        
+        rebuilt_values = score_values(rebuilt), rebuilt.rule_breakdown
+        recalculated = await engine.calculate_user_score(user.id, 2024, 1, recalculate=True)
+        assert rebuilt_values == (
+            score_values(recalculated), recalculated.rule_breakdown
+        )
+    
+    @pytest.mark.asyncio
+    async def test_rule_accumulators_follow_event_changes(self, session: Session, scoring_org, make_event):
+        """Incremental changes keep per-rule totals equal to a rescore, without reading events"""
+        from sqlalchemy import event as sa_event
+        from app.models import ScoreRuleTotal
+        
+        def accumulators():
+            return {
+                (row.user_id, row.rule_id): (row.events, row.raw_total, row.capped_total, row.cap_applied)
+                for row in session.exec(select(ScoreRuleTotal)).all()
+            }
+        
+        engine = ScoringEngine(session)
+        await engine.calculate_company_scores(2024, 1)
+        
+        # Batch scoring writes one row per rule in each breakdown
+        for score in session.exec(select(Score).where(Score.period_type == PeriodType.MONTHLY)).all():
+            for rule_id, entry in score.rule_breakdown.items():
+                assert accumulators()[(score.user_id, int(rule_id))] == (
+                    entry["events"], entry["original_total"], entry["total_score"], entry["cap_applied"]
+                )
+        
+        users, rules = scoring_org["users"], scoring_org["rules"]
+        statements = []
+        
+        def record(connection, cursor, statement, *args):
+            statements.append(statement)
+        
+        # User 5 is over the bonus cap; two more bonus events and one removal
+        events = session.exec(select(Event).where(Event.user_id == users[5].id, Event.rule_id == rules[0].id)).all()
+        added = [make_event(users[5], rules[0], 5.0) for _ in range(2)]
+        session.add_all(added)
+        session.commit()
+        
+        changes = [(None, ScoringEngine.event_contribution(event)) for event in added]
+        changes.append((ScoringEngine.event_contribution(events[0]), None))
+        
+        sa_event.listen(session.get_bind(), "before_cursor_execute", record)
+        for before, after in changes:
+            await engine.apply_event_change(before, after)
+        sa_event.remove(session.get_bind(), "before_cursor_execute", record)
+        assert not any("FROM events" in statement for statement in statements)
+        
+        session.delete(events[0])
+        session.commit()
+        
+        assert accumulators()[(users[5].id, rules[0].id)] == (6, 30.0, 12.0, True)
+        incremental = accumulators()
+        await engine.calculate_company_scores(2024, 1, recalculate=True)
+        assert accumulators() == incremental